@@ -11,6 +11,8 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from app.core.config import settings
 from app.db.base import Base
+from app.db.database import SYNC_DATABASE_URL
+from app.db.fulltext import is_fulltext_object
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -24,8 +26,9 @@ if config.config_file_name is not None:
 # Overwrite sqlalchemy.url with the one from settings
 # Only set it if it's not already set in env (to allow env override if needed, but settings is best source)
 # Overwrite sqlalchemy.url with the one from settings
+# Async URLs (sqlite+aiosqlite, postgresql+asyncpg) migrate through their sync driver
 print(f"DEBUG: Using DATABASE_URL: {settings.DATABASE_URL}")
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -33,6 +36,11 @@ config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # FTS5 tables/triggers and tsvector columns are managed by hand in migrations
+    return not (reflected and compare_to is None and is_fulltext_object(name, type_))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -56,6 +64,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_object=include_object,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -78,7 +87,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,53 @@
+""" add_inbox_replies
+
+Revision ID: a3c8e6f1d9b4
+Revises: f7b3d1e9a4c6
+Create Date: 2026-10-18 14:21:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e6f1d9b4'
+down_revision: Union[str, Sequence[str], None] = 'f7b3d1e9a4c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inbox_replies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('threads_reply_id', sa.String(), nullable=False),
+    sa.Column('parent_media_id', sa.String(), nullable=False),
+    sa.Column('text', sa.String(), nullable=True),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('permalink', sa.String(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('threads_reply_id')
+    )
+    op.create_index(op.f('ix_inbox_replies_id'), 'inbox_replies', ['id'], unique=False)
+    op.create_index('ix_inbox_replies_parent_timestamp_id', 'inbox_replies', ['parent_media_id', 'timestamp', 'id'], unique=False)
+    op.create_table('reply_sync_state',
+    sa.Column('media_id', sa.String(), nullable=False),
+    sa.Column('last_reply_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_reply_id', sa.String(), nullable=True),
+    sa.Column('reply_count', sa.Integer(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('media_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('reply_sync_state')
+    op.drop_index('ix_inbox_replies_parent_timestamp_id', table_name='inbox_replies')
+    op.drop_index(op.f('ix_inbox_replies_id'), table_name='inbox_replies')
+    op.drop_table('inbox_replies')
@@ -0,0 +1,36 @@
+""" add_keyset_pagination_indexes
+
+Revision ID: b7c41e9d2a10
+Revises: 673921490de4
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e9d2a10'
+down_revision: Union[str, Sequence[str], None] = '673921490de4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_posts_status_created_at_id', 'posts', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_replies_created_at_id', 'replies', ['created_at', 'id'], unique=False)
+    op.create_index('ix_replies_parent_created_at_id', 'replies', ['parent_media_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_insights_snapshots_media_captured_id', 'insights_snapshots', ['threads_media_id', 'captured_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_insights_snapshots_media_captured_id', table_name='insights_snapshots')
+    op.drop_index('ix_replies_parent_created_at_id', table_name='replies')
+    op.drop_index('ix_replies_created_at_id', table_name='replies')
+    op.drop_index('ix_posts_status_created_at_id', table_name='posts')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
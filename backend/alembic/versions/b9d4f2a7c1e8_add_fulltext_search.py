@@ -0,0 +1,74 @@
+""" add_fulltext_search
+
+Revision ID: b9d4f2a7c1e8
+Revises: a3c8e6f1d9b4
+Create Date: 2026-10-18 15:48:03.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4f2a7c1e8'
+down_revision: Union[str, Sequence[str], None] = 'a3c8e6f1d9b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('posts', 'replies', 'inbox_replies')
+
+
+def _sqlite_upgrade(table: str) -> None:
+    fts = f'{table}_fts'
+    op.execute(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(text, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, text) VALUES ('delete', old.id, old.text); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF text ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, text) VALUES ('delete', old.id, old.text); "
+        f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END"
+    )
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _postgres_upgrade(table: str) -> None:
+    op.execute(
+        f"ALTER TABLE {table} ADD COLUMN text_tsv tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('simple', coalesce(text, ''))) STORED"
+    )
+    op.execute(f"CREATE INDEX ix_{table}_text_tsv ON {table} USING gin (text_tsv)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == 'sqlite':
+            _sqlite_upgrade(table)
+        elif dialect == 'postgresql':
+            _postgres_upgrade(table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == 'sqlite':
+            fts = f'{table}_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_text_tsv")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS text_tsv")
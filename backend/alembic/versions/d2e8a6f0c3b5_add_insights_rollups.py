@@ -0,0 +1,57 @@
+""" add_insights_rollups
+
+Revision ID: d2e8a6f0c3b5
+Revises: b7c41e9d2a10
+Create Date: 2026-10-18 11:02:15.550921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e8a6f0c3b5'
+down_revision: Union[str, Sequence[str], None] = 'b7c41e9d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METRICS = ('views', 'likes', 'replies', 'reposts', 'quotes')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    metric_columns = [
+        sa.Column(f'{metric}_{agg}', sa.Integer(), nullable=True)
+        for metric in METRICS
+        for agg in ('min', 'max', 'last')
+    ]
+    op.create_table('insights_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('threads_media_id', sa.String(), nullable=False),
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=True),
+    sa.Column('first_captured_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_captured_at', sa.DateTime(timezone=True), nullable=True),
+    *metric_columns,
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('threads_media_id', 'granularity', 'bucket_start', name='uq_insights_rollups_bucket')
+    )
+    op.create_index(op.f('ix_insights_rollups_id'), 'insights_rollups', ['id'], unique=False)
+    op.create_index('ix_insights_rollups_granularity_bucket', 'insights_rollups', ['granularity', 'bucket_start'], unique=False)
+    op.create_table('rollup_state',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('last_snapshot_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_state')
+    op.drop_index('ix_insights_rollups_granularity_bucket', table_name='insights_rollups')
+    op.drop_index(op.f('ix_insights_rollups_id'), table_name='insights_rollups')
+    op.drop_table('insights_rollups')
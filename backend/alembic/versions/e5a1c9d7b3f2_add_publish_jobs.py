@@ -0,0 +1,48 @@
+""" add_publish_jobs
+
+Revision ID: e5a1c9d7b3f2
+Revises: d2e8a6f0c3b5
+Create Date: 2026-10-18 12:20:41.302877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c9d7b3f2'
+down_revision: Union[str, Sequence[str], None] = 'd2e8a6f0c3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('publish_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('lease_owner', sa.String(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('container_id', sa.String(), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_publish_jobs_id'), 'publish_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_publish_jobs_post_id'), 'publish_jobs', ['post_id'], unique=False)
+    op.create_index('ix_publish_jobs_status_available_at', 'publish_jobs', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_publish_jobs_status_available_at', table_name='publish_jobs')
+    op.drop_index(op.f('ix_publish_jobs_post_id'), table_name='publish_jobs')
+    op.drop_index(op.f('ix_publish_jobs_id'), table_name='publish_jobs')
+    op.drop_table('publish_jobs')
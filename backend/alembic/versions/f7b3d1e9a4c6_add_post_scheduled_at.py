@@ -0,0 +1,30 @@
+""" add_post_scheduled_at
+
+Revision ID: f7b3d1e9a4c6
+Revises: e5a1c9d7b3f2
+Create Date: 2026-10-18 13:05:12.640318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b3d1e9a4c6'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c9d7b3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('scheduled_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_posts_status_scheduled_at', 'posts', ['status', 'scheduled_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_status_scheduled_at', table_name='posts')
+    op.drop_column('posts', 'scheduled_at')
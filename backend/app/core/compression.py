@@ -0,0 +1,77 @@
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.static_assets import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+THREAD_MINIMUM_SIZE = 128 * 1024  # larger chunks are compressed off the event loop
+# Formats that are compressed internally (Parquet exports) gain nothing from another pass
+EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/vnd.apache.parquet",)
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size, exclude_content_types=EXCLUDED_CONTENT_TYPES)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        data = self._compressor.process(body)
+        # Flushing each streamed chunk keeps NDJSON lines arriving as they are produced
+        return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Picks br, gzip or identity for a request's Accept-Encoding; brotli wins ties."""
+    if not accept_encoding:
+        return "identity"
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    gzip_q = accepted.get("gzip", wildcard)
+    brotli_q = accepted.get("br", wildcard) if brotli is not None else 0.0
+    if brotli_q > 0 and brotli_q >= gzip_q:
+        return "br"
+    return "gzip" if gzip_q > 0 else "identity"
+
+class CompressionMiddleware:
+    """Compresses responses of at least ``minimum_size`` bytes with brotli or gzip.
+
+    Starlette's GZipMiddleware responders do the buffering and header work, so
+    responses that already carry a Content-Encoding (precompressed static
+    assets), range responses and already-compressed media types pass through
+    untouched, and streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level,
+                                      thread_minimum_size=THREAD_MINIMUM_SIZE,
+                                      exclude_content_types=EXCLUDED_CONTENT_TYPES)
+        else:
+            # Still adds "Vary: Accept-Encoding" to responses that would have been compressed
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=EXCLUDED_CONTENT_TYPES)
+        await responder(scope, receive, send)
@@ -1,4 +1,6 @@
 import os
+from typing import Optional
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -14,7 +16,165 @@ class Settings(BaseSettings):
     THREADS_CLIENT_SECRET: str = ""
     THREADS_REDIRECT_URI: str = "http://localhost:8000/api/auth/threads/callback" # Updated to include /api prefix if needed, or matched with Router
     THREADS_SCOPES: str = "threads_basic,threads_content_publish,threads_delete,threads_read_replies,threads_manage_replies,threads_manage_insights"
-    
+
+    # Shared outbound HTTP pool used by every ThreadsClient
+    THREADS_HTTP2: bool = True
+    THREADS_HTTP_MAX_CONNECTIONS: int = 20
+    THREADS_HTTP_MAX_KEEPALIVE: int = 10
+    THREADS_HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    THREADS_HTTP_TIMEOUT: float = 15.0
+    THREADS_HTTP_CONNECT_TIMEOUT: float = 5.0
+
+    # Response cache for read-only Graph calls ("memory" or "none"); TTLs in seconds, 0 disables
+    THREADS_CACHE_BACKEND: str = "memory"
+    THREADS_CACHE_MAX_ENTRIES: int = 1024
+    THREADS_CACHE_STALE_SECONDS: float = 300.0  # stale-while-revalidate window after the TTL
+    THREADS_CACHE_TTL_ME: float = 300.0
+    THREADS_CACHE_TTL_USER_THREADS: float = 60.0
+    THREADS_CACHE_TTL_REPLIES: float = 30.0
+
+    # Outbound rate limits per access token and endpoint class. Callers wait for a token rather
+    # than fail; rates shrink as the API's usage headers approach 100% and pause after a 429.
+    THREADS_RATE_LIMIT_ENABLED: bool = True
+    THREADS_RATE_READ_PER_MINUTE: float = 300.0
+    THREADS_RATE_INSIGHTS_PER_MINUTE: float = 120.0
+    THREADS_RATE_PUBLISH_PER_MINUTE: float = 30.0
+    THREADS_RATE_BURST_SECONDS: float = 5.0  # bucket capacity, in seconds of the rate
+    THREADS_RATE_SLOWDOWN_AT: float = 75.0  # usage percent where slowing down starts
+    THREADS_RATE_MIN_FACTOR: float = 0.05
+    THREADS_RATE_RECOVERY_STEP: float = 0.1  # rate factor regained per successful call after a throttle halved it
+    THREADS_RATE_THROTTLE_PAUSE_SECONDS: float = 60.0  # after a 429 without Retry-After
+
+    # Retries (attempts include the first call) with jittered exponential backoff; Retry-After
+    # is honoured up to THREADS_RETRY_MAX_DELAY. Writes only retry when the connection failed.
+    THREADS_RETRY_GET_ATTEMPTS: int = 3
+    THREADS_RETRY_CONTAINER_ATTEMPTS: int = 3
+    THREADS_RETRY_WRITE_ATTEMPTS: int = 2
+    THREADS_RETRY_BASE_DELAY: float = 0.5
+    THREADS_RETRY_MAX_DELAY: float = 10.0
+
+    # Per-host circuit breaker: opens after N consecutive network errors/5xx, fails fast for
+    # THREADS_BREAKER_OPEN_SECONDS, then lets probe calls through
+    THREADS_BREAKER_FAILURE_THRESHOLD: int = 5
+    THREADS_BREAKER_OPEN_SECONDS: float = 30.0
+    THREADS_BREAKER_HALF_OPEN_CALLS: int = 1
+
+    # Database pool sizing (sync and async engines)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+
+    # SQLite connection profile: "tuned" applies the PRAGMAs below, "default" leaves SQLite as-is.
+    # Set any single value to empty to skip that PRAGMA.
+    SQLITE_PROFILE: str = "tuned"
+    SQLITE_JOURNAL_MODE: Optional[str] = "WAL"
+    SQLITE_SYNCHRONOUS: Optional[str] = "NORMAL"
+    SQLITE_TEMP_STORE: Optional[str] = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = 5000
+    SQLITE_CACHE_SIZE: Optional[int] = -65536  # negative = KiB, i.e. 64 MiB page cache
+    SQLITE_MMAP_SIZE: Optional[int] = 268435456  # 256 MiB
+
+    # Connected Token/Account lookup cache (invalidated on auth callback)
+    CREDENTIAL_CACHE_TTL_SECONDS: float = 300.0
+
+    # Insights refresh job (POST /api/jobs/insights/run)
+    INSIGHTS_JOB_LIMIT: int = 500
+    INSIGHTS_JOB_CONCURRENCY: int = 10
+    INSIGHTS_JOB_MAX_AGE_DAYS: float = 30.0
+
+    # Insights rollups: raw snapshots are folded into hourly/daily buckets in the background,
+    # then pruned once older than the retention horizon (0 keeps raw rows forever)
+    ROLLUP_ENABLED: bool = True
+    ROLLUP_INTERVAL_SECONDS: float = 300.0
+    ROLLUP_BATCH_SIZE: int = 5000
+    INSIGHTS_RAW_RETENTION_DAYS: float = 14.0
+
+    # Analytics API: computed results are reused until new snapshots arrive or the TTL passes
+    ANALYTICS_DEFAULT_WINDOW_DAYS: float = 7.0
+    ANALYTICS_CACHE_ENTRIES: int = 128
+    ANALYTICS_CACHE_TTL_SECONDS: float = 60.0
+
+    # Publish queue: POST /api/threads/post enqueues, workers started in the lifespan publish.
+    # A claimed job is leased for PUBLISH_LEASE_SECONDS and the lease is renewed while it publishes;
+    # if the worker dies it becomes visible again.
+    PUBLISH_WORKERS: int = 2
+    PUBLISH_POLL_INTERVAL_SECONDS: float = 2.0
+    PUBLISH_LEASE_SECONDS: float = 120.0
+    PUBLISH_MAX_ATTEMPTS: int = 5
+    PUBLISH_RETRY_BASE_SECONDS: float = 5.0
+    PUBLISH_RETRY_MAX_SECONDS: float = 600.0
+
+    # Scheduled posts: released into the publish queue when due. The table is re-read on
+    # startup and every SCHEDULER_RESYNC_SECONDS (posts scheduled by other processes).
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_RESYNC_SECONDS: float = 600.0
+    SCHEDULER_RELEASE_BATCH: int = 500
+
+    # POST /api/threads/posts/bulk: posts are published by the request itself; jobs it hasn't
+    # reached after BULK_PUBLISH_HOLD_SECONDS (or after a crash) fall to the publish workers
+    BULK_PUBLISH_MAX_POSTS: int = 500
+    BULK_PUBLISH_CONCURRENCY: int = 10
+    BULK_PUBLISH_HOLD_SECONDS: float = 300.0
+
+    # Inbox reply mirror: replies to recent posts are synced into inbox_replies in the background
+    # and the Inbox reads from there. Background syncs share their own request budget so they
+    # never crowd out interactive calls; ?refresh=true syncs one post on demand.
+    INBOX_SYNC_ENABLED: bool = True
+    INBOX_SYNC_INTERVAL_SECONDS: float = 60.0  # pause between background passes
+    INBOX_SYNC_POST_INTERVAL_SECONDS: float = 300.0  # minimum age of a post's last sync before it is due again
+    INBOX_SYNC_MAX_AGE_DAYS: float = 7.0  # posts older than this are no longer synced in the background
+    INBOX_SYNC_MAX_POSTS: int = 100  # posts per background pass, least recently synced first
+    INBOX_SYNC_REQUESTS_PER_MINUTE: float = 30.0
+    INBOX_SYNC_MAX_REPLIES: int = 1000  # cap on the first (full) sync of a post
+    INBOX_REFRESH_MIN_SECONDS: float = 10.0  # forced refreshes of the same post within this are served from the DB
+
+    # Full-text search: queries matching more than SEARCH_RANK_WINDOW rows of a kind rank only the
+    # newest that many (bm25 costs per match); 0 ranks every match
+    SEARCH_RANK_WINDOW: int = 10000
+
+    # Built SPA (app/static): hashed /assets bundles are cached for a year; other files for this long
+    STATIC_MAX_AGE_SECONDS: float = 3600.0
+
+    # API response compression: brotli (when the package is installed) or gzip, by Accept-Encoding,
+    # for bodies of at least COMPRESSION_MIN_SIZE bytes. Levels are tuned for per-request speed;
+    # static assets are precompressed at maximum level instead (scripts/precompress_static.py).
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Prometheus text metrics at GET /metrics: request, Graph API, SQL and pool timings
+    METRICS_ENABLED: bool = True
+
+    # Opt-in SQL profiler: logs statements slower than SQL_SLOW_QUERY_MS with parameters and query
+    # plan, flags requests running one statement shape more than SQL_N_PLUS_ONE_THRESHOLD times,
+    # and adds per-request totals in an X-SQL-Profile response header. For debugging, not production.
+    SQL_PROFILER_ENABLED: bool = False
+    SQL_SLOW_QUERY_MS: float = 100.0
+    SQL_EXPLAIN_SLOW: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # SQLite backups (scripts/backup_db.py, POST /api/jobs/backup/run): an online copy through the
+    # backup API in steps of BACKUP_PAGES_PER_STEP pages, or VACUUM INTO, integrity-checked and then
+    # compressed. Retention keeps the newest BACKUP_KEEP_LAST files plus the newest of each of the
+    # last BACKUP_KEEP_DAILY days; both 0 keeps everything.
+    BACKUP_DIR: str = ""  # empty = "backups" next to the database file
+    BACKUP_METHOD: str = "backup"  # "backup" or "vacuum"
+    BACKUP_PAGES_PER_STEP: int = 1024
+    BACKUP_STEP_PAUSE_MS: float = 5.0  # between steps, so writers get the database in between
+    BACKUP_MAX_RESTARTS: int = 3  # copies restarted by concurrent writes before the rest is taken in one step
+    BACKUP_COMPRESSION: str = "gzip"  # "zstd" (needs the zstandard package), "gzip" or "none"
+    BACKUP_COMPRESSION_LEVEL: Optional[int] = None  # None = the codec's default
+    BACKUP_INTEGRITY_CHECK: str = "full"  # "full", "quick" or "off"
+    BACKUP_KEEP_LAST: int = 7
+    BACKUP_KEEP_DAILY: int = 14
+
+    # Bulk exports (GET /api/export/{posts,replies,insights}): rows are fetched and sent
+    # EXPORT_BATCH_SIZE at a time; Parquet output (needs pyarrow) is written in row groups
+    EXPORT_BATCH_SIZE: int = 5000
+    EXPORT_PARQUET_ROW_GROUP_SIZE: int = 100000
+
     LOG_LEVEL: str = "INFO"
 
     model_config = SettingsConfigDict(
@@ -23,6 +183,18 @@ class Settings(BaseSettings):
         extra='ignore'
     )
 
+    @field_validator(
+        "SQLITE_JOURNAL_MODE", "SQLITE_SYNCHRONOUS", "SQLITE_TEMP_STORE",
+        "SQLITE_BUSY_TIMEOUT_MS", "SQLITE_CACHE_SIZE", "SQLITE_MMAP_SIZE", "BACKUP_COMPRESSION_LEVEL",
+        mode="before",
+    )
+    @classmethod
+    def empty_to_none(cls, value):
+        # SQLITE_MMAP_SIZE= in the environment means "unset", not an invalid integer
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
     def __init__(self, **data):
         super().__init__(**data)
         # Fix for Coolify/Docker environment where DATABASE_URL might be set to the old relative path
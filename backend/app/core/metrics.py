@@ -0,0 +1,256 @@
+"""In-process metrics rendered in the Prometheus text format at GET /metrics.
+
+Counters and histograms are plain dicts keyed by label values, guarded by a
+lock since DB events fire on threadpool threads. Values are per process.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Seconds; requests and Graph calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; single statements and pool checkouts are usually well under a millisecond
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+_registry: List["_Metric"] = []
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in values]
+
+class Gauge(_Metric):
+    """A value read from ``fn`` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def samples(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []  # e.g. the pool isn't created yet
+        return [f"{self.name} {_format_value(value)}"]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: [count per bucket (last one +Inf, not cumulative), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)  # first bucket with le >= value
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = []
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request, by route template.", ("method", "route", "status"),
+)
+THREADS_API_SECONDS = Histogram(
+    "threads_api_call_duration_seconds",
+    "Time for one ThreadsClient call to the Graph API, including retries and rate-limit waits.",
+    ("method", "endpoint", "status"),
+)
+THREADS_API_RESPONSES = Counter(
+    "threads_api_responses_total", "HTTP responses (one per attempt) from the Graph API.", ("method", "endpoint", "status"),
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Time to execute one SQL statement.", ("operation",), buckets=DB_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "SQL statements that raised.", ("operation",))
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time to get a connection from the pool, including waiting for one to be returned or opened.",
+    buckets=DB_BUCKETS,
+)
+PUBLISH_JOBS = Counter(
+    "publish_jobs_total", "Publish job attempts by outcome (published, failed, retried).", ("outcome",),
+)
+
+def endpoint_template(endpoint: str) -> str:
+    """Graph path with ids replaced, e.g. /v1.0/123/threads -> /v1.0/{id}/threads."""
+    return "/".join("{id}" if part.isdigit() else part for part in endpoint.split("?", 1)[0].split("/"))
+
+# Include prefix by id() of the route object (routes aren't hashable, and live as long
+# as the app), found on the route's first request
+_route_prefixes: Dict[int, str] = {}
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that served the request, e.g. /api/threads/post/{media_id}/replies."""
+    route = scope.get("route")
+    path_format = getattr(route, "path", None)
+    if not path_format:
+        return "unmatched"
+    prefix = _route_prefixes.get(id(route))
+    if prefix is None:
+        prefix = _find_prefix(route, scope["path"])
+        if prefix is None:
+            return path_format
+        _route_prefixes[id(route)] = prefix
+    return prefix + path_format
+
+def _find_prefix(route, path: str):
+    # Routes of an included router report their path without the include prefix:
+    # it is the part of the request path in front of what the route matches
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        return None
+    index = 0
+    while index != -1:
+        if regex.match(path[index:]):
+            return path[:index]
+        index = path.find("/", index + 1)
+    return None
+
+class MetricsMiddleware:
+    """Observes every HTTP request into HTTP_REQUEST_SECONDS.
+
+    The route label is the matched route's path template, read from the scope
+    after routing, so it stays bounded however many ids are requested.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route_template(scope), str(status))
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK"}
+
+def statement_operation(statement: str) -> str:
+    head = statement.lstrip()[:8].split(None, 1)
+    word = head[0].upper() if head else ""
+    return word if word in _OPERATIONS else "OTHER"
+
+_timed_pool_classes: Dict[type, type] = {}
+
+def _timed_pool_class(pool_class: type) -> type:
+    timed = _timed_pool_classes.get(pool_class)
+    if timed is None:
+        class TimedPool(pool_class):
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    return super()._do_get()
+                finally:
+                    DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+        TimedPool.__name__ = f"Timed{pool_class.__name__}"
+        timed = _timed_pool_classes[pool_class] = TimedPool
+    return timed
+
+def instrument_engine(sync_engine):
+    """Times statements and pool checkouts of an Engine (``async_engine.sync_engine`` for async)."""
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, statement_operation(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        DB_QUERY_ERRORS.inc(statement_operation(exception_context.statement or ""))
+
+    # Swapping the class rather than passing poolclass keeps the pool sizing create_engine
+    # chose; Pool.recreate() (dispose, invalidation) builds the new pool from the same class
+    pool = sync_engine.pool
+    pool.__class__ = _timed_pool_class(type(pool))
@@ -0,0 +1,23 @@
+from typing import Any
+import orjson
+from starlette.responses import JSONResponse
+
+# Same output as JSONResponse for what jsonable_encoder produces; numpy values and
+# non-string dict keys are accepted too rather than failing the request
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; the app's default response class.
+
+    Routes with a ``response_model`` keep FastAPI's own path (Pydantic dumps the
+    validated models straight to JSON bytes), since the default class is only
+    used for routes returning plain dicts and lists. Those can also return a
+    FastJSONResponse directly to skip jsonable_encoder when the content is
+    already JSON-compatible.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
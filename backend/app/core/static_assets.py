@@ -0,0 +1,191 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: .br variants are then only served if prebuilt
+    brotli = None
+
+INDEX = "index.html"
+HASHED_PREFIX = "assets/"  # Vite puts content-hashed bundles here
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # always revalidate; a matching ETag makes it a cheap 304
+# Preferred first when the client accepts several equally
+ENCODINGS = ("br", "gzip")
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+@dataclass
+class Variant:
+    encoding: Optional[str]  # None = identity
+    path: Optional[str]  # on disk, or None when held in memory
+    size: int
+    etag: str
+    body: Optional[bytes] = None
+    stat: Optional[os.stat_result] = None
+
+@dataclass
+class Asset:
+    content_type: str
+    cache_control: str
+    variants: Dict[Optional[str], Variant] = field(default_factory=dict)
+
+def _digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Encodings with their q-values; "*" applies to encodings not listed."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as for GET: W/"x" matches "x"
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+class AssetManifest:
+    """The built SPA, indexed once at startup.
+
+    Every file is hashed for its ETag and paired with any precompressed
+    ``.br``/``.gz`` sibling, so requests never stat or probe the filesystem.
+    Hashed bundles under /assets are cached forever; everything else,
+    including index.html (kept in memory with its compressed forms), is
+    revalidated.
+    """
+
+    def __init__(self, static_dir: str):
+        self.static_dir = static_dir
+        self.assets: Dict[str, Asset] = {}
+        self.bytes_in_memory = 0
+        self._scan()
+
+    def _scan(self):
+        files = set()
+        for root, _, names in os.walk(self.static_dir):
+            for name in names:
+                files.add(os.path.relpath(os.path.join(root, name), self.static_dir).replace(os.sep, "/"))
+
+        for rel in sorted(files):
+            if any(rel.endswith(suffix) and rel[:-len(suffix)] in files for suffix in SUFFIXES.values()):
+                continue  # a precompressed variant, attached to its original below
+            path = os.path.join(self.static_dir, rel)
+            content_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml"):
+                content_type += "; charset=utf-8"
+            immutable = rel.startswith(HASHED_PREFIX)
+            asset = Asset(content_type, IMMUTABLE if immutable else self._revalidate_header(rel))
+            digest = _digest(path)
+            stat = os.stat(path)
+            asset.variants[None] = Variant(None, path, stat.st_size, f'"{digest}"', stat=stat)
+            for encoding, suffix in SUFFIXES.items():
+                if rel + suffix in files:
+                    variant_stat = os.stat(path + suffix)
+                    asset.variants[encoding] = Variant(
+                        encoding, path + suffix, variant_stat.st_size, f'"{digest}-{encoding}"', stat=variant_stat
+                    )
+            self.assets[rel] = asset
+
+        index = self.assets.get(INDEX)
+        if index is not None:
+            self._hold_in_memory(index)
+
+    @staticmethod
+    def _revalidate_header(rel: str) -> str:
+        if rel == INDEX or settings.STATIC_MAX_AGE_SECONDS <= 0:
+            return REVALIDATE
+        return f"public, max-age={int(settings.STATIC_MAX_AGE_SECONDS)}"
+
+    def _hold_in_memory(self, asset: Asset):
+        identity = asset.variants[None]
+        with open(identity.path, "rb") as f:
+            body = f.read()
+        digest = identity.etag.strip('"')
+        asset.variants[None] = Variant(None, None, len(body), identity.etag, body)
+        compressed = {
+            "gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+            "br": (lambda data: brotli.compress(data, quality=11)) if brotli else None,
+        }
+        for encoding, compress in compressed.items():
+            variant = asset.variants.get(encoding)
+            if variant is not None:
+                with open(variant.path, "rb") as f:
+                    data = f.read()
+            elif compress is not None:
+                data = compress(body)
+            else:
+                continue
+            if len(data) < len(body):
+                asset.variants[encoding] = Variant(encoding, None, len(data), f'"{digest}-{encoding}"', data)
+        self.bytes_in_memory += sum(v.size for v in asset.variants.values())
+
+    def get(self, path: str) -> Optional[Asset]:
+        return self.assets.get(path.lstrip("/"))
+
+    @property
+    def index(self) -> Optional[Asset]:
+        return self.assets.get(INDEX)
+
+    @staticmethod
+    def _negotiate(asset: Asset, accept_encoding: str) -> Variant:
+        if len(asset.variants) > 1 and accept_encoding:
+            accepted = parse_accept_encoding(accept_encoding)
+            wildcard = accepted.get("*", 0.0)
+            ranked: List[Tuple[float, int, str]] = []
+            for preference, encoding in enumerate(ENCODINGS):
+                q = accepted.get(encoding, wildcard)
+                if encoding in asset.variants and q > 0:
+                    ranked.append((-q, preference, encoding))
+            if ranked:
+                return asset.variants[min(ranked)[2]]
+        return asset.variants[None]
+
+    def response(self, asset: Asset, request_headers: Headers, method: str = "GET") -> Response:
+        variant = self._negotiate(asset, request_headers.get("accept-encoding", ""))
+        headers = {"ETag": variant.etag, "Cache-Control": asset.cache_control}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, variant.etag):
+            return Response(status_code=304, headers=headers)
+        if variant.encoding:
+            headers["Content-Encoding"] = variant.encoding
+        if variant.body is not None:
+            body = b"" if method == "HEAD" else variant.body
+            response = Response(body, media_type=asset.content_type, headers=headers)
+            response.headers["Content-Length"] = str(variant.size)
+            return response
+        # The stat taken at startup saves a syscall per request; FileResponse handles HEAD and ranges
+        return FileResponse(variant.path, media_type=asset.content_type, headers=headers, stat_result=variant.stat)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": len(self.assets),
+            "precompressed": sum(1 for a in self.assets.values() if len(a.variants) > 1),
+            "bytes_in_memory": self.bytes_in_memory,
+        }
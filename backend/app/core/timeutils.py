@@ -0,0 +1,11 @@
+from datetime import datetime, timezone
+
+def utcnow() -> datetime:
+    """Naive UTC now, comparable with the CURRENT_TIMESTAMP defaults SQLite stores."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Aware datetimes are converted to UTC; naive ones are taken as UTC already."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
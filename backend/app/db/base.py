@@ -5,3 +5,7 @@ from app.models.account import Account, Token
 from app.models.post import Post
 from app.models.reply import Reply
 from app.models.insights import InsightsSnapshot
+from app.models.rollup import InsightsRollup, RollupState
+from app.models.publish_job import PublishJob
+from app.models.inbox import InboxReply, ReplySyncState
+from app.db import fulltext  # noqa: F401  (search index DDL for create_all)
@@ -1,22 +1,165 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import Gauge, instrument_engine
+from app.db.profiler import install_profiler
 
-# SQLite needs specific connect_args for multithreading
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+# Async drivers selectable through DATABASE_URL, mapped to their sync counterpart.
+# The sync engine is always available for Alembic, scripts and threadpool work.
+ASYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql",
+}
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args
-)
+def is_async_url(url: str) -> bool:
+    return make_url(url).drivername in ASYNC_DRIVERS
+
+def sync_database_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername])
+    return parsed.render_as_string(hide_password=False)
+
+DB_ASYNC = is_async_url(settings.DATABASE_URL)
+SYNC_DATABASE_URL = sync_database_url(settings.DATABASE_URL)
+
+IS_SQLITE = make_url(SYNC_DATABASE_URL).get_backend_name() == "sqlite"
+
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+SQLITE_TEMP_STORES = {"DEFAULT", "FILE", "MEMORY"}
+
+def sqlite_pragmas(profile: str = None) -> list[str]:
+    """PRAGMA statements for an SQLite profile ("tuned" or "default").
+
+    The tuned values come from Settings; an empty value skips that PRAGMA.
+    """
+    profile = (profile or settings.SQLITE_PROFILE).lower()
+    if profile == "default":
+        return []
+    if profile != "tuned":
+        raise ValueError(f"Unknown SQLITE_PROFILE: {profile}")
+
+    pragmas = []
+    for name, value, allowed in (
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE, SQLITE_JOURNAL_MODES),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS, SQLITE_SYNCHRONOUS_LEVELS),
+        ("temp_store", settings.SQLITE_TEMP_STORE, SQLITE_TEMP_STORES),
+    ):
+        if value:
+            if value.upper() not in allowed:
+                raise ValueError(f"Invalid SQLite {name}: {value}")
+            pragmas.append(f"PRAGMA {name}={value.upper()}")
+    for name, value in (
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+    ):
+        if value is not None:
+            pragmas.append(f"PRAGMA {name}={int(value)}")
+    return pragmas
+
+def install_sqlite_pragmas(sync_engine, pragmas: list[str]):
+    """Applies the PRAGMAs to every new DBAPI connection of the engine."""
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def engine_options(url: str) -> dict:
+    """Connect args and pool sizing shared by the sync and async engines."""
+    parsed = make_url(url)
+    options = {}
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite needs specific connect_args for multithreading
+        options["connect_args"] = {"check_same_thread": False}
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory databases use a singleton pool with no sizing knobs
+            return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+engine = create_engine(SYNC_DATABASE_URL, **engine_options(SYNC_DATABASE_URL))
+if IS_SQLITE:
+    install_sqlite_pragmas(engine, sqlite_pragmas())
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = (
+    create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+    if DB_ASYNC else None
+)
+if async_engine is not None and IS_SQLITE:
+    install_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+
+# expire_on_commit=False: attributes must stay loaded once the session leaves the greenlet
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if DB_ASYNC else None
+)
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+    # The pool requests use; looked up at scrape time since dispose() replaces it
+    Gauge("db_pool_checked_out", "Connections currently checked out of the pool.",
+          lambda: (async_engine.sync_engine if DB_ASYNC else engine).pool.checkedout())
+
+if settings.SQL_PROFILER_ENABLED:
+    install_profiler(engine)
+    if async_engine is not None:
+        install_profiler(async_engine.sync_engine)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+@asynccontextmanager
+async def open_session():
+    """Opens a session of whichever flavour DATABASE_URL selects."""
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+async def get_db():
+    async with open_session() as db:
         yield db
-    finally:
-        db.close()
+
+async def run_db(db, fn, *args, **kwargs):
+    """Runs sync-style ORM code against either session flavour.
+
+    With an AsyncSession the function runs through ``run_sync`` so its I/O is
+    awaited instead of blocking the event loop; with a plain Session it runs in
+    the threadpool, as FastAPI does for sync dependencies.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+async def save(db, obj):
+    """Adds, commits and refreshes a single ORM object."""
+    def _commit_refresh(session):
+        session.add(obj)
+        session.commit()
+        session.refresh(obj)
+        return obj
+    return await run_db(db, _commit_refresh)
@@ -0,0 +1,83 @@
+"""Full-text indexes over post and reply text.
+
+SQLite gets an external-content FTS5 table per source (``posts_fts`` ...) kept
+in sync by triggers; Postgres gets a generated ``text_tsv`` column with a GIN
+index. The DDL runs after ``create_all`` creates the source tables (scripts,
+benches); the migration carries its own copy.
+"""
+from typing import List
+from sqlalchemy import DDL, event
+from app.models.inbox import InboxReply
+from app.models.post import Post
+from app.models.reply import Reply
+
+# Searchable kind -> source table; every source has an integer "id" and a "text" column
+SEARCH_SOURCES = {
+    "posts": Post.__table__,
+    "replies": Reply.__table__,
+    "inbox": InboxReply.__table__,
+}
+
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+FTS_PREFIX = "2 3"  # prefix indexes so short "ab*" queries don't scan the term list
+TS_CONFIG = "simple"
+TSV_COLUMN = "text_tsv"
+
+def fts_table(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+def sqlite_create(table_name: str) -> List[str]:
+    fts = fts_table(table_name)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(text, content='{table_name}', content_rowid='id', "
+        f"tokenize='{FTS_TOKENIZE}', prefix='{FTS_PREFIX}')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, text) VALUES ('delete', old.id, old.text); END",
+        # Status changes (the common update) don't touch the index
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF text ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, text) VALUES ('delete', old.id, old.text); "
+        f"INSERT INTO {fts}(rowid, text) VALUES (new.id, new.text); END",
+        # Index rows that predate the table
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def sqlite_drop(table_name: str) -> List[str]:
+    fts = fts_table(table_name)
+    return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+def postgres_create(table_name: str) -> List[str]:
+    return [
+        f"ALTER TABLE {table_name} ADD COLUMN {TSV_COLUMN} tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', coalesce(text, ''))) STORED",
+        f"CREATE INDEX ix_{table_name}_{TSV_COLUMN} ON {table_name} USING gin ({TSV_COLUMN})",
+    ]
+
+def postgres_drop(table_name: str) -> List[str]:
+    return [
+        f"DROP INDEX IF EXISTS ix_{table_name}_{TSV_COLUMN}",
+        f"ALTER TABLE {table_name} DROP COLUMN IF EXISTS {TSV_COLUMN}",
+    ]
+
+def is_fulltext_object(name: str, type_: str) -> bool:
+    """True for the objects above, which autogenerate must leave alone."""
+    if not name:
+        return False
+    if type_ == "table":
+        return any(name == fts_table(t.name) or name.startswith(fts_table(t.name) + "_") for t in SEARCH_SOURCES.values())
+    if type_ == "column":
+        return name == TSV_COLUMN
+    if type_ == "index":
+        return name.endswith(f"_{TSV_COLUMN}")
+    return False
+
+for _table in SEARCH_SOURCES.values():
+    for _statement in sqlite_create(_table.name):
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    for _statement in postgres_create(_table.name):
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+    for _statement in sqlite_drop(_table.name):
+        event.listen(_table, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,158 @@
+"""Opt-in SQL profiler (SQL_PROFILER_ENABLED).
+
+Statements slower than SQL_SLOW_QUERY_MS are logged with their parameters and
+query plan. Within a request every statement is also counted by shape (the
+SQL text with IN-lists collapsed): a shape run more than
+SQL_N_PLUS_ONE_THRESHOLD times is logged as a likely N+1, and the request's
+totals go back in the X-SQL-Profile response header.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import statement_operation
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-SQL-Profile"
+EXPLAINED_OPERATIONS = {"SELECT", "WITH", "UPDATE", "DELETE", "INSERT"}
+MAX_LOGGED_CHARS = 1000
+
+# Process totals, listed in /api/system/stats
+profiler_stats: Dict[str, Any] = {
+    "enabled": False,
+    "statements": 0,
+    "slow": 0,
+    "explain_failed": 0,
+    "requests": 0,
+    "n_plus_one_requests": 0,
+    "last_n_plus_one": None,
+}
+
+@dataclass
+class RequestProfile:
+    statements: int = 0
+    seconds: float = 0.0
+    slow: int = 0
+    shapes: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def header(self, threshold: int) -> str:
+        repeated = self.repeated(threshold)
+        value = f"statements={self.statements}; db_ms={self.seconds * 1000:.1f}; slow={self.slow}"
+        if repeated:
+            value += f"; repeated={len(repeated)}; max_repeat={repeated[0][1]}"
+        return value
+
+# Set by SQLProfilerMiddleware for the duration of a request. Threadpool calls and
+# AsyncSession.run_sync see it too, since both run in a copy of the caller's context.
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("sql_request_profile", default=None)
+
+# Placeholders of the DBAPI paramstyles: ?, :name, $1, %s, %(name)s
+_PLACEHOLDER = r"(?:\?|:\w+|\$\d+|%s|%\(\w+\)s)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """The statement with runs of whitespace and expanded IN-lists collapsed."""
+    return _IN_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+def _truncate(value: Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_LOGGED_CHARS else text[:MAX_LOGGED_CHARS] + "…"
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # A separate DBAPI cursor: the statement's own cursor may still hold unread rows
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if conn.dialect.name == "sqlite":
+        # (id, parent, notused, detail)
+        return "\n".join(f"  {row[3]}" for row in rows)
+    return "\n".join(f"  {row[0]}" for row in rows)
+
+def _log_slow(conn, statement: str, parameters, executemany: bool, elapsed: float):
+    profiler_stats["slow"] += 1
+    plan = ""
+    if settings.SQL_EXPLAIN_SLOW and not executemany and statement_operation(statement) in EXPLAINED_OPERATIONS:
+        try:
+            plan = "\n" + _explain(conn, statement, parameters)
+        except Exception as e:
+            profiler_stats["explain_failed"] += 1
+            plan = f"\n  (EXPLAIN failed: {e})"
+    logger.warning(
+        f"Slow SQL ({elapsed * 1000:.1f} ms): {_truncate(statement)}\n"
+        f"  parameters: {_truncate(parameters)}{plan}"
+    )
+
+def install_profiler(sync_engine):
+    """Adds the profiling listeners to an Engine (``async_engine.sync_engine`` for async)."""
+    profiler_stats["enabled"] = True
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiler_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profiler_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        profiler_stats["statements"] += 1
+        profile = _current.get()
+        if profile is not None:
+            profile.statements += 1
+            profile.seconds += elapsed
+            profile.shapes[statement_shape(statement)] += 1
+        if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            if profile is not None:
+                profile.slow += 1
+            _log_slow(conn, statement, parameters, executemany, elapsed)
+
+class SQLProfilerMiddleware:
+    """Collects a RequestProfile per HTTP request and reports it in a header and, for N+1s, the log."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile()
+        token = _current.set(profile)
+        threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+
+        async def send_with_profile(message: Message):
+            if message["type"] == "http.response.start":
+                # Statements run while a streamed body is sent come after this and are not included
+                MutableHeaders(scope=message).append(PROFILE_HEADER, profile.header(threshold))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current.reset(token)
+            profiler_stats["requests"] += 1
+            repeated = profile.repeated(threshold)
+            if repeated:
+                target = f"{scope['method']} {scope['path']}"
+                profiler_stats["n_plus_one_requests"] += 1
+                profiler_stats["last_n_plus_one"] = target
+                details = "\n".join(f"  {count}x {_truncate(shape)}" for shape, count in repeated)
+                logger.warning(f"Possible N+1 in {target}: {profile.statements} statements\n{details}")
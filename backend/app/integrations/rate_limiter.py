@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+from app.core.config import settings
+from app.integrations.resilience import retry_after_seconds
+
+ENDPOINT_CLASSES = ("publish", "read", "insights")
+
+# Graph API usage headers: JSON with percentages of the quota already used
+USAGE_HEADERS = ("x-app-usage", "x-business-use-case-usage")
+USAGE_KEYS = ("call_count", "total_time", "total_cputime")
+# Graph error codes that mean "throttled" even without a 429
+THROTTLE_ERROR_CODES = {4, 17, 32, 613}
+
+def endpoint_class(method: str, endpoint: str) -> str:
+    if method.upper() != "GET":
+        return "publish"
+    if endpoint.rstrip("/").endswith("/insights"):
+        return "insights"
+    return "read"
+
+def _walk_usage(data: Any) -> Iterator[Mapping[str, Any]]:
+    # x-app-usage is a flat object; x-business-use-case-usage maps ids to lists of objects
+    if isinstance(data, dict):
+        if any(k in data for k in USAGE_KEYS):
+            yield data
+        else:
+            for value in data.values():
+                yield from _walk_usage(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _walk_usage(value)
+
+def parse_usage(headers: Mapping[str, str]) -> Tuple[Optional[float], float]:
+    """Highest quota usage in percent (None without headers) and seconds until access is regained."""
+    usage: Optional[float] = None
+    regain = 0.0
+    for name in USAGE_HEADERS:
+        raw = headers.get(name)
+        if not raw:
+            continue
+        try:
+            entries = list(_walk_usage(json.loads(raw)))
+        except ValueError:
+            continue
+        for entry in entries:
+            for key in USAGE_KEYS:
+                value = entry.get(key)
+                if isinstance(value, (int, float)):
+                    usage = max(usage or 0.0, float(value))
+            minutes = entry.get("estimated_time_to_regain_access")
+            if isinstance(minutes, (int, float)):
+                regain = max(regain, minutes * 60.0)
+    return usage, regain
+
+class TokenBucket:
+    """Token bucket whose waiters queue in FIFO order.
+
+    ``paused_until`` holds every caller back after a throttling response. The
+    rate is then scaled by the lower of two factors: ``usage_factor``, set from
+    the quota usage the API reports, and ``throttle_factor``, halved by each
+    throttling response and raised by THREADS_RATE_RECOVERY_STEP per successful
+    one, so the bucket resumes at half speed and ramps back to its full rate.
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float):
+        self.base_rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.base_rate * burst_seconds)
+        self.tokens = self.capacity
+        self.usage_factor = 1.0
+        self.throttle_factor = 1.0
+        self.paused_until = 0.0
+        self.usage: Optional[float] = None
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def factor(self) -> float:
+        return min(self.usage_factor, self.throttle_factor)
+
+    @property
+    def rate(self) -> float:
+        return self.base_rate * self.factor
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Takes one token, sleeping until one is available; returns the time waited."""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            # The lock queues callers so they leave at the refill rate instead of racing
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def pause(self, seconds: float):
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    def throttle(self, seconds: float):
+        self.pause(seconds)
+        self.throttled += 1
+        self.throttle_factor = max(settings.THREADS_RATE_MIN_FACTOR, self.throttle_factor / 2)
+
+    def recover(self):
+        if self.throttle_factor < 1.0:
+            self._refill(time.monotonic())
+            self.throttle_factor = min(1.0, round(self.throttle_factor + settings.THREADS_RATE_RECOVERY_STEP, 6))
+
+    def adapt(self, usage: float):
+        """Slows the bucket linearly once usage passes THREADS_RATE_SLOWDOWN_AT percent."""
+        self._refill(time.monotonic())
+        self.usage = usage
+        start = settings.THREADS_RATE_SLOWDOWN_AT
+        if usage <= start:
+            self.usage_factor = 1.0
+        else:
+            self.usage_factor = max(settings.THREADS_RATE_MIN_FACTOR, (100.0 - usage) / (100.0 - start))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "rate_per_minute": round(self.rate * 60.0, 2),
+            "capacity": round(self.capacity, 2),
+            "tokens": round(min(self.capacity, self.tokens + (now - self.updated) * self.rate), 2),
+            "factor": round(self.factor, 3),
+            "usage_percent": self.usage,
+            "paused_for_s": round(max(0.0, self.paused_until - now), 1),
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "throttled_responses": self.throttled,
+            "avg_wait_s": round(self.total_wait / self.delayed, 3) if self.delayed else 0.0,
+            "max_wait_s": round(self.max_wait, 3),
+        }
+
+class RateLimiter:
+    """One bucket per access token and endpoint class, shared by every ThreadsClient."""
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    @staticmethod
+    def _token_id(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode()).hexdigest()[:12]
+
+    def _rate_for(self, cls: str) -> float:
+        return {
+            "publish": settings.THREADS_RATE_PUBLISH_PER_MINUTE,
+            "read": settings.THREADS_RATE_READ_PER_MINUTE,
+            "insights": settings.THREADS_RATE_INSIGHTS_PER_MINUTE,
+        }[cls]
+
+    def bucket(self, access_token: str, cls: str) -> TokenBucket:
+        key = (self._token_id(access_token), cls)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self._rate_for(cls), settings.THREADS_RATE_BURST_SECONDS)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, access_token: str, cls: str) -> float:
+        return await self.bucket(access_token, cls).acquire()
+
+    def observe(self, access_token: str, cls: str, status_code: int, headers: Mapping[str, str],
+                error_code: Optional[int] = None):
+        """Feeds a response's usage headers and throttling signals back into the bucket."""
+        bucket = self.bucket(access_token, cls)
+        usage, regain = parse_usage(headers)
+        if usage is not None:
+            bucket.adapt(usage)
+        if status_code == 429 or error_code in THROTTLE_ERROR_CODES:
+            pause = retry_after_seconds(headers)
+            bucket.throttle(max(regain, pause if pause is not None else settings.THREADS_RATE_THROTTLE_PAUSE_SECONDS))
+        elif regain > 0:
+            bucket.pause(regain)
+        elif status_code < 400:
+            bucket.recover()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.THREADS_RATE_LIMIT_ENABLED,
+            "buckets": {f"{token_id}:{cls}": b.stats() for (token_id, cls), b in self._buckets.items()},
+        }
+
+_rate_limiter = RateLimiter()
+
+def get_rate_limiter() -> RateLimiter:
+    return _rate_limiter
@@ -0,0 +1,180 @@
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, FrozenSet, Mapping, Optional
+from urllib.parse import urlparse
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Retry-After as seconds; accepts both delta-seconds and HTTP-date forms."""
+    raw = headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before repeating a Graph API call.
+
+    ``idempotent`` calls are retried on any network error or retryable status;
+    the rest only when the connection was never established, since the
+    request cannot have reached the API.
+    """
+    name: str
+    max_attempts: int
+    idempotent: bool
+    base_delay: float = field(default_factory=lambda: settings.THREADS_RETRY_BASE_DELAY)
+    max_delay: float = field(default_factory=lambda: settings.THREADS_RETRY_MAX_DELAY)
+    statuses: FrozenSet[int] = RETRYABLE_STATUSES
+
+    def backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many callers over the whole interval
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def next_delay(self, attempt: int, status_code: Optional[int], network_error: bool,
+                   connect_error: bool, retry_after: Optional[float]) -> Optional[float]:
+        """Seconds to wait before attempt ``attempt + 1``, or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        if network_error:
+            if not (self.idempotent or connect_error):
+                return None
+        elif status_code not in self.statuses or not self.idempotent:
+            return None
+        delay = self.backoff(attempt)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None  # the server asked for longer than we're willing to hold a caller
+            delay = max(delay, retry_after)
+        return delay
+
+def get_policy() -> RetryPolicy:
+    return RetryPolicy("get", settings.THREADS_RETRY_GET_ATTEMPTS, idempotent=True)
+
+def container_policy() -> RetryPolicy:
+    # An orphaned container is harmless (it expires unpublished), so creation may be repeated
+    return RetryPolicy("container", settings.THREADS_RETRY_CONTAINER_ATTEMPTS, idempotent=True)
+
+def write_policy() -> RetryPolicy:
+    # threads_publish and other writes: repeat only if the request never left
+    return RetryPolicy("write", settings.THREADS_RETRY_WRITE_ATTEMPTS, idempotent=False)
+
+retry_counters: Dict[str, int] = {"retries": 0, "gave_up": 0, "rejected_by_breaker": 0}
+
+class CircuitBreaker:
+    """Per-host breaker: closed -> open after consecutive failures -> half-open probes -> closed.
+
+    Only outages count as failures (network errors, timeouts, 5xx); a 4xx
+    proves the host is answering. Every allowed call must end in
+    record_success, record_failure or release, so half-open probe slots are
+    returned; a half-open state that still hasn't settled after
+    ``open_seconds`` lets new probes through anyway.
+    """
+
+    def __init__(self, host: str, failure_threshold: int, open_seconds: float, half_open_max_calls: int):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_opened_at = 0.0
+        self.half_open_calls = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=20)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        log = logger.warning if state == "open" else logger.info
+        log(f"Circuit breaker for {self.host}: {self.state} -> {state}")
+        self.transitions.append({"from": self.state, "to": state, "at": time.time()})
+        self.state = state
+        if state == "open":
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        elif state == "half_open":
+            self.half_opened_at = time.monotonic()
+        self.half_open_calls = 0
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if self.retry_in() > 0:
+                self.rejected += 1
+                return False
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self.half_open_calls >= self.half_open_max_calls:
+                if time.monotonic() - self.half_opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                # The probes never reported back; start a fresh round of them
+                self.half_opened_at = time.monotonic()
+                self.half_open_calls = 0
+            self.half_open_calls += 1
+        return True
+
+    def release(self):
+        """Returns the slot of an allowed call that ended without an outcome (e.g. cancelled)."""
+        if self.state == "half_open" and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            self._transition("closed")
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self._transition("open")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_s": round(self.retry_in(), 1) if self.state == "open" else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "transitions": list(self.transitions),
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    host = urlparse(base_url).netloc or base_url
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            host,
+            failure_threshold=settings.THREADS_BREAKER_FAILURE_THRESHOLD,
+            open_seconds=settings.THREADS_BREAKER_OPEN_SECONDS,
+            half_open_max_calls=settings.THREADS_BREAKER_HALF_OPEN_CALLS,
+        )
+        _breakers[host] = breaker
+    return breaker
+
+def get_resilience_stats() -> Dict[str, Any]:
+    return {
+        **retry_counters,
+        "circuit_breakers": {host: b.stats() for host, b in _breakers.items()},
+    }
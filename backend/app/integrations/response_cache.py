@@ -0,0 +1,132 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Set
+from app.core.config import settings
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float  # wall-clock seconds, so a persistent store can survive restarts
+    stale_until: float
+    tags: Set[str] = field(default_factory=set)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+class ResponseCache(ABC):
+    """Storage for read-only Graph API responses.
+
+    Entries are fresh for ``ttl`` seconds, then may be served stale for another
+    ``stale_ttl`` seconds while the client refreshes them in the background.
+    Tags group keys for invalidation (e.g. every page of one user's threads).
+    The interface is async so a store backed by SQLite or a network service can
+    do its I/O off the event loop.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float, stale_ttl: float, tags: Iterable[str] = ()):
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU store bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not entry.is_usable(time.time()):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, value: Any, ttl: float, stale_ttl: float, tags: Iterable[str] = ()):
+        now = time.time()
+        self._remove(key)
+        entry = CacheEntry(value=value, fresh_until=now + ttl, stale_until=now + ttl + stale_ttl, tags=set(tags))
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                removed += 1
+        self.invalidations += removed
+        return removed
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+def _build_cache() -> Optional[ResponseCache]:
+    backend = settings.THREADS_CACHE_BACKEND.lower()
+    if backend in ("", "none", "off"):
+        return None
+    if backend == "memory":
+        return MemoryResponseCache(max_entries=settings.THREADS_CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unknown THREADS_CACHE_BACKEND: {settings.THREADS_CACHE_BACKEND}")
+
+_response_cache: Optional[ResponseCache] = _build_cache()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _response_cache
+
+def set_response_cache(cache: Optional[ResponseCache]):
+    """Swaps the process-wide store (e.g. for a persistent backend or to disable caching)."""
+    global _response_cache
+    _response_cache = cache
@@ -1,40 +1,272 @@
+import asyncio
+import hashlib
 import httpx
-from typing import Optional, Dict, Any, List
+import logging
+import time
+from typing import Optional, Dict, Any, AsyncIterator, Iterable, List
 from app.core.config import settings
+from app.core.metrics import THREADS_API_RESPONSES, THREADS_API_SECONDS, endpoint_template
+from app.integrations.rate_limiter import endpoint_class, get_rate_limiter
+from app.integrations.resilience import (
+    RetryPolicy, container_policy, get_circuit_breaker, get_policy, retry_after_seconds, retry_counters, write_policy,
+)
+from app.integrations.response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
 
 class IntegrationError(Exception):
-    def __init__(self, message: str, status_code: int = 500, raw: dict = None):
+    def __init__(self, message: str, status_code: int = 500, raw: dict = None, retry_after: Optional[float] = None):
         self.message = message
         self.status_code = status_code
         self.raw = raw
+        self.retry_after = retry_after
         super().__init__(message)
 
+class CircuitOpenError(IntegrationError):
+    """Raised without calling the API while the host's circuit breaker is open."""
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Threads API unavailable ({host} circuit open, retry in {retry_in:.0f}s)",
+                         status_code=503, retry_after=retry_in)
+
+# --- Shared HTTP transport ---
+# One pooled AsyncClient for the whole process. It is opened in the app lifespan
+# (see app.main) and closed on shutdown; auth headers are applied per request so
+# every access token reuses the same keep-alive / HTTP/2 connections.
+_http_client: Optional[httpx.AsyncClient] = None
+_pool_counters = {"clients_opened": 0, "requests": 0}
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def init_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Creates the shared outbound client (idempotent unless a transport is injected)."""
+    global _http_client
+    if _http_client is not None and transport is None:
+        return _http_client
+
+    http2 = settings.THREADS_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("THREADS_HTTP2 is enabled but 'h2' is not installed; falling back to HTTP/1.1")
+        http2 = False
+
+    _http_client = httpx.AsyncClient(
+        http2=http2,
+        transport=transport,
+        limits=httpx.Limits(
+            max_connections=settings.THREADS_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.THREADS_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.THREADS_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.THREADS_HTTP_TIMEOUT,
+            connect=settings.THREADS_HTTP_CONNECT_TIMEOUT,
+        ),
+    )
+    _pool_counters["clients_opened"] += 1
+    return _http_client
+
+def get_http_client() -> httpx.AsyncClient:
+    # Lazily create the pool for callers running outside the app lifespan (scripts, shells)
+    if _http_client is None or _http_client.is_closed:
+        return init_http_client()
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool snapshot for the shared client."""
+    stats = {
+        "open": _http_client is not None and not _http_client.is_closed,
+        "http2": settings.THREADS_HTTP2 and _http2_available(),
+        "max_connections": settings.THREADS_HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.THREADS_HTTP_MAX_KEEPALIVE,
+        "keepalive_expiry": settings.THREADS_HTTP_KEEPALIVE_EXPIRY,
+        "clients_opened": _pool_counters["clients_opened"],
+        "requests": _pool_counters["requests"],
+        "connections": 0,
+        "idle_connections": 0,
+        "active_connections": 0,
+    }
+    if not stats["open"]:
+        return stats
+
+    # httpcore keeps its pool on the default transport; injected transports may not have one
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    stats["connections"] = len(connections)
+    stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+    stats["active_connections"] = stats["connections"] - stats["idle_connections"]
+    return stats
+
+# --- Single-flight GETs ---
+# Concurrent identical GETs (same endpoint, params, token and retry policy) share
+# one outbound call; every waiter gets the same result or the same exception.
+_inflight: Dict[tuple, asyncio.Task] = {}
+_coalesce_counters = {"leaders": 0, "coalesced": 0}
+
+def _inflight_key(method: str, endpoint: str, params: Optional[dict], access_token: str,
+                  retry: Optional[RetryPolicy] = None) -> tuple:
+    return (method.upper(), endpoint, tuple(sorted((params or {}).items())), access_token, retry)
+
+def get_coalescing_stats() -> Dict[str, Any]:
+    return {
+        "inflight": len(_inflight),
+        "leaders": _coalesce_counters["leaders"],
+        "coalesced": _coalesce_counters["coalesced"],
+    }
+
+# --- Response cache counters (the store itself lives in response_cache) ---
+_cache_counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+_refreshing: Dict[str, asyncio.Task] = {}
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    return get_rate_limiter().stats()
+
+def get_cache_stats() -> Dict[str, Any]:
+    cache = get_response_cache()
+    stats = dict(_cache_counters, refreshing=len(_refreshing), enabled=cache is not None)
+    if cache is not None:
+        stats.update(cache.stats())
+    return stats
+
+def _graph_error_code(error_data: Any) -> Optional[int]:
+    error = error_data.get("error") if isinstance(error_data, dict) else None
+    return error.get("code") if isinstance(error, dict) else None
+
 class ThreadsClient:
-    def __init__(self, access_token: str):
-        self.base_url = settings.THREADS_GRAPH_BASE
-        self.base_url = "https://graph.threads.net" # Changed from settings.THREADS_GRAPH_BASE
+    def __init__(self, access_token: str, http_client: Optional[httpx.AsyncClient] = None):
+        # Overridable, e.g. to point at bench/graph_simulator.py
+        self.base_url = settings.THREADS_GRAPH_BASE.rstrip("/")
         self.access_token = access_token
-        # self.headers removed as httpx.AsyncClient handles it
-        self.client = httpx.AsyncClient(headers={"Authorization": f"Bearer {access_token}"}) # New: httpx client initialized here
+        self._http_client = http_client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client()
+
+    async def _request(self, method: str, endpoint: str, data: dict = None, params: dict = None,
+                       retry: Optional[RetryPolicy] = None) -> Dict[str, Any]: # Signature changed: added params
+        started = time.perf_counter()
+        status = "200"
+        try:
+            return await self._coalesced_request(method, endpoint, data=data, params=params, retry=retry)
+        except IntegrationError as e:
+            status = str(e.status_code)
+            raise
+        except BaseException:
+            status = "error"  # e.g. the caller was cancelled
+            raise
+        finally:
+            THREADS_API_SECONDS.observe(time.perf_counter() - started, method.upper(), endpoint_template(endpoint), status)
+
+    async def _coalesced_request(self, method: str, endpoint: str, data: dict = None, params: dict = None,
+                                 retry: Optional[RetryPolicy] = None) -> Dict[str, Any]:
+        if method.upper() != "GET":
+            return await self._send(method, endpoint, data=data, params=params, retry=retry)
+
+        # The policy is part of the key: a caller asking for more (or fewer) retries gets its own call
+        key = _inflight_key(method, endpoint, params, self.access_token, retry)
+        task = _inflight.get(key)
+        if task is None:
+            _coalesce_counters["leaders"] += 1
+            task = asyncio.ensure_future(self._send(method, endpoint, params=params, retry=retry))
+            _inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(key, t))
+        else:
+            _coalesce_counters["coalesced"] += 1
+        # shield: a cancelled caller must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finish_inflight(key: tuple, task: asyncio.Task):
+        if _inflight.get(key) is task:
+            del _inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    async def _send(self, method: str, endpoint: str, data: dict = None, params: dict = None,
+                    retry: Optional[RetryPolicy] = None) -> Dict[str, Any]:
+        """One logical call: retries per ``retry`` (default by method) behind the host's circuit breaker."""
+        policy = retry or (get_policy() if method.upper() == "GET" else write_policy())
+        breaker = get_circuit_breaker(self.base_url)
+        limiter = get_rate_limiter() if settings.THREADS_RATE_LIMIT_ENABLED else None
+        attempt = 0
+        while True:
+            attempt += 1
+            # Wait for the rate limiter first, so a queued call doesn't hold a half-open probe slot
+            if limiter is not None:
+                await limiter.acquire(self.access_token, endpoint_class(method, endpoint))
+            if not breaker.allow():
+                retry_counters["rejected_by_breaker"] += 1
+                raise CircuitOpenError(breaker.host, breaker.retry_in())
+            settled = False
+            try:
+                result = await self._send_once(method, endpoint, data=data, params=params)
+            except IntegrationError as e:
+                cause = e.__cause__
+                network_error = isinstance(cause, httpx.RequestError)
+                if network_error or e.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                settled = True
+                delay = policy.next_delay(
+                    attempt, e.status_code, network_error,
+                    connect_error=isinstance(cause, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)),
+                    retry_after=e.retry_after,
+                )
+                if delay is None:
+                    if attempt > 1:
+                        retry_counters["gave_up"] += 1
+                    raise
+                retry_counters["retries"] += 1
+                logger.info(f"Retrying {method} {endpoint} in {delay:.2f}s (attempt {attempt}): {e.message}")
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                if not settled:
+                    breaker.release()  # cancelled or failed unexpectedly: no verdict on the host
+            breaker.record_success()
+            return result
 
-    async def _request(self, method: str, endpoint: str, data: dict = None, params: dict = None) -> Dict[str, Any]: # Signature changed: added params
+    async def _send_once(self, method: str, endpoint: str, data: dict = None, params: dict = None) -> Dict[str, Any]:
         url = f"{self.base_url}{endpoint}"
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        limiter = get_rate_limiter() if settings.THREADS_RATE_LIMIT_ENABLED else None
+        rate_class = endpoint_class(method, endpoint)
         try:
+            _pool_counters["requests"] += 1
             # Using self.client and json=data for POST/PUT, params=params for GET
             if method.upper() == "GET":
-                response = await self.client.request(method, url, params=params)
+                response = await self.client.request(method, url, params=params, headers=headers)
             else:
-                response = await self.client.request(method, url, json=data)
+                response = await self.client.request(method, url, json=data, headers=headers)
+            THREADS_API_RESPONSES.inc(method.upper(), endpoint_template(endpoint), str(response.status_code))
+            error_data = None
             if response.status_code >= 400:
-                error_data = None
                 try:
                     error_data = response.json()
                     error_msg = error_data.get("error", {}).get("message", "Unknown error")
                 except ValueError: # Catch JSON decoding errors
                     error_msg = response.text
-                raise IntegrationError(f"Threads API Error: {error_msg}", status_code=response.status_code, raw=error_data)
+            if limiter is not None:
+                limiter.observe(self.access_token, rate_class, response.status_code, response.headers,
+                                _graph_error_code(error_data))
+            if response.status_code >= 400:
+                raise IntegrationError(f"Threads API Error: {error_msg}", status_code=response.status_code, raw=error_data,
+                                       retry_after=retry_after_seconds(response.headers))
             response.raise_for_status() # Keep this for other HTTP errors not caught by the 400 check
             return response.json()
+        except IntegrationError:
+            raise # Keep the API's status code so callers can tell client errors from outages
         except httpx.RequestError as e: # Catch network-related errors
             raise IntegrationError(f"Network error: {str(e)}") from e
         except httpx.HTTPStatusError as e: # Catch remaining HTTP status errors (e.g., 3xx redirects, 5xx if not caught by 400 check)
@@ -48,28 +280,133 @@ class ThreadsClient:
         except Exception as e: # Catch any other unexpected errors
             raise IntegrationError(f"An unexpected error occurred: {str(e)}") from e
 
+    def _cache_key(self, endpoint: str, params: Optional[dict]) -> str:
+        # Never keep raw tokens in cache keys (a persistent store would write them to disk)
+        token_hash = hashlib.sha256(self.access_token.encode()).hexdigest()[:16]
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return f"{token_hash}:{endpoint}?{query}"
+
+    async def _cached_get(self, endpoint: str, ttl: float, params: dict = None, tags: Iterable[str] = ()) -> Dict[str, Any]:
+        """GET through the response cache with stale-while-revalidate.
+
+        Fresh entries are returned as-is; stale ones are returned immediately
+        while a single background task refreshes them.
+        """
+        cache = get_response_cache()
+        if cache is None or ttl <= 0:
+            return await self._request("GET", endpoint, params=params)
+
+        key = self._cache_key(endpoint, params)
+        entry = await cache.get(key)
+        now = time.time()
+        if entry is not None and entry.is_fresh(now):
+            _cache_counters["hits"] += 1
+            return entry.value
+        if entry is not None and entry.is_usable(now):
+            _cache_counters["stale_hits"] += 1
+            if key not in _refreshing:
+                task = asyncio.ensure_future(self._refresh(cache, key, endpoint, ttl, params, tags))
+                _refreshing[key] = task
+                task.add_done_callback(lambda t: _refreshing.pop(key, None))
+            return entry.value
+
+        _cache_counters["misses"] += 1
+        value = await self._request("GET", endpoint, params=params)
+        await cache.set(key, value, ttl, settings.THREADS_CACHE_STALE_SECONDS, tags)
+        return value
+
+    async def _refresh(self, cache, key: str, endpoint: str, ttl: float, params: Optional[dict], tags: Iterable[str]):
+        _cache_counters["refreshes"] += 1
+        try:
+            value = await self._request("GET", endpoint, params=params)
+            await cache.set(key, value, ttl, settings.THREADS_CACHE_STALE_SECONDS, tags)
+        except Exception as e:
+            # Keep serving the stale entry until it ages out
+            _cache_counters["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for {endpoint}: {e}")
+
+    async def invalidate_cache(self, tags: Iterable[str]):
+        cache = get_response_cache()
+        if cache is not None:
+            await cache.invalidate_tags(tags)
+
     async def get_me(self) -> Dict[str, Any]:
-        return await self._request("GET", "/me?fields=id,username,name,threads_profile_picture_url,threads_biography")
+        return await self._cached_get(
+            "/me?fields=id,username,name,threads_profile_picture_url,threads_biography",
+            ttl=settings.THREADS_CACHE_TTL_ME,
+        )
 
     async def get_user_threads(self, user_id: str) -> List[Dict[str, Any]]:
         # fields might be needed, but for now basic
-        response = await self._request("GET", f"/v1.0/{user_id}/threads?fields=id,media_product_type,media_type,shortcode,text,timestamp,username,permalink")
+        response = await self._cached_get(
+            f"/v1.0/{user_id}/threads?fields=id,media_product_type,media_type,shortcode,text,timestamp,username,permalink",
+            ttl=settings.THREADS_CACHE_TTL_USER_THREADS,
+            tags=[f"user_threads:{user_id}"],
+        )
         return response.get("data", [])
 
-    async def create_text_post(self, text: str, user_id: str):
+    async def iter_pages(
+        self, endpoint: str, params: dict = None, page_size: int = 25, max_items: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yields ``data`` pages of a Graph edge, following ``paging.cursors.after``.
+
+        Pages are fetched lazily: nothing past the current page is requested
+        until the consumer asks for it, and stopping iteration stops fetching.
+        """
+        params = dict(params or {}, limit=page_size)
+        fetched = 0
+        while True:
+            response = await self._request("GET", endpoint, params=params)
+            page = response.get("data", [])
+            if max_items is not None:
+                page = page[:max_items - fetched]
+            if page:
+                fetched += len(page)
+                yield page
+
+            paging = response.get("paging") or {}
+            after = (paging.get("cursors") or {}).get("after")
+            if not page or not paging.get("next") or not after:
+                return
+            if max_items is not None and fetched >= max_items:
+                return
+            params["after"] = after
+
+    def iter_user_threads(self, user_id: str, page_size: int = 25, max_items: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """All of a user's threads, page by page (get_user_threads only returns the first page)."""
+        return self.iter_pages(f"/v1.0/{user_id}/threads", params={
+            "fields": "id,media_product_type,media_type,shortcode,text,timestamp,username,permalink"
+        }, page_size=page_size, max_items=max_items)
+
+    def iter_replies(
+        self, media_id: str, page_size: int = 25, max_items: Optional[int] = None, newest_first: bool = True
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """All replies to a post, page by page."""
+        return self.iter_pages(f"/{media_id}/replies", params={
+            "fields": "id,text,username,timestamp,permalink",
+            "reverse": "true" if newest_first else "false",
+        }, page_size=page_size, max_items=max_items)
+
+    async def create_text_container(self, text: str, user_id: str) -> str:
         data = {
             "media_type": "TEXT",
             "text": text
         }
-        # Step 1: Create container
-        container = await self._request("POST", f"/v1.0/{user_id}/threads", data)
-        container_id = container.get("id")
+        container = await self._request("POST", f"/v1.0/{user_id}/threads", data, retry=container_policy())
+        return container.get("id")
 
-        # Step 2: Publish
+    async def publish_container(self, container_id: str, user_id: str) -> str:
         publish_data = {"creation_id": container_id}
         result = await self._request("POST", f"/v1.0/{user_id}/threads_publish", publish_data)
+        await self.invalidate_cache([f"user_threads:{user_id}"])
         return result.get("id")
 
+    async def create_text_post(self, text: str, user_id: str):
+        # Step 1: Create container
+        container_id = await self.create_text_container(text, user_id)
+        # Step 2: Publish
+        return await self.publish_container(container_id, user_id)
+
     async def delete_post(self, media_id: str):
          # Threads API currently docs are limited on DELETE for external tools, 
          # but if it exists it would be DELETE /media_id
@@ -77,9 +414,9 @@ class ThreadsClient:
          pass
 
     async def list_replies(self, media_id: str) -> List[Dict[str, Any]]:
-        response = await self._request("GET", f"/{media_id}/replies", params={
+        response = await self._cached_get(f"/{media_id}/replies", params={
             "fields": "id,text,username,timestamp,permalink"
-        })
+        }, ttl=settings.THREADS_CACHE_TTL_REPLIES, tags=[f"replies:{media_id}"])
         return response.get("data", [])
 
     async def reply(self, text: str, parent_media_id: str, user_id: str) -> str:
@@ -88,13 +425,14 @@ class ThreadsClient:
              "media_type": "TEXT",
              "text": text,
              "reply_to_id": parent_media_id
-        })
+        }, retry=container_policy())
         creation_id = container_data.get("id")
 
         # Step 2: Publish
         publish_data = await self._request("POST", f"/v1.0/{user_id}/threads_publish", data={
             "creation_id": creation_id
         })
+        await self.invalidate_cache([f"replies:{parent_media_id}", f"user_threads:{user_id}"])
         return publish_data.get("id")
 
     async def get_insights(self, media_id: str) -> Dict[str, Any]:
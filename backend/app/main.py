@@ -1,9 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.routers import auth, threads, jobs
+from app.core.metrics import MetricsMiddleware
+from app.core.responses import FastJSONResponse
+from app.db.profiler import PROFILE_HEADER, SQLProfilerMiddleware
+from app.routers import auth, threads, jobs, system, analytics, search, export, metrics
+from app.integrations.threads_client import init_http_client, close_http_client
+from app.services.inbox_service import sync_loop as inbox_sync_loop
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.publish_queue import start_workers
+from app.services.rollup_service import rollup_loop
+from app.services.scheduler import post_scheduler
 
-app = FastAPI(title="ThreadOS API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared outbound connection pool for the Threads Graph API
+    init_http_client()
+    background = []
+    if settings.ROLLUP_ENABLED:
+        background.append(asyncio.create_task(rollup_loop(settings.ROLLUP_INTERVAL_SECONDS)))
+    background.extend(start_workers(settings.PUBLISH_WORKERS))
+    if settings.SCHEDULER_ENABLED:
+        background.append(asyncio.create_task(post_scheduler.run()))
+    if settings.INBOX_SYNC_ENABLED:
+        background.append(asyncio.create_task(inbox_sync_loop()))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await close_http_client()
+
+app = FastAPI(title="ThreadOS API", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 print("🔥 FORCE REDEPLOY: BACKEND V5 - RESILIENT STARTUP (PORT 8000) 🔥")
 
 # CORS Configuration
@@ -22,19 +54,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PROFILE_HEADER],
 )
 
+# Wraps every route, so each response (API, docs, static) is negotiated once
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+if settings.SQL_PROFILER_ENABLED:
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Outside compression, so request timings include it
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router, prefix="/api")
 app.include_router(threads.router, prefix="/api")
 app.include_router(jobs.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(export.router, prefix="/api")
+app.include_router(metrics.router)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "env": settings.APP_ENV}
 
 # --- UNIFIED DEPLOYMENT: Serve React Static Files ---
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from app.core.static_assets import HASHED_PREFIX, AssetManifest
 import os
 
 # Path where the built frontend will be mounted in the Docker container
@@ -42,27 +97,27 @@ static_dir = os.path.join(os.path.dirname(__file__), "static")
 
 # Only serve static files if the directory exists (Production mode)
 if os.path.exists(static_dir):
-    # Mount assets (JS, CSS, Images)
-    # Vite builds to /assets by default
-    assets_dir = os.path.join(static_dir, "assets")
-    if os.path.exists(assets_dir):
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+    # Indexed once at startup: lookups, ETags and precompressed variants come from memory
+    static_manifest = AssetManifest(static_dir)
 
     # Catch-all route for SPA (React Router)
     # This must be LAST so it doesn't override API routes
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        # Allow API calls to pass through (returns 404 if not found above)
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_spa(full_path: str, request: Request):
+        # Unknown API routes get a 404 rather than the app shell
         if full_path.startswith("api"):
-             return {"error": "API route not found"}
-        
-        # Check if a specific file exists (e.g., favicon.ico, logo.png)
-        file_path = os.path.join(static_dir, full_path)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
-        
-        # Otherwise, serve index.html for React Router handling
-        return FileResponse(os.path.join(static_dir, "index.html"))
+            return JSONResponse({"error": "API route not found"}, status_code=404)
+
+        asset = static_manifest.get(full_path)
+        if asset is None:
+            if full_path.startswith(HASHED_PREFIX):
+                # A stale bundle name: answering with index.html would be cached as the script
+                return JSONResponse({"error": "Asset not found"}, status_code=404)
+            # Otherwise, serve index.html for React Router handling
+            asset = static_manifest.index
+            if asset is None:
+                return JSONResponse({"error": "index.html not found"}, status_code=404)
+        return static_manifest.response(asset, request.headers, request.method)
 
 if __name__ == "__main__":
     import uvicorn
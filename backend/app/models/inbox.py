@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+# Graph timestamps have whole-second precision. On SQLite they are stored without the
+# fractional part, the same text form as CURRENT_TIMESTAMP, so keyset cursors compare
+# exactly (see pagination._sqlite_datetime).
+ReplyTimestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
+class InboxReply(Base):
+    """Incoming reply to one of our posts, mirrored from the Graph API."""
+    __tablename__ = "inbox_replies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    threads_reply_id = Column(String, unique=True, nullable=False)
+    parent_media_id = Column(String, nullable=False)
+    text = Column(String, nullable=True)
+    username = Column(String, nullable=True)
+    permalink = Column(String, nullable=True)
+    timestamp = Column(ReplyTimestamp, nullable=True) # when the reply was posted
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_inbox_replies_parent_timestamp_id", "parent_media_id", "timestamp", "id"),
+    )
+
+class ReplySyncState(Base):
+    """Per-post high-water mark of the replies already mirrored."""
+    __tablename__ = "reply_sync_state"
+
+    media_id = Column(String, primary_key=True)
+    last_reply_at = Column(DateTime(timezone=True), nullable=True) # newest reply timestamp seen
+    last_reply_id = Column(String, nullable=True)
+    reply_count = Column(Integer, default=0)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True) # None: due on next read
+    last_error = Column(String, nullable=True)
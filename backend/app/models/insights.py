@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -13,3 +13,7 @@ class InsightsSnapshot(Base):
     reposts = Column(Integer, default=0)
     quotes = Column(Integer, default=0)
     captured_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_insights_snapshots_media_captured_id", "threads_media_id", "captured_at", "id"),
+    )
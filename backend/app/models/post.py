@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -8,6 +8,15 @@ class Post(Base):
     id = Column(Integer, primary_key=True, index=True)
     threads_media_id = Column(String, unique=True, index=True, nullable=True) # Nullable until published
     text = Column(String)
-    status = Column(String, default="PUBLISHED") # PUBLISHED, FAILED, DRAFT, DELETED
+    status = Column(String, default="PUBLISHED") # PUBLISHED, FAILED, DRAFT, DELETED, SCHEDULED, PENDING
     error_message = Column(String, nullable=True)
+    scheduled_at = Column(DateTime(timezone=True), nullable=True) # UTC; set while SCHEDULED
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Keyset pagination: newest first, optionally filtered by status
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_status_created_at_id", "status", "created_at", "id"),
+        # Scheduler (re)load: SCHEDULED posts in due order
+        Index("ix_posts_status_scheduled_at", "status", "scheduled_at"),
+    )
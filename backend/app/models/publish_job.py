@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class PublishJob(Base):
+    """Durable queue entry that publishes one Post to Threads."""
+    __tablename__ = "publish_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="QUEUED") # QUEUED, RUNNING, DONE, FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False) # not visible to workers before this
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    container_id = Column(String, nullable=True) # kept so a retry publishes the same container
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_publish_jobs_status_available_at", "status", "available_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -11,3 +11,8 @@ class Reply(Base):
     text = Column(String)
     author = Column(String, nullable=True) # Username of who we replied to (optional context)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_replies_created_at_id", "created_at", "id"),
+        Index("ix_replies_parent_created_at_id", "parent_media_id", "created_at", "id"),
+    )
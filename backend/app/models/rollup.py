@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class InsightsRollup(Base):
+    """Insights snapshots folded into hourly or daily buckets per post."""
+    __tablename__ = "insights_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    threads_media_id = Column(String, nullable=False)
+    granularity = Column(String, nullable=False) # hour, day
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    samples = Column(Integer, default=0)
+    first_captured_at = Column(DateTime(timezone=True))
+    last_captured_at = Column(DateTime(timezone=True))
+
+    views_min = Column(Integer, default=0)
+    views_max = Column(Integer, default=0)
+    views_last = Column(Integer, default=0)
+    likes_min = Column(Integer, default=0)
+    likes_max = Column(Integer, default=0)
+    likes_last = Column(Integer, default=0)
+    replies_min = Column(Integer, default=0)
+    replies_max = Column(Integer, default=0)
+    replies_last = Column(Integer, default=0)
+    reposts_min = Column(Integer, default=0)
+    reposts_max = Column(Integer, default=0)
+    reposts_last = Column(Integer, default=0)
+    quotes_min = Column(Integer, default=0)
+    quotes_max = Column(Integer, default=0)
+    quotes_last = Column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("threads_media_id", "granularity", "bucket_start", name="uq_insights_rollups_bucket"),
+        Index("ix_insights_rollups_granularity_bucket", "granularity", "bucket_start"),
+    )
+
+class RollupState(Base):
+    """High-water mark of raw snapshots already folded into rollups."""
+    __tablename__ = "rollup_state"
+
+    name = Column(String, primary_key=True)
+    last_snapshot_id = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from app.db.database import get_db, run_db
+from app.services import analytics_service
+from app.services.analytics_service import SORT_KEYS, SOURCES, result_cache
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+def _check(source: str, sort: Optional[str] = None):
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of {', '.join(SOURCES)}")
+    if sort is not None and sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_KEYS)}")
+
+@router.get("/posts")
+async def rank_posts(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    sort: str = "views_delta",
+    limit: int = Query(20, ge=1, le=1000),
+    source: str = "rollup",
+    db: Session = Depends(get_db)
+):
+    """Top posts over a window by growth, reach or engagement, computed across all posts at once."""
+    _check(source, sort)
+    key = ("posts", since, until, sort, limit, source)
+    version = await run_db(db, analytics_service.data_version)
+    cached = result_cache.get(key, version)
+    if cached is not None:
+        return cached
+
+    window = analytics_service.default_window(since, until)
+    batch = await run_db(db, analytics_service.load_batch, *window, source)
+    # numpy releases the GIL for most of this; keep it off the event loop either way
+    posts = await run_in_threadpool(analytics_service.rank_posts, batch, sort, limit)
+    result = {
+        "since": window[0],
+        "until": window[1],
+        "source": source,
+        "sort": sort,
+        "posts_in_window": len(batch.media_ids),
+        "posts": posts,
+    }
+    result_cache.set(key, version, result)
+    return result
+
+@router.get("/growth")
+async def growth_curves(
+    media_id: List[str] = Query(...),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: str = "rollup",
+    db: Session = Depends(get_db)
+):
+    """Views and views/hour over time for one or more posts, oldest first."""
+    _check(source)
+    key = ("growth", tuple(sorted(media_id)), since, until, source)
+    version = await run_db(db, analytics_service.data_version)
+    cached = result_cache.get(key, version)
+    if cached is not None:
+        return cached
+
+    window = analytics_service.default_window(since, until)
+    batch = await run_db(db, analytics_service.load_batch, *window, source, media_id)
+    curves = await run_in_threadpool(analytics_service.growth_curves, batch)
+    result = {"since": window[0], "until": window[1], "source": source, "curves": curves}
+    result_cache.set(key, version, result)
+    return result
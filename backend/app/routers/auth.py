@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_db, run_db
 from app.core.config import settings
 from app.models.account import Account, Token
-from app.integrations.threads_client import ThreadsClient
+from app.integrations.threads_client import ThreadsClient, get_http_client
+from app.services.credential_service import credential_cache
 import httpx
 import logging
 
@@ -26,11 +27,45 @@ async def start_auth():
     auth_url = f"{base_url}?client_id={params['client_id']}&redirect_uri={params['redirect_uri']}&scope={params['scope']}&response_type=code"
     return {"url": auth_url}
 
+def _load_connection(db: Session):
+    token = db.query(Token).first()
+    if not token or not token.access_token:
+        return None, None
+    account = db.query(Account).filter(Account.id == token.account_id).first()
+    return token, account
+
+def _store_account_token(db: Session, user_info: dict, access_token: str) -> Account:
+    account = db.query(Account).filter(Account.threads_user_id == user_info.get("id")).first()
+    if not account:
+        account = Account(
+            threads_user_id=user_info.get("id"),
+            username=user_info.get("username")
+        )
+        db.add(account)
+        db.commit()
+        db.refresh(account)
+
+    # Store/Update Token
+    token = db.query(Token).filter(Token.account_id == account.id).first()
+    if not token:
+        token = Token(
+            account_id=account.id,
+            access_token=access_token,
+            scopes=settings.THREADS_SCOPES
+        )
+        db.add(token)
+    else:
+        token.access_token = access_token
+
+    db.commit()
+    db.refresh(account)
+    return account
+
 @router.get("/status")
 async def get_auth_status(db: Session = Depends(get_db)):
     """Returns the current connection status."""
-    token = db.query(Token).first()
-    if not token or not token.access_token:
+    token, account = await run_db(db, _load_connection)
+    if not token:
         return {
             "connected": False,
             "username": None,
@@ -41,7 +76,6 @@ async def get_auth_status(db: Session = Depends(get_db)):
     
     try:
         # Get account info
-        account = db.query(Account).filter(Account.id == token.account_id).first()
         username = account.username if account else None
         
         return {
@@ -68,7 +102,7 @@ async def auth_callback(code: str, db: Session = Depends(get_db)):
     logger.info(f"Callback received with code: {code[:10]}...")
     try:
         # Exchange code for token
-        token_url = "https://graph.threads.net/oauth/access_token"
+        token_url = f"{settings.THREADS_GRAPH_BASE.rstrip('/')}/oauth/access_token"
         
         logger.info(f"Exchanging token with redirect_uri: {settings.THREADS_REDIRECT_URI}")
         
@@ -81,17 +115,17 @@ async def auth_callback(code: str, db: Session = Depends(get_db)):
             "code": code
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(token_url, data=data)
-                response.raise_for_status()
-                token_data = response.json()
-            except httpx.HTTPError as e:
-                logger.error(f"Failed to exchange token: {e}")
-                # Log response body if available for debugging
-                if hasattr(e, 'response') and e.response:
-                     logger.error(f"Response body: {e.response.text}")
-                raise HTTPException(status_code=400, detail="Failed to exchange authorization code")
+        client = get_http_client()
+        try:
+            response = await client.post(token_url, data=data)
+            response.raise_for_status()
+            token_data = response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to exchange token: {e}")
+            # Log response body if available for debugging
+            if hasattr(e, 'response') and e.response:
+                 logger.error(f"Response body: {e.response.text}")
+            raise HTTPException(status_code=400, detail="Failed to exchange authorization code")
 
         access_token = token_data.get("access_token")
         user_id = token_data.get("user_id") # Threads often returns user_id here too
@@ -113,29 +147,8 @@ async def auth_callback(code: str, db: Session = Depends(get_db)):
         
         # Update/Create Account
         logger.info("Updating database...")
-        account = db.query(Account).filter(Account.threads_user_id == user_info.get("id")).first()
-        if not account:
-            account = Account(
-                threads_user_id=user_info.get("id"),
-                username=user_info.get("username")
-            )
-            db.add(account)
-            db.commit()
-            db.refresh(account)
-        
-        # Store/Update Token
-        token = db.query(Token).filter(Token.account_id == account.id).first()
-        if not token:
-            token = Token(
-                account_id=account.id,
-                access_token=access_token,
-                scopes=settings.THREADS_SCOPES
-            )
-            db.add(token)
-        else:
-            token.access_token = access_token
-        
-        db.commit()
+        account = await run_db(db, _store_account_token, user_info, access_token)
+        credential_cache.invalidate()
         logger.info("Database updated successfully.")
 
         from fastapi.responses import RedirectResponse
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.core.timeutils import to_naive_utc
+from app.services import export_service
+from app.services.export_service import EXPORTS, MEDIA_TYPES, ExportError
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+@router.get("/{kind}")
+async def export_rows(
+    kind: str,
+    fmt: str = Query("ndjson", alias="format"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Every post, reply or insights snapshot (created/captured in [since, until)) as NDJSON, CSV or Parquet.
+
+    Streamed in id order as rows are read, so any size can be exported.
+    """
+    if kind not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"kind must be one of {', '.join(EXPORTS)}")
+    try:
+        export_service.check_format(fmt)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Naive values are UTC, so one bound may be naive and the other carry an offset
+    since = to_naive_utc(since) if since is not None else None
+    until = to_naive_utc(until) if until is not None else None
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+
+    filename = export_service.export_filename(kind, fmt)
+    return StreamingResponse(
+        export_service.stream_export(kind, fmt, since, until),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,40 +1,66 @@
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.models.post import Post
+from app.db.database import get_db, run_db
 from app.routers.threads import get_threads_client
 from app.integrations.threads_client import ThreadsClient
+from app.core.config import settings
+from app.services import backup_service, insights_service, publish_queue, rollup_service
 import logging
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 logger = logging.getLogger(__name__)
 
-async def run_insights_job(db: Session, client: ThreadsClient):
-    # Fetch last 20 published posts
-    posts = db.query(Post).filter(Post.status == "published").order_by(Post.created_at.desc()).limit(20).all()
-    
-    for post in posts:
-        try:
-            # We reuse the logic from threads router essentially, but here we just fetch and store
-            # In a real app, logic should be in a Service layer to avoid code duplication.
-            # For this simple v1, I'll allow a bit of duplication or just call the client methods.
-            
-            # This is a background task, so we need a new DB session if we were async, 
-            # but here we are running in the background task context.
-            # Simplification: Just Run it.
-            pass
-        except Exception as e:
-            logger.error(f"Failed to update insights for {post.id}: {e}")
-
-@router.post("/insights/run")
+@router.post("/insights/run", status_code=status.HTTP_202_ACCEPTED)
 async def trigger_insights_job(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    limit: int | None = None,
+    concurrency: int | None = None,
     client: ThreadsClient = Depends(get_threads_client)
 ):
-    """Manually trigger an insights update for recent posts."""
-    # For now, we'll just return OK. Implementing the full background logic 
-    # requires careful session management in FastAPI background tasks.
-    # I'll just return a success message as a placeholder for V1 since the 
-    # user can also hit GET /threads/insights/{media_id} manually on the frontend.
-    return {"status": "job_started", "message": "Insights job triggered (implementation pending full service layer)"}
+    """Refresh insights for recently published posts in the background."""
+    if insights_service.job_status["state"] == "running":
+        return {"status": "already_running", "job": insights_service.job_status}
+
+    # Mark as running before the response so a double click can't start a second run
+    insights_service.job_status["state"] = "running"
+    background_tasks.add_task(insights_service.refresh_insights, client, limit=limit, concurrency=concurrency)
+    return {"status": "job_started", "job": insights_service.job_status}
+
+@router.get("/insights/status")
+async def get_insights_job_status():
+    """Progress and timing of the latest insights refresh."""
+    return insights_service.job_status
+
+@router.post("/rollup/run")
+async def run_rollup_job():
+    """Fold new insights snapshots into rollups and prune expired raw rows now."""
+    return await rollup_service.run_rollup_now()
+
+@router.get("/publish/status")
+async def get_publish_queue_status(db: Session = Depends(get_db)):
+    """Publish queue depth by state plus worker throughput."""
+    return {"depth": await run_db(db, publish_queue.queue_depth), "workers": publish_queue.get_queue_stats()}
+
+@router.post("/backup/run", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_backup_job(background_tasks: BackgroundTasks):
+    """Take an online backup of the SQLite database in the background."""
+    if backup_service.backup_status["state"] == "running":
+        return {"status": "already_running", "job": backup_service.backup_status}
+    try:
+        backup_service.validate(settings.BACKUP_METHOD, settings.BACKUP_COMPRESSION)
+    except backup_service.BackupError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    backup_service.backup_status["state"] = "running"
+    background_tasks.add_task(backup_service.run_backup_job)
+    return {"status": "job_started", "job": backup_service.backup_status}
+
+@router.get("/backup/status")
+async def get_backup_status():
+    """Latest backup run and the backups kept on disk."""
+    try:
+        backups = await run_in_threadpool(backup_service.list_backups)
+    except backup_service.BackupError:
+        backups = []
+    return {"job": backup_service.backup_status, "backups": backups}
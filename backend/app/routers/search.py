@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.database import get_db, run_db
+from app.schemas.search import SearchHit
+from app.services.pagination import NEXT_CURSOR_HEADER, InvalidCursor
+from app.services.search_service import KINDS, search, search_terms
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("", response_model=List[SearchHit])
+async def search_text(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str = "all",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Full-text search over posts, sent replies and received (inbox) replies, best matches first."""
+    if kind != "all" and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of all, {', '.join(KINDS)}")
+    if not search_terms(q):
+        raise HTTPException(status_code=400, detail="q must contain at least one word")
+    kinds = KINDS if kind == "all" else (kind,)
+    try:
+        hits, next_cursor = await run_db(db, search, q, kinds, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return hits
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from app.db.profiler import profiler_stats
+from app.integrations.resilience import get_resilience_stats
+from app.integrations.threads_client import get_cache_stats, get_coalescing_stats, get_pool_stats, get_rate_limit_stats
+from app.services.analytics_service import result_cache as analytics_cache
+from app.services.backup_service import backup_status
+from app.services.credential_service import credential_cache
+from app.services.inbox_service import get_inbox_stats
+from app.services.publish_queue import get_queue_stats
+from app.services.rollup_service import rollup_status
+from app.services.scheduler import post_scheduler
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+@router.get("/stats")
+async def get_stats():
+    """Runtime statistics for the shared resources held by this process."""
+    return {
+        "http_pool": get_pool_stats(),
+        "request_coalescing": get_coalescing_stats(),
+        "response_cache": get_cache_stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "retries": get_resilience_stats(),
+        "insights_rollup": rollup_status,
+        "publish_queue": get_queue_stats(),
+        "scheduler": post_scheduler.stats(),
+        "credential_cache": credential_cache.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "inbox_sync": get_inbox_stats(),
+        "sql_profiler": profiler_stats,
+        "backup": backup_status,
+    }
@@ -1,38 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
-from app.models.account import Token, Account
+from typing import List, Optional
+from datetime import datetime
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.db.database import get_db, run_db, save
 from app.models.post import Post as PostModel
 from app.models.reply import Reply as ReplyModel
 from app.models.insights import InsightsSnapshot
-from app.schemas.post import PostCreate, Post
-from app.schemas.reply import ReplyCreate, Reply
-from app.schemas.insights import InsightsSnapshot as InsightsSchema
+from app.schemas.post import PostBulkCreate, PostCreate, PostSchedule, Post
+from app.schemas.reply import InboxReply, ReplyCreate, Reply
+from app.schemas.insights import InsightsSnapshot as InsightsSchema, InsightsRollup as RollupSchema
 from app.integrations.threads_client import ThreadsClient
+from app.services.credential_service import Credential, credential_cache
+from app.services.inbox_service import ensure_fresh, list_inbox_page, mark_stale
+from app.services.insights_service import list_snapshots_page, parse_insights
+from app.services import publish_queue
+from app.services.pagination import NEXT_CURSOR_HEADER, InvalidCursor
+from app.services.reply_service import list_replies_page
+from app.services.rollup_service import GRANULARITIES, list_rollups
+from app.services.scheduler import post_scheduler
+from app.core.timeutils import to_naive_utc, utcnow
+import json
 import logging
+import uuid
 
 router = APIRouter(prefix="/threads", tags=["threads"])
 logger = logging.getLogger(__name__)
 
-def get_threads_client(db: Session = Depends(get_db)) -> ThreadsClient:
-    # Single user assumption: get the first available token
-    token = db.query(Token).first()
-    if not token or not token.access_token:
+async def get_credential(db: Session = Depends(get_db)) -> Credential:
+    # Single user assumption: the first available token, served from the credential cache
+    credential = await run_db(db, credential_cache.get)
+    if not credential:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No connected Threads account found. Please connect first."
         )
-    return ThreadsClient(access_token=token.access_token)
-
-async def get_current_user_id(db: Session = Depends(get_db)) -> str:
-    token = db.query(Token).first()
-    if not token:
-        raise HTTPException(status_code=401, detail="Not connected")
-    account = db.query(Account).filter(Account.id == token.account_id).first()
-    if not account:
+    return credential
+
+def get_threads_client(credential: Credential = Depends(get_credential)) -> ThreadsClient:
+    return ThreadsClient(access_token=credential.access_token)
+
+async def get_current_user_id(credential: Credential = Depends(get_credential)) -> str:
+    if not credential.threads_user_id:
          raise HTTPException(status_code=401, detail="Account not found")
-    return account.threads_user_id
+    return credential.threads_user_id
 
 @router.get("/me")
 async def get_me(client: ThreadsClient = Depends(get_threads_client)):
@@ -44,45 +57,168 @@ async def get_my_posts(
     user_id: str = Depends(get_current_user_id)
 ):
     try:
-        return await client.get_user_threads(user_id)
+        # Graph JSON is already JSON-compatible: skip jsonable_encoder's walk over every item
+        return FastJSONResponse(await client.get_user_threads(user_id))
     except Exception as e:
         logger.error(f"Failed to fetch posts: {e}")
         # Return empty list on error to not break frontend completely if API is strict
         return []
 
+async def _stream_ndjson(pages, by_page: bool):
+    """Encodes an async page iterator as NDJSON: one item (or one page) per line."""
+    try:
+        async for page in pages:
+            if by_page:
+                yield json.dumps(page) + "\n"
+            else:
+                for item in page:
+                    yield json.dumps(item) + "\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.error(f"Stream aborted: {e}")
+        yield json.dumps({"error": str(e)}) + "\n"
+
+@router.get("/my-posts/stream")
+async def stream_my_posts(
+    page_size: int = Query(25, ge=1, le=100),
+    max_items: Optional[int] = Query(None, ge=1),
+    by_page: bool = False,
+    client: ThreadsClient = Depends(get_threads_client),
+    user_id: str = Depends(get_current_user_id)
+):
+    """Full post history as NDJSON, fetched lazily as the client reads."""
+    pages = client.iter_user_threads(user_id, page_size=page_size, max_items=max_items)
+    return StreamingResponse(_stream_ndjson(pages, by_page), media_type="application/x-ndjson")
+
+def _set_next_cursor(response: Response, next_cursor: Optional[str]):
+    # Listings stay plain JSON arrays; the keyset cursor for the next page travels in a header
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
 @router.get("/posts", response_model=List[Post])
 async def list_posts(
-    limit: int = 10,
+    response: Response,
+    limit: int = Query(10, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
     db: Session = Depends(get_db)
 ):
     from app.services.post_service import PostService
     service = PostService(db)
-    return service.list_posts(limit=limit)
+    try:
+        posts, next_cursor = await service.list_posts(limit=limit, cursor=cursor, statuses=status)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, next_cursor)
+    return posts
 
-@router.post("/post", response_model=Post)
+@router.get("/replies", response_model=List[Reply])
+async def list_sent_replies(
+    response: Response,
+    limit: int = Query(20, ge=1, le=500),
+    cursor: Optional[str] = None,
+    parent_media_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Replies we have sent, newest first."""
+    try:
+        replies, next_cursor = await run_db(db, list_replies_page, limit, cursor, parent_media_id)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, next_cursor)
+    return replies
+
+@router.post("/post", response_model=Post, status_code=status.HTTP_202_ACCEPTED)
 async def create_post(
     post: PostCreate, 
     db: Session = Depends(get_db),
-    client: ThreadsClient = Depends(get_threads_client),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id)  # rejects early when no account is connected
+):
+    """Queue a post for publishing, or schedule it when ``scheduled_at`` is in the future.
+
+    It stays PENDING (or SCHEDULED) until a publish worker picks it up.
+    """
+    scheduled_at = to_naive_utc(post.scheduled_at) if post.scheduled_at else None
+    db_post = await run_db(db, publish_queue.enqueue_post, post.text, scheduled_at)
+    if db_post.status == "SCHEDULED":
+        post_scheduler.schedule(db_post.id, db_post.scheduled_at)
+    else:
+        publish_queue.notify_workers()
+    return db_post
+
+@router.post("/posts/bulk")
+async def create_posts_bulk(
+    bulk: PostBulkCreate,
+    stream: bool = False,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id)  # rejects early when no account is connected
 ):
+    """Create many posts in one transaction and publish them concurrently.
+
+    Returns every post's outcome (PUBLISHED, FAILED, RETRYING, QUEUED or
+    SCHEDULED) in input order, or with ``stream=true`` one NDJSON line per
+    post as it finishes followed by a summary line.
+    """
+    if len(bulk.posts) > settings.BULK_PUBLISH_MAX_POSTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_PUBLISH_MAX_POSTS} posts per request")
+    items = [(p.text, to_naive_utc(p.scheduled_at) if p.scheduled_at else None) for p in bulk.posts]
+    created = await run_db(db, publish_queue.enqueue_posts, items, settings.BULK_PUBLISH_HOLD_SECONDS)
+
+    index_of = {post.id: i for i, (post, _) in enumerate(created)}
+    scheduled = []
+    for post, _ in created:
+        if post.status == "SCHEDULED":
+            post_scheduler.schedule(post.id, post.scheduled_at)
+            scheduled.append({"post_id": post.id, "status": "SCHEDULED", "threads_media_id": None, "error": None})
+    jobs = [(post.id, job_id) for post, job_id in created if job_id is not None]
+    concurrency = bulk.concurrency or settings.BULK_PUBLISH_CONCURRENCY
+    outcomes = publish_queue.publish_jobs(jobs, concurrency, owner=f"bulk-{uuid.uuid4().hex[:8]}")
+
+    summary = {"total": len(created)}
+
+    def count(outcome):
+        key = outcome["status"].lower()
+        summary[key] = summary.get(key, 0) + 1
+        outcome["index"] = index_of[outcome["post_id"]]
+        return outcome
+
+    if stream:
+        async def lines():
+            for outcome in scheduled:
+                yield json.dumps(count(outcome)) + "\n"
+            async for outcome in outcomes:
+                yield json.dumps(count(outcome)) + "\n"
+            yield json.dumps({"summary": summary}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = [count(outcome) for outcome in scheduled]
+    async for outcome in outcomes:
+        results.append(count(outcome))
+    results.sort(key=lambda r: r["index"])
+    return {"summary": summary, "results": results}
+
+@router.put("/post/{post_id}/schedule", response_model=Post)
+async def reschedule_post(post_id: int, schedule: PostSchedule, db: Session = Depends(get_db)):
+    """Set or move the publish time of a SCHEDULED or DRAFT post."""
     from app.services.post_service import PostService
-    from app.integrations.threads_client import IntegrationError
-    service = PostService(db)
-    
-    # Create PENDING/DRAFT record
-    db_post = service.create_post_record(post.text, status="PENDING")
+    scheduled_at = to_naive_utc(schedule.scheduled_at)
+    if scheduled_at <= utcnow():
+        raise HTTPException(status_code=400, detail="scheduled_at must be in the future")
+    post = await PostService(db).reschedule(post_id, scheduled_at)
+    if not post:
+        raise HTTPException(status_code=409, detail="Only SCHEDULED or DRAFT posts can be scheduled")
+    post_scheduler.schedule(post.id, post.scheduled_at)
+    return post
 
-    try:
-        media_id = await client.create_text_post(post.text, user_id=user_id)
-        # Update to PUBLISHED
-        return service.mark_published(db_post.id, media_id)
-    except IntegrationError as e:
-        logger.error(f"Threads API Error: {e.message}")
-        return service.mark_failed(db_post.id, e.message)
-    except Exception as e:
-        logger.error(f"Unexpected error publishing post: {e}")
-        return service.mark_failed(db_post.id, str(e))
+@router.delete("/post/{post_id}/schedule", response_model=Post)
+async def unschedule_post(post_id: int, db: Session = Depends(get_db)):
+    """Cancel a scheduled post; it is kept as a DRAFT."""
+    from app.services.post_service import PostService
+    post = await PostService(db).unschedule(post_id)
+    if not post:
+        raise HTTPException(status_code=409, detail="Post is not scheduled")
+    post_scheduler.unschedule(post.id)
+    return post
 
 @router.delete("/post/{media_id}")
 async def delete_post(
@@ -100,22 +236,50 @@ async def delete_post(
         logger.warning(f"Failed to delete from Threads API: {e}")
 
     # Mark deleted in DB
-    result = service.mark_deleted_by_media_id(media_id)
+    result = await service.mark_deleted_by_media_id(media_id)
     if not result:
         raise HTTPException(status_code=404, detail="Post not found locally")
         
     return {"ok": True}
 
-@router.get("/post/{media_id}/replies", response_model=List[dict])
+@router.get("/post/{media_id}/replies", response_model=List[InboxReply])
 async def list_replies(
     media_id: str,
+    response: Response,
+    refresh: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
     client: ThreadsClient = Depends(get_threads_client)
 ):
+    """Replies to a post, newest first, served from the local mirror.
+
+    A post is synced inline the first time it is opened; ``refresh=true`` forces
+    a sync before reading.
+    """
+    if not cursor:
+        try:
+            await ensure_fresh(client, media_id, force=refresh)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
     try:
-        replies = await client.list_replies(media_id)
-        return replies
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        replies, next_cursor = await run_db(db, list_inbox_page, media_id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, next_cursor)
+    return replies
+
+@router.get("/post/{media_id}/replies/stream")
+async def stream_replies(
+    media_id: str,
+    page_size: int = Query(25, ge=1, le=100),
+    max_items: Optional[int] = Query(None, ge=1),
+    by_page: bool = False,
+    client: ThreadsClient = Depends(get_threads_client)
+):
+    """All replies to a post as NDJSON, fetched lazily as the client reads."""
+    pages = client.iter_replies(media_id, page_size=page_size, max_items=max_items)
+    return StreamingResponse(_stream_ndjson(pages, by_page), media_type="application/x-ndjson")
 
 @router.post("/reply")
 async def reply_to_post(
@@ -126,6 +290,8 @@ async def reply_to_post(
 ):
     try:
         media_id = await client.reply(reply.text, reply.parent_media_id, user_id=user_id)
+        # Our reply shows up in the parent's mirror on its next read
+        await run_db(db, mark_stale, reply.parent_media_id)
         
         # Save to DB
         db_reply = ReplyModel(
@@ -134,13 +300,39 @@ async def reply_to_post(
             text=reply.text,
             author=reply.author # Optional context
         )
-        db.add(db_reply)
-        db.commit()
-        db.refresh(db_reply)
-        return db_reply
+        return await save(db, db_reply)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/insights/{media_id}/snapshots", response_model=List[InsightsSchema])
+async def list_snapshots(
+    media_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Stored insights history of a post, newest first."""
+    try:
+        snapshots, next_cursor = await run_db(db, list_snapshots_page, media_id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _set_next_cursor(response, next_cursor)
+    return snapshots
+
+@router.get("/insights/{media_id}/history", response_model=List[RollupSchema])
+async def get_insights_history(
+    media_id: str,
+    granularity: str = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Rolled-up insights history (min/max/last per metric per bucket), oldest first."""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    return await run_db(db, list_rollups, media_id, granularity, since, until)
+
 @router.get("/insights/{media_id}", response_model=InsightsSchema)
 async def get_insights(
     media_id: str,
@@ -149,29 +341,8 @@ async def get_insights(
 ):
     try:
         data = await client.get_insights(media_id)
-        # Parse data which usually looks like list of metric objects
-        # Mocking parsing logic for standard Graph API response structure:
-        # data = [ { "name": "views", "values": [{"value": 123}] }, ... ]
-        
-        snapshot = InsightsSnapshot(threads_media_id=media_id)
-        
-        # Simple flattener (assuming standard structure)
-        for metric in data:
-            if metric.get("name") == "views":
-                snapshot.views = metric["values"][0]["value"]
-            elif metric.get("name") == "likes":
-                snapshot.likes = metric["values"][0]["value"]
-            elif metric.get("name") == "replies":
-                snapshot.replies = metric["values"][0]["value"]
-            elif metric.get("name") == "reposts":
-                snapshot.reposts = metric["values"][0]["value"]
-            elif metric.get("name") == "quotes":
-                snapshot.quotes = metric["values"][0]["value"]
-        
-        db.add(snapshot)
-        db.commit()
-        db.refresh(snapshot)
-        return snapshot
+        snapshot = InsightsSnapshot(**parse_insights(media_id, data))
+        return await save(db, snapshot)
     except Exception as e:
         logger.error(f"Error fetching insights: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 from datetime import datetime
 
 class InsightsSnapshotBase(BaseModel):
@@ -18,3 +19,29 @@ class InsightsSnapshot(InsightsSnapshotBase):
 
     class Config:
         from_attributes = True
+
+class InsightsRollup(BaseModel):
+    threads_media_id: str
+    granularity: str
+    bucket_start: datetime
+    samples: int
+    first_captured_at: Optional[datetime] = None
+    last_captured_at: Optional[datetime] = None
+    views_min: int = 0
+    views_max: int = 0
+    views_last: int = 0
+    likes_min: int = 0
+    likes_max: int = 0
+    likes_last: int = 0
+    replies_min: int = 0
+    replies_max: int = 0
+    replies_last: int = 0
+    reposts_min: int = 0
+    reposts_max: int = 0
+    reposts_last: int = 0
+    quotes_min: int = 0
+    quotes_max: int = 0
+    quotes_last: int = 0
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 class PostBase(BaseModel):
@@ -7,13 +7,21 @@ class PostBase(BaseModel):
     error_message: str | None = None
 
 class PostCreate(PostBase):
-    pass
+    scheduled_at: Optional[datetime] = None # publish later instead of now
+
+class PostBulkCreate(BaseModel):
+    posts: List[PostCreate] = Field(..., min_length=1)
+    concurrency: Optional[int] = Field(None, ge=1, le=50)
+
+class PostSchedule(BaseModel):
+    scheduled_at: datetime
 
 class Post(PostBase):
     id: int
     threads_media_id: Optional[str] = None
     status: str
     error_message: str | None = None
+    scheduled_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
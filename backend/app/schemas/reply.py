@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
@@ -17,3 +17,14 @@ class Reply(ReplyBase):
 
     class Config:
         from_attributes = True
+
+class InboxReply(BaseModel):
+    """A reply to one of our posts, in the Graph API's field names."""
+    id: str = Field(validation_alias="threads_reply_id")
+    text: Optional[str] = None
+    username: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    permalink: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class SearchHit(BaseModel):
+    kind: str # posts, replies (sent), inbox (received)
+    id: int
+    text: Optional[str] = None
+    snippet: str # HTML-escaped, matches wrapped in <mark>
+    score: float # lower ranks first
+    created_at: Optional[datetime] = None
+    status: Optional[str] = None
+    parent_media_id: Optional[str] = None
+    username: Optional[str] = None
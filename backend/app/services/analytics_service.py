@@ -0,0 +1,219 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.timeutils import to_naive_utc, utcnow
+from app.models.insights import InsightsSnapshot
+from app.models.rollup import InsightsRollup, RollupState
+from app.services.insights_service import METRICS
+from app.services.rollup_service import STATE_NAME
+
+SOURCES = ("rollup", "raw")
+SORT_KEYS = ("views", "views_delta", "likes_delta", "engagement_rate", "views_per_hour")
+ENGAGEMENT = [METRICS.index(m) for m in ("likes", "replies", "reposts", "quotes")]
+VIEWS = METRICS.index("views")
+
+@dataclass
+class SeriesBatch:
+    """Insights history of many posts as flat columns sorted by (post, time).
+
+    codes[i] indexes media_ids; t holds epoch seconds; values is (rows, len(METRICS)).
+    """
+    media_ids: np.ndarray
+    codes: np.ndarray
+    t: np.ndarray
+    values: np.ndarray
+
+    @property
+    def starts(self) -> np.ndarray:
+        if not len(self.codes):
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.r_[True, self.codes[1:] != self.codes[:-1]])
+
+    @property
+    def ends(self) -> np.ndarray:
+        starts = self.starts
+        if not len(starts):
+            return starts
+        return np.r_[starts[1:], len(self.codes)] - 1
+
+def build_batch(media_ids: Sequence[str], times: Sequence[datetime], values: np.ndarray) -> SeriesBatch:
+    """Encodes rows that are already ordered by (media id, time)."""
+    unique, codes = np.unique(np.asarray(media_ids, dtype=object), return_inverse=True)
+    # Naive datetimes are UTC throughout the app; datetime64 keeps them that way
+    t = np.array(times, dtype="datetime64[s]").astype(np.int64).astype(np.float64)
+    return SeriesBatch(media_ids=unique, codes=codes.astype(np.int64), t=t, values=np.asarray(values, dtype=np.int64))
+
+def load_batch(
+    db: Session, since: datetime, until: datetime, source: str = "rollup", media_ids: Optional[Sequence[str]] = None
+) -> SeriesBatch:
+    """Loads snapshot or hourly rollup columns for every post in the window in one query."""
+    if source == "rollup":
+        model, ts = InsightsRollup, InsightsRollup.bucket_start
+        columns = [func.coalesce(getattr(InsightsRollup, f"{m}_last"), 0) for m in METRICS]
+        stmt = select(model.threads_media_id, ts, *columns).where(InsightsRollup.granularity == "hour")
+    else:
+        model, ts = InsightsSnapshot, InsightsSnapshot.captured_at
+        columns = [func.coalesce(getattr(InsightsSnapshot, m), 0) for m in METRICS]
+        stmt = select(model.threads_media_id, ts, *columns)
+    stmt = stmt.where(ts >= since).where(ts < until)
+    if media_ids:
+        stmt = stmt.where(model.threads_media_id.in_(media_ids))
+    rows = db.execute(stmt.order_by(model.threads_media_id, ts)).all()
+
+    if not rows:
+        return SeriesBatch(
+            media_ids=np.empty(0, dtype=object), codes=np.empty(0, dtype=np.int64),
+            t=np.empty(0, dtype=np.float64), values=np.empty((0, len(METRICS)), dtype=np.int64),
+        )
+    ids, times, *metric_columns = zip(*rows)
+    return build_batch(ids, times, np.column_stack([np.asarray(c, dtype=np.int64) for c in metric_columns]))
+
+def engagement_rate(values: np.ndarray) -> np.ndarray:
+    """(likes + replies + reposts + quotes) / views per row; 0 where there are no views."""
+    engaged = values[:, ENGAGEMENT].sum(axis=1).astype(np.float64)
+    views = values[:, VIEWS].astype(np.float64)
+    return np.divide(engaged, views, out=np.zeros_like(engaged), where=views > 0)
+
+def post_metrics(batch: SeriesBatch) -> Dict[str, np.ndarray]:
+    """Per-post latest values, deltas over the window, engagement rate and average views/hour."""
+    if not len(batch.codes):
+        empty = np.empty((0, len(METRICS)), dtype=np.int64)
+        return {
+            "media_ids": batch.media_ids, "samples": np.empty(0, dtype=np.int64), "last": empty, "deltas": empty,
+            "engagement_rate": np.empty(0), "views_per_hour": np.empty(0),
+        }
+    starts, ends = batch.starts, batch.ends
+    first, last = batch.values[starts], batch.values[ends]
+    deltas = last - first
+    hours = (batch.t[ends] - batch.t[starts]) / 3600.0
+    views_per_hour = np.divide(
+        deltas[:, VIEWS].astype(np.float64), hours, out=np.zeros(len(starts)), where=hours > 0
+    )
+    return {
+        "media_ids": batch.media_ids[batch.codes[starts]],
+        "samples": ends - starts + 1,
+        "last": last,
+        "deltas": deltas,
+        "engagement_rate": engagement_rate(last),
+        "views_per_hour": views_per_hour,
+    }
+
+def growth_rates(batch: SeriesBatch) -> np.ndarray:
+    """Views per hour between consecutive points of the same post (NaN at each post's first point)."""
+    rates = np.full(len(batch.codes), np.nan)
+    if len(batch.codes) < 2:
+        return rates
+    dv = np.diff(batch.values[:, VIEWS]).astype(np.float64)
+    dt = np.diff(batch.t) / 3600.0
+    same_post = batch.codes[1:] == batch.codes[:-1]
+    valid = same_post & (dt > 0)
+    rates[1:][valid] = dv[valid] / dt[valid]
+    return rates
+
+def top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n highest scores, best first, without a full sort."""
+    if n >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, n)[:n]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def rank_posts(batch: SeriesBatch, sort: str, limit: int) -> List[Dict[str, Any]]:
+    if not len(batch.codes):
+        return []
+    metrics = post_metrics(batch)
+    scores = {
+        "views": metrics["last"][:, VIEWS],
+        "views_delta": metrics["deltas"][:, VIEWS],
+        "likes_delta": metrics["deltas"][:, METRICS.index("likes")],
+        "engagement_rate": metrics["engagement_rate"],
+        "views_per_hour": metrics["views_per_hour"],
+    }[sort].astype(np.float64)
+
+    ranked = []
+    for i in top_n(scores, limit):
+        ranked.append({
+            "media_id": str(metrics["media_ids"][i]),
+            "samples": int(metrics["samples"][i]),
+            "latest": dict(zip(METRICS, metrics["last"][i].tolist())),
+            "delta": dict(zip(METRICS, metrics["deltas"][i].tolist())),
+            "engagement_rate": round(float(metrics["engagement_rate"][i]), 6),
+            "views_per_hour": round(float(metrics["views_per_hour"][i]), 3),
+        })
+    return ranked
+
+def growth_curves(batch: SeriesBatch) -> Dict[str, List[Dict[str, Any]]]:
+    if not len(batch.codes):
+        return {}
+    rates = growth_rates(batch)
+    curves: Dict[str, List[Dict[str, Any]]] = {}
+    for start, end in zip(batch.starts.tolist(), batch.ends.tolist()):
+        media_id = str(batch.media_ids[batch.codes[start]])
+        curves[media_id] = [
+            {
+                "t": str(np.datetime64(int(t), "s")),
+                "views": int(v),
+                "views_per_hour": None if np.isnan(r) else round(float(r), 3),
+            }
+            for t, v, r in zip(
+                batch.t[start:end + 1].tolist(),
+                batch.values[start:end + 1, VIEWS].tolist(),
+                rates[start:end + 1].tolist(),
+            )
+        ]
+    return curves
+
+def default_window(since: Optional[datetime], until: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """The [since, until) window as naive UTC, like the stored timestamps; defaults to the last few days."""
+    until = to_naive_utc(until) if until is not None else utcnow()
+    since = to_naive_utc(since) if since is not None else until - timedelta(days=settings.ANALYTICS_DEFAULT_WINDOW_DAYS)
+    return since, until
+
+def data_version(db: Session) -> Tuple[int, int]:
+    """Changes whenever a snapshot is stored or folded into rollups."""
+    latest = db.scalar(select(func.max(InsightsSnapshot.id))) or 0
+    state = db.get(RollupState, STATE_NAME)
+    db.commit()
+    return latest, state.last_snapshot_id if state else 0
+
+class ResultCache:
+    """Small LRU of computed analytics.
+
+    An entry is reused while the data version it was computed at is current and
+    it is younger than ``ttl`` (open-ended windows drift with the clock).
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[tuple, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, version: tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version and time.monotonic() < entry[1]:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def set(self, key: tuple, version: tuple, value: Any):
+        self._entries[key] = (version, time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+result_cache = ResultCache(settings.ANALYTICS_CACHE_ENTRIES, settings.ANALYTICS_CACHE_TTL_SECONDS)
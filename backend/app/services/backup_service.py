@@ -0,0 +1,301 @@
+"""Online backups of the SQLite database.
+
+The copy is taken while the app keeps running: by default through the sqlite3
+backup API, BACKUP_PAGES_PER_STEP pages at a time with a pause in between, so
+the source is only locked for one step at a time. A write from another
+connection restarts the copy; after BACKUP_MAX_RESTARTS restarts the rest is
+copied in a single step, inside one read transaction (which in WAL mode does
+not block writers). BACKUP_METHOD=vacuum uses VACUUM INTO instead, which
+also compacts the copy.
+
+The copy is checked with PRAGMA integrity_check before it is compressed
+(streamed, chunk by chunk) into BACKUP_DIR under its final name, and older
+backups beyond the retention policy are deleted.
+"""
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.core.timeutils import utcnow
+from app.db.database import IS_SQLITE, SYNC_DATABASE_URL
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("backup", "vacuum")
+COMPRESSIONS = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+INTEGRITY_CHECKS = {"full": "integrity_check", "quick": "quick_check", "off": None}
+CHUNK_SIZE = 1024 * 1024
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Latest backup run, returned by GET /api/jobs/backup/status
+backup_status: Dict[str, Any] = {
+    "state": "idle",
+    "runs": 0,
+    "started_at": None,
+    "finished_at": None,
+    "duration_s": None,
+    "path": None,
+    "database_bytes": None,
+    "backup_bytes": None,
+    "restarts": 0,
+    "pruned": 0,
+    "last_error": None,
+}
+
+class BackupError(Exception):
+    pass
+
+class _TooManyRestarts(Exception):
+    pass
+
+def database_path() -> str:
+    if not IS_SQLITE:
+        raise BackupError("Backups are only supported for SQLite databases")
+    path = make_url(SYNC_DATABASE_URL).database
+    if not path or path == ":memory:":
+        raise BackupError("The database is in memory")
+    return os.path.abspath(path)
+
+def backup_dir() -> str:
+    return os.path.abspath(settings.BACKUP_DIR or os.path.join(os.path.dirname(database_path()), "backups"))
+
+def _name_pattern(db_path: str) -> re.Pattern:
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return re.compile(rf"^{re.escape(stem)}_backup_(\d{{8}}_\d{{6}})(?:_(\d+))?\.db(?:\.gz|\.zst)?$")
+
+def list_backups() -> List[Dict[str, Any]]:
+    """Backups in BACKUP_DIR, newest first."""
+    directory = backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    pattern = _name_pattern(database_path())
+    backups = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            created = datetime.strptime(match.group(1), TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+            path = os.path.join(directory, name)
+            backups.append({"name": name, "path": path, "created_at": created, "bytes": os.path.getsize(path),
+                            "sequence": int(match.group(2) or 0)})
+    backups.sort(key=lambda b: (b["created_at"], b["sequence"]), reverse=True)
+    return backups
+
+def _claim_name(directory: str, stem: str, timestamp: str, suffix: str) -> str:
+    """Reserves the backup's file name: a second backup within the same second gets _1, _2, ..."""
+    sequence = 0
+    while True:
+        name = f"{stem}_backup_{timestamp}{f'_{sequence}' if sequence else ''}.db{suffix}"
+        path = os.path.join(directory, name)
+        try:
+            # O_EXCL: never overwrite, even a backup another process is writing now
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            sequence += 1
+
+def _copy_with_backup_api(source: sqlite3.Connection, target_path: str) -> int:
+    pages = max(1, settings.BACKUP_PAGES_PER_STEP)
+    pause = settings.BACKUP_STEP_PAUSE_MS / 1000
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > settings.BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        if pause and remaining:
+            time.sleep(pause)
+
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        except _TooManyRestarts:
+            logger.info(f"Backup restarted {restarts} times by concurrent writes; copying the rest in one step")
+            source.backup(target, pages=-1)
+    finally:
+        target.close()
+    return restarts
+
+def _copy(db_path: str, target_path: str, method: str) -> int:
+    """Consistent copy of the live database at target_path; returns the number of restarts."""
+    source = sqlite3.connect(db_path, timeout=30)
+    try:
+        if method == "vacuum":
+            source.execute("VACUUM INTO ?", (target_path,))
+            restarts = 0
+        else:
+            restarts = _copy_with_backup_api(source, target_path)
+    finally:
+        source.close()
+    # The copy inherits WAL mode; a rollback journal keeps it a single file (the app's
+    # PRAGMAs switch a restored database back to WAL on first connect)
+    target = sqlite3.connect(target_path)
+    try:
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+    return restarts
+
+def check_integrity(path: str, mode: Optional[str] = None):
+    pragma = INTEGRITY_CHECKS[mode or settings.BACKUP_INTEGRITY_CHECK]
+    if pragma is None:
+        return
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        problems = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+    finally:
+        conn.close()
+    if problems != ["ok"]:
+        raise BackupError(f"{pragma} failed for {path}: {'; '.join(problems[:5])}")
+
+def _compress(source_path: str, target_path: str, compression: str, level: Optional[int]):
+    with open(source_path, "rb") as source, open(target_path, "wb") as raw:
+        if compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level, write_checksum=True)
+            with compressor.stream_writer(raw, size=os.path.getsize(source_path), closefd=False) as out:
+                shutil.copyfileobj(source, out, CHUNK_SIZE)
+        elif compression == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6 if level is None else level) as out:
+                shutil.copyfileobj(source, out, CHUNK_SIZE)
+        else:
+            shutil.copyfileobj(source, raw, CHUNK_SIZE)
+        raw.flush()
+        os.fsync(raw.fileno())
+
+def _decompress(source_path: str, target_path: str):
+    with open(source_path, "rb") as raw, open(target_path, "wb") as out:
+        if source_path.endswith(".zst"):
+            if zstandard is None:
+                raise BackupError("Reading .zst backups needs the zstandard package")
+            with zstandard.ZstdDecompressor().stream_reader(raw) as source:
+                shutil.copyfileobj(source, out, CHUNK_SIZE)
+        elif source_path.endswith(".gz"):
+            with gzip.GzipFile(fileobj=raw, mode="rb") as source:
+                shutil.copyfileobj(source, out, CHUNK_SIZE)
+        else:
+            shutil.copyfileobj(raw, out, CHUNK_SIZE)
+
+def verify_backup(path: str, mode: str = "full"):
+    """Decompresses a backup to a temporary file and runs the integrity check on it."""
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        restored = os.path.join(tmp, "verify.db")
+        try:
+            _decompress(path, restored)
+        except (OSError, EOFError, getattr(zstandard, "ZstdError", OSError)) as e:
+            raise BackupError(f"{path} is not readable: {e}") from e
+        check_integrity(restored, mode)
+
+def prune_backups(keep_last: Optional[int] = None, keep_daily: Optional[int] = None) -> List[str]:
+    """Deletes backups outside the retention policy; returns the deleted paths."""
+    keep_last = settings.BACKUP_KEEP_LAST if keep_last is None else keep_last
+    keep_daily = settings.BACKUP_KEEP_DAILY if keep_daily is None else keep_daily
+    if keep_last <= 0 and keep_daily <= 0:
+        return []
+    backups = list_backups()
+    keep = {b["path"] for b in backups[:keep_last]}
+    days = set()
+    for backup in backups:  # newest first, so the first of each day is that day's newest
+        day = backup["created_at"].date()
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(backup["path"])
+    deleted = []
+    for backup in backups:
+        if backup["path"] not in keep:
+            os.remove(backup["path"])
+            deleted.append(backup["path"])
+    return deleted
+
+_backup_lock = threading.Lock()
+
+def validate(method: str, compression: str) -> str:
+    """Checks the backup can run as configured; returns the database path."""
+    if method not in METHODS:
+        raise BackupError(f"BACKUP_METHOD must be one of {', '.join(METHODS)}")
+    if compression not in COMPRESSIONS:
+        raise BackupError(f"BACKUP_COMPRESSION must be one of {', '.join(COMPRESSIONS)}")
+    if compression == "zstd" and zstandard is None:
+        raise BackupError("BACKUP_COMPRESSION=zstd needs the zstandard package")
+    if settings.BACKUP_INTEGRITY_CHECK not in INTEGRITY_CHECKS:
+        raise BackupError(f"BACKUP_INTEGRITY_CHECK must be one of {', '.join(INTEGRITY_CHECKS)}")
+    db_path = database_path()
+    if not os.path.exists(db_path):
+        raise BackupError(f"Database not found at {db_path}")
+    return db_path
+
+def create_backup(method: Optional[str] = None, compression: Optional[str] = None, prune: bool = True) -> Dict[str, Any]:
+    """Takes one backup; returns (and records in backup_status) what it wrote."""
+    method = method or settings.BACKUP_METHOD
+    compression = compression or settings.BACKUP_COMPRESSION
+    try:
+        db_path = validate(method, compression)
+    except BackupError as e:
+        backup_status.update(state="failed", last_error=str(e))
+        logger.error(f"Backup failed: {e}")
+        raise
+    if not _backup_lock.acquire(blocking=False):
+        # backup_status belongs to the backup that holds the lock; leave it alone
+        logger.warning("Backup not started: another backup is running")
+        raise BackupError("A backup is already running")
+
+    started = time.perf_counter()
+    backup_status.update(state="running", started_at=utcnow(), finished_at=None, duration_s=None, last_error=None)
+    directory = backup_dir()
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    # Work files stay in the backup directory (same filesystem, so the final rename is atomic)
+    work_path = os.path.join(directory, f".{stem}_{timestamp}_{os.getpid()}_{threading.get_ident()}")
+    copy_path = work_path + ".copy"
+    partial_path = work_path + ".partial"
+    final_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        restarts = _copy(db_path, copy_path, method)
+        check_integrity(copy_path)
+        _compress(copy_path, partial_path, compression, settings.BACKUP_COMPRESSION_LEVEL)
+        final_path = _claim_name(directory, stem, timestamp, COMPRESSIONS[compression])
+        os.replace(partial_path, final_path)
+        pruned = prune_backups() if prune else []
+        backup_status.update(
+            state="idle", path=final_path, database_bytes=os.path.getsize(copy_path),
+            backup_bytes=os.path.getsize(final_path), restarts=restarts, pruned=len(pruned),
+        )
+        logger.info(f"Backup written to {final_path} ({backup_status['backup_bytes']} bytes, {len(pruned)} pruned)")
+    except Exception as e:
+        backup_status.update(state="failed", last_error=str(e))
+        logger.error(f"Backup failed: {e}", exc_info=True)
+        raise
+    finally:
+        for path in (copy_path, copy_path + "-journal", copy_path + "-wal", copy_path + "-shm", partial_path):
+            if os.path.exists(path):
+                os.remove(path)
+        backup_status["runs"] += 1
+        backup_status["finished_at"] = utcnow()
+        backup_status["duration_s"] = round(time.perf_counter() - started, 3)
+        _backup_lock.release()
+    return dict(backup_status)
+
+def run_backup_job():
+    """create_backup for a background task: failures are already logged and kept in backup_status."""
+    try:
+        create_backup()
+    except Exception:
+        pass
@@ -0,0 +1,80 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.account import Account, Token
+
+@dataclass(frozen=True)
+class Credential:
+    access_token: str
+    account_id: Optional[int]
+    threads_user_id: Optional[str]
+
+class CredentialCache:
+    """Caches the connected Token/Account pair so routes skip the DB lookup.
+
+    Single user assumption (same as the routers): the first stored token wins.
+    Entries expire after CREDENTIAL_CACHE_TTL_SECONDS and are dropped explicitly
+    whenever the auth callback stores a new token.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._value: Optional[Credential] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, db: Session) -> Optional[Credential]:
+        token = db.query(Token).first()
+        if not token or not token.access_token:
+            return None
+        account = db.query(Account).filter(Account.id == token.account_id).first()
+        credential = Credential(
+            access_token=token.access_token,
+            account_id=token.account_id,
+            threads_user_id=account.threads_user_id if account else None,
+        )
+        # End the read transaction so the pooled connection isn't held while the
+        # request awaits Graph API calls
+        db.commit()
+        return credential
+
+    def get(self, db: Session) -> Optional[Credential]:
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            generation = self._generation
+
+        credential = self._load(db)
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while loading; don't resurrect the old token
+                return credential
+            # "Not connected" is never cached so a fresh login shows up immediately
+            self._value = credential
+            self._expires_at = time.monotonic() + self.ttl_seconds if credential else 0.0
+        return credential
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._expires_at = 0.0
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached": self._value is not None and time.monotonic() < self._expires_at,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+credential_cache = CredentialCache(ttl_seconds=settings.CREDENTIAL_CACHE_TTL_SECONDS)
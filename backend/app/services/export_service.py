@@ -0,0 +1,232 @@
+"""Streaming bulk exports of posts, replies and insights snapshots.
+
+Rows are read as plain column tuples (no ORM objects or Pydantic models) with
+yield_per, EXPORT_BATCH_SIZE at a time: a server-side cursor where the driver
+has one, and SQLite's cursor steps through the table anyway. Each batch is
+encoded and sent before the next is fetched, so memory stays flat however many
+rows match. Rows come in primary-key order, which needs no sort.
+
+Datetimes are stored as naive UTC and exported with an explicit UTC offset.
+"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+from app.core.config import settings
+from app.core.timeutils import to_naive_utc
+from app.db.database import DB_ASYNC, async_engine, engine
+from app.models.insights import InsightsSnapshot
+from app.models.post import Post
+from app.models.reply import Reply
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: NDJSON and CSV only
+    pa = pq = None
+
+# Table and the timestamp the date range applies to
+EXPORTS = {
+    "posts": (Post, Post.created_at),
+    "replies": (Reply, Reply.created_at),
+    "insights": (InsightsSnapshot, InsightsSnapshot.captured_at),
+}
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "parquet": "parquet"}
+
+class ExportError(Exception):
+    pass
+
+def export_statement(kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    model, ts = EXPORTS[kind]
+    stmt = select(*model.__table__.columns)
+    if since is not None:
+        stmt = stmt.where(ts >= to_naive_utc(since))
+    if until is not None:
+        stmt = stmt.where(ts < to_naive_utc(until))
+    return stmt.order_by(model.id).execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+class NDJSONEncoder:
+    def __init__(self, columns: Sequence[Any]):
+        self.keys = [column.key for column in columns]
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence[Tuple]) -> bytes:
+        keys = self.keys
+        option = orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE
+        return b"".join([orjson.dumps(dict(zip(keys, row)), option=option) for row in rows])
+
+    def finish(self) -> bytes:
+        return b""
+
+class CSVEncoder:
+    def __init__(self, columns: Sequence[Any]):
+        self.keys = [column.key for column in columns]
+        self.datetime_indexes = [i for i, column in enumerate(columns) if isinstance(column.type, DateTime)]
+
+    def _write(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode()
+
+    def header(self) -> bytes:
+        return self._write([self.keys])
+
+    def encode(self, rows: Sequence[Tuple]) -> bytes:
+        if self.datetime_indexes:
+            converted = []
+            for row in rows:
+                row = list(row)
+                for i in self.datetime_indexes:
+                    if row[i] is not None:
+                        row[i] = _utc(row[i]).isoformat()
+                converted.append(row)
+            rows = converted
+        return self._write(rows)
+
+    def finish(self) -> bytes:
+        return b""
+
+class _ChunkSink:
+    """Write-only file for ParquetWriter that hands back what was written so far.
+
+    Keeps its own position: the footer records absolute offsets, so tell() must
+    keep counting after the chunks are drained.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    return pa.string()
+
+class ParquetEncoder:
+    """Collects fetched batches until EXPORT_PARQUET_ROW_GROUP_SIZE rows, then writes them as one row group.
+
+    Batches are converted to Arrow as they arrive, so a pending row group is held
+    in columnar buffers rather than as Python tuples.
+    """
+
+    def __init__(self, columns: Sequence[Any]):
+        self.schema = pa.schema([pa.field(column.key, _arrow_type(column)) for column in columns])
+        self.row_group_size = settings.EXPORT_PARQUET_ROW_GROUP_SIZE
+        self.pending: List[Any] = []
+        self.pending_rows = 0
+        self.sink = _ChunkSink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="snappy")
+
+    def _write_row_group(self):
+        table = pa.Table.from_batches(self.pending, schema=self.schema)
+        self.writer.write_table(table, row_group_size=self.pending_rows)
+        self.pending = []
+        self.pending_rows = 0
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence[Tuple]) -> bytes:
+        # Naive datetimes are taken as UTC by the tz-aware timestamp type
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), self.schema)]
+        self.pending.append(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.pending_rows += len(rows)
+        if self.pending_rows >= self.row_group_size:
+            self._write_row_group()
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        if self.pending:
+            self._write_row_group()
+        self.writer.close()
+        return self.sink.drain()
+
+ENCODERS = {"ndjson": NDJSONEncoder, "csv": CSVEncoder, "parquet": ParquetEncoder}
+
+def check_format(fmt: str):
+    if fmt not in ENCODERS:
+        raise ExportError(f"format must be one of {', '.join(ENCODERS)}")
+    if fmt == "parquet" and pa is None:
+        raise ExportError("Parquet export needs the pyarrow package")
+
+def export_filename(kind: str, fmt: str) -> str:
+    return f"{kind}_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.{EXTENSIONS[fmt]}"
+
+def iter_export(kind: str, fmt: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[bytes]:
+    """Encoded chunks of an export, for the sync engine (Starlette runs each step in the threadpool)."""
+    stmt = export_statement(kind, since, until)
+    encoder = ENCODERS[fmt](stmt.selected_columns)
+    header = encoder.header()
+    if header:
+        yield header
+    with engine.connect() as conn:
+        for rows in conn.execute(stmt).partitions():
+            chunk = encoder.encode(rows)
+            if chunk:
+                yield chunk
+    tail = encoder.finish()
+    if tail:
+        yield tail
+
+async def aiter_export(kind: str, fmt: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> AsyncIterator[bytes]:
+    """iter_export for the async engine; encoding runs in the threadpool, off the event loop."""
+    stmt = export_statement(kind, since, until)
+    encoder = ENCODERS[fmt](stmt.selected_columns)
+    header = encoder.header()
+    if header:
+        yield header
+    async with async_engine.connect() as conn:
+        result = await conn.stream(stmt)
+        async for rows in result.partitions():
+            chunk = await run_in_threadpool(encoder.encode, rows)
+            if chunk:
+                yield chunk
+    tail = await run_in_threadpool(encoder.finish)
+    if tail:
+        yield tail
+
+def stream_export(kind: str, fmt: str, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """The chunk iterator matching the engine DATABASE_URL selects."""
+    if DB_ASYNC:
+        return aiter_export(kind, fmt, since, until)
+    return iter_export(kind, fmt, since, until)
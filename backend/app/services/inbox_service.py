@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.timeutils import to_naive_utc, utcnow
+from app.db.database import open_session, run_db
+from app.integrations.rate_limiter import TokenBucket
+from app.integrations.threads_client import ThreadsClient
+from app.models.inbox import InboxReply, ReplySyncState
+from app.models.post import Post
+from app.schemas.reply import InboxReply as InboxReplySchema
+from app.services.credential_service import credential_cache
+from app.services.pagination import apply_keyset, row_dicts, schema_columns, split_page
+
+logger = logging.getLogger(__name__)
+
+SYNC_PAGE_SIZE = 50
+
+# Reply mirror activity, listed in /api/system/stats
+inbox_stats: Dict[str, Any] = {
+    "syncs": 0,
+    "failed": 0,
+    "replies_added": 0,
+    "pages_fetched": 0,
+    "refreshes": 0,
+    "refreshes_skipped": 0,
+    "background_passes": 0,
+    "last_pass_at": None,
+    "last_pass_posts": 0,
+    "last_error": None,
+}
+
+SyncMark = Tuple[Optional[datetime], Optional[datetime]]  # (last_reply_at, last_synced_at)
+
+def parse_reply_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Graph timestamps ("2024-07-05T12:34:56+0000") as naive UTC."""
+    if not value:
+        return None
+    try:
+        # strptime rather than fromisoformat, which rejects "+0000" before Python 3.11
+        return to_naive_utc(datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z"))
+    except ValueError:
+        return None
+
+def load_mark(db: Session, media_id: str) -> Optional[SyncMark]:
+    state = db.get(ReplySyncState, media_id)
+    mark = None
+    if state:
+        # Naive UTC like utcnow(), whether or not the driver returns aware values
+        mark = tuple(to_naive_utc(v) if v else None for v in (state.last_reply_at, state.last_synced_at))
+    db.commit()
+    return mark
+
+def _get_state(db: Session, media_id: str) -> ReplySyncState:
+    state = db.get(ReplySyncState, media_id)
+    if state is None:
+        state = ReplySyncState(media_id=media_id, reply_count=0)
+        db.add(state)
+    return state
+
+def store_replies(db: Session, media_id: str, items: List[Dict[str, Any]], synced_at: datetime) -> int:
+    """Inserts replies not mirrored yet and advances the post's high-water mark."""
+    ids = [item["id"] for item in items if item.get("id")]
+    known = set(db.scalars(select(InboxReply.threads_reply_id).where(InboxReply.threads_reply_id.in_(ids)))) if ids else set()
+    new_rows = []
+    for item in items:
+        reply_id = item.get("id")
+        if not reply_id or reply_id in known:
+            continue
+        known.add(reply_id)
+        new_rows.append(InboxReply(
+            threads_reply_id=reply_id,
+            parent_media_id=media_id,
+            text=item.get("text"),
+            username=item.get("username"),
+            permalink=item.get("permalink"),
+            timestamp=parse_reply_timestamp(item.get("timestamp")),
+        ))
+    # Oldest first, so ids grow with reply time within a post
+    new_rows.sort(key=lambda row: row.timestamp or datetime.min)
+    db.add_all(new_rows)
+
+    state = _get_state(db, media_id)
+    newest = max((row for row in new_rows if row.timestamp), key=lambda row: row.timestamp, default=None)
+    if newest is not None and (state.last_reply_at is None or newest.timestamp >= to_naive_utc(state.last_reply_at)):
+        state.last_reply_at = newest.timestamp
+        state.last_reply_id = newest.threads_reply_id
+    state.reply_count = (state.reply_count or 0) + len(new_rows)
+    state.last_synced_at = synced_at
+    state.last_error = None
+    db.commit()
+    return len(new_rows)
+
+def record_sync_error(db: Session, media_id: str, error: str, synced_at: datetime):
+    # Stamping the attempt keeps a failing post from being retried on every pass
+    state = _get_state(db, media_id)
+    state.last_synced_at = synced_at
+    state.last_error = error[:500]
+    db.commit()
+
+def mark_stale(db: Session, media_id: str):
+    """Makes the next Inbox read of this post sync first (e.g. after we reply to it)."""
+    db.execute(update(ReplySyncState).where(ReplySyncState.media_id == media_id).values(last_synced_at=None))
+    db.commit()
+
+def due_media_ids(db: Session, limit: int, max_age_days: float, post_interval: float) -> List[str]:
+    """Recently published posts whose replies were never synced or not for ``post_interval`` seconds."""
+    now = utcnow()
+    stmt = (
+        select(Post.threads_media_id)
+        .outerjoin(ReplySyncState, ReplySyncState.media_id == Post.threads_media_id)
+        .where(Post.status == "PUBLISHED")
+        .where(Post.threads_media_id.is_not(None))
+        .where(Post.created_at >= now - timedelta(days=max_age_days))
+        .where(or_(
+            ReplySyncState.last_synced_at.is_(None),
+            ReplySyncState.last_synced_at < now - timedelta(seconds=post_interval),
+        ))
+        .order_by(ReplySyncState.last_synced_at.is_not(None), ReplySyncState.last_synced_at)
+        .limit(limit)
+    )
+    media_ids = list(db.scalars(stmt))
+    db.commit()
+    return media_ids
+
+def list_inbox_page(
+    db: Session, media_id: str, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Newest-first page of the mirrored replies to one post."""
+    # The row id is only needed for the cursor; the schema's "id" is the Graph id
+    stmt = select(InboxReply.id, *schema_columns(InboxReply, InboxReplySchema))
+    stmt = stmt.where(InboxReply.parent_media_id == media_id)
+    stmt = apply_keyset(stmt, InboxReply.timestamp, InboxReply.id, cursor, limit)
+    return split_page(row_dicts(db.execute(stmt)), limit, "timestamp")
+
+async def fetch_new_replies(client: ThreadsClient, media_id: str, since: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Replies posted at or after ``since`` (everything, up to INBOX_SYNC_MAX_REPLIES, when None).
+
+    Pages come newest first, so paging stops at the first reply older than the
+    mark. Replies in the mark's own second are fetched again and deduplicated on
+    insert, since several can share a timestamp.
+    """
+    items: List[Dict[str, Any]] = []
+    max_items = settings.INBOX_SYNC_MAX_REPLIES if since is None else None
+    async for page in client.iter_replies(media_id, page_size=SYNC_PAGE_SIZE, max_items=max_items):
+        inbox_stats["pages_fetched"] += 1
+        reached_mark = False
+        for item in page:
+            posted_at = parse_reply_timestamp(item.get("timestamp"))
+            if since is not None and posted_at is not None and posted_at < since:
+                reached_mark = True
+                break
+            items.append(item)
+        if reached_mark:
+            break
+    return items
+
+# One sync per post at a time; entries disappear once nobody holds the lock
+_post_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _post_lock(media_id: str) -> asyncio.Lock:
+    lock = _post_locks.get(media_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _post_locks[media_id] = lock
+    return lock
+
+async def sync_post(client: ThreadsClient, media_id: str) -> int:
+    """Mirrors replies newer than the post's high-water mark; returns how many were added."""
+    async with _post_lock(media_id):
+        async with open_session() as db:
+            mark = await run_db(db, load_mark, media_id)
+        since = mark[0] if mark else None
+        started = utcnow()
+        try:
+            items = await fetch_new_replies(client, media_id, since)
+        except Exception as e:
+            inbox_stats["failed"] += 1
+            inbox_stats["last_error"] = f"{media_id}: {e}"
+            async with open_session() as db:
+                await run_db(db, record_sync_error, media_id, str(e), started)
+            raise
+        async with open_session() as db:
+            added = await run_db(db, store_replies, media_id, items, started)
+        inbox_stats["syncs"] += 1
+        inbox_stats["replies_added"] += added
+        return added
+
+_background_syncs: Set[asyncio.Task] = set()
+
+def _sync_in_background(client: ThreadsClient, media_id: str):
+    async def run():
+        try:
+            await sync_post(client, media_id)
+        except Exception as e:
+            logger.warning(f"Reply sync for {media_id} failed: {e}")
+
+    task = asyncio.create_task(run())
+    _background_syncs.add(task)
+    task.add_done_callback(_background_syncs.discard)
+
+async def ensure_fresh(client: ThreadsClient, media_id: str, force: bool = False) -> bool:
+    """Called before an Inbox read; returns whether the read had to wait for a sync.
+
+    Never-synced (or stale-marked) posts and forced refreshes sync inline; a
+    refresh repeated within INBOX_REFRESH_MIN_SECONDS is served from the DB.
+    Otherwise a post past INBOX_SYNC_POST_INTERVAL_SECONDS is synced in the
+    background and the current rows are served straight away.
+    """
+    async with open_session() as db:
+        mark = await run_db(db, load_mark, media_id)
+    synced_at = mark[1] if mark else None
+    age = (utcnow() - synced_at).total_seconds() if synced_at else None
+
+    if age is None or (force and age >= settings.INBOX_REFRESH_MIN_SECONDS):
+        inbox_stats["refreshes"] += 1
+        try:
+            await sync_post(client, media_id)
+        except Exception:
+            if mark is None:
+                raise  # nothing mirrored to fall back on
+            logger.warning(f"Reply refresh for {media_id} failed; serving mirrored replies", exc_info=True)
+        return True
+    if force:
+        inbox_stats["refreshes_skipped"] += 1
+    elif age >= settings.INBOX_SYNC_POST_INTERVAL_SECONDS and not _post_lock(media_id).locked():
+        _sync_in_background(client, media_id)
+    return False
+
+async def sync_due_posts(client: ThreadsClient, budget: TokenBucket) -> int:
+    """One background pass; each post sync waits for a token from ``budget``."""
+    async with open_session() as db:
+        media_ids = await run_db(
+            db, due_media_ids, settings.INBOX_SYNC_MAX_POSTS,
+            settings.INBOX_SYNC_MAX_AGE_DAYS, settings.INBOX_SYNC_POST_INTERVAL_SECONDS
+        )
+    for media_id in media_ids:
+        await budget.acquire()
+        try:
+            await sync_post(client, media_id)
+        except Exception as e:
+            logger.warning(f"Reply sync for {media_id} failed: {e}")
+    inbox_stats["background_passes"] += 1
+    inbox_stats["last_pass_at"] = utcnow()
+    inbox_stats["last_pass_posts"] = len(media_ids)
+    return len(media_ids)
+
+_budget: Optional[TokenBucket] = None
+
+async def sync_loop():
+    """Background task started in the app lifespan."""
+    global _budget
+    # Its own bucket on top of the client's per-token limits, so background syncs
+    # leave most of the read quota to interactive requests
+    _budget = TokenBucket(settings.INBOX_SYNC_REQUESTS_PER_MINUTE, settings.THREADS_RATE_BURST_SECONDS)
+    while True:
+        try:
+            async with open_session() as db:
+                credential = await run_db(db, credential_cache.get)
+            if credential:
+                await sync_due_posts(ThreadsClient(access_token=credential.access_token), _budget)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            inbox_stats["last_error"] = str(e)
+            logger.error(f"Inbox sync pass failed: {e}", exc_info=True)
+        await asyncio.sleep(settings.INBOX_SYNC_INTERVAL_SECONDS)
+
+def get_inbox_stats() -> Dict[str, Any]:
+    return {
+        "enabled": settings.INBOX_SYNC_ENABLED,
+        **inbox_stats,
+        "syncing": sum(1 for lock in list(_post_locks.values()) if lock.locked()),
+        "budget": _budget.stats() if _budget else None,
+    }
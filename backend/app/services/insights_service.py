@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.timeutils import utcnow
+from app.db.database import open_session, run_db
+from app.integrations.threads_client import ThreadsClient
+from app.models.insights import InsightsSnapshot
+from app.models.post import Post
+from app.services.pagination import apply_keyset, split_page
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("views", "likes", "replies", "reposts", "quotes")
+MAX_REPORTED_ERRORS = 50
+
+def parse_insights(media_id: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Flattens the Graph insights payload into InsightsSnapshot columns.
+
+    data = [ { "name": "views", "values": [{"value": 123}] }, ... ]
+    """
+    row = {"threads_media_id": media_id}
+    for metric in data:
+        name = metric.get("name")
+        if name in METRICS:
+            row[name] = metric["values"][0]["value"]
+    return row
+
+# Status of the latest insights refresh, served by GET /api/jobs/insights/status
+job_status: Dict[str, Any] = {
+    "state": "idle",
+    "started_at": None,
+    "finished_at": None,
+    "duration_s": None,
+    "posts": 0,
+    "succeeded": 0,
+    "failed": 0,
+    "errors": [],
+}
+
+def _recent_published_media_ids(db: Session, limit: int, max_age_days: float) -> List[str]:
+    since = utcnow() - timedelta(days=max_age_days)
+    stmt = (
+        select(Post.threads_media_id)
+        .where(Post.status == "PUBLISHED")
+        .where(Post.threads_media_id.is_not(None))
+        .where(Post.created_at >= since)
+        .order_by(Post.created_at.desc())
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))
+
+def list_snapshots_page(
+    db: Session, media_id: str, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[InsightsSnapshot], Optional[str]]:
+    """Newest-first snapshot history of one post."""
+    stmt = select(InsightsSnapshot).where(InsightsSnapshot.threads_media_id == media_id)
+    stmt = apply_keyset(stmt, InsightsSnapshot.captured_at, InsightsSnapshot.id, cursor, limit)
+    return split_page(db.scalars(stmt).all(), limit, "captured_at")
+
+def _bulk_insert_snapshots(db: Session, rows: List[Dict[str, Any]]):
+    db.execute(insert(InsightsSnapshot), rows)
+    db.commit()
+
+async def refresh_insights(
+    client: ThreadsClient,
+    limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_age_days: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Fetches insights for recently published posts and stores one snapshot each.
+
+    Graph calls run concurrently under a semaphore; the DB is only touched
+    twice (one select, one bulk insert) so no connection is held while waiting
+    on the network.
+    """
+    limit = limit or settings.INSIGHTS_JOB_LIMIT
+    concurrency = concurrency or settings.INSIGHTS_JOB_CONCURRENCY
+    max_age_days = max_age_days or settings.INSIGHTS_JOB_MAX_AGE_DAYS
+
+    started = time.perf_counter()
+    job_status.update(
+        state="running", started_at=utcnow(), finished_at=None, duration_s=None,
+        posts=0, succeeded=0, failed=0, errors=[],
+    )
+    try:
+        async with open_session() as db:
+            media_ids = await run_db(db, _recent_published_media_ids, limit, max_age_days)
+        job_status["posts"] = len(media_ids)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        rows: List[Dict[str, Any]] = []
+
+        async def fetch(media_id: str):
+            async with semaphore:
+                try:
+                    data = await client.get_insights(media_id)
+                    # A malformed payload fails this post only, not the whole job
+                    row = parse_insights(media_id, data)
+                except Exception as e:
+                    job_status["failed"] += 1
+                    if len(job_status["errors"]) < MAX_REPORTED_ERRORS:
+                        job_status["errors"].append({"media_id": media_id, "error": str(e)})
+                    logger.error(f"Failed to update insights for {media_id}: {e}")
+                    return
+            rows.append(row)
+            job_status["succeeded"] += 1
+
+        await asyncio.gather(*(fetch(media_id) for media_id in media_ids))
+
+        if rows:
+            async with open_session() as db:
+                await run_db(db, _bulk_insert_snapshots, rows)
+        job_status["state"] = "completed"
+    except Exception as e:
+        logger.error(f"Insights job failed: {e}", exc_info=True)
+        job_status["state"] = "failed"
+        job_status["errors"].append({"media_id": None, "error": str(e)})
+    finally:
+        job_status["finished_at"] = utcnow()
+        job_status["duration_s"] = round(time.perf_counter() - started, 3)
+    return job_status
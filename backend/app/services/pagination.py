@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import String, tuple_, type_coerce
+from app.db.database import IS_SQLITE
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort_value: datetime, id: int) -> str:
+    """Opaque cursor for the row a page ended on."""
+    raw = json.dumps([sort_value.isoformat() if sort_value else None, id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(sort_value) if sort_value else None), int(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+def _sqlite_datetime(value: datetime) -> str:
+    # CURRENT_TIMESTAMP defaults are stored as "YYYY-MM-DD HH:MM:SS" text; comparing
+    # against the same text keeps ties on the sort column exact and the index usable.
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{text}.{value.microsecond:06d}" if value.microsecond else text
+
+def apply_keyset(stmt, sort_col, id_col, cursor: Optional[str], limit: int):
+    """Newest-first keyset page over (sort_col, id_col).
+
+    Fetches ``limit + 1`` rows so the caller can tell whether a next page exists.
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if sort_value is not None:
+            if IS_SQLITE:
+                sort_expr, bound = type_coerce(sort_col, String), _sqlite_datetime(sort_value)
+            else:
+                sort_expr, bound = sort_col, sort_value
+            # Row-value comparison lets SQLite/Postgres seek the composite index
+            stmt = stmt.where(tuple_(sort_expr, id_col) < tuple_(bound, last_id))
+        else:
+            stmt = stmt.where(id_col < last_id)
+    return stmt.order_by(sort_col.desc(), id_col.desc()).limit(limit + 1)
+
+def split_page(rows: Sequence[Any], limit: int, sort_attr: str) -> Tuple[List[Any], Optional[str]]:
+    """Trims the look-ahead row and builds the cursor for the next page."""
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    last = items[-1]
+    if isinstance(last, dict):
+        return items, encode_cursor(last[sort_attr], last["id"])
+    return items, encode_cursor(getattr(last, sort_attr), last.id)
+
+def schema_columns(model, schema) -> List[Any]:
+    """The columns of ``model`` that ``schema`` reads, for listings loaded as plain rows."""
+    names = {
+        field.validation_alias if isinstance(field.validation_alias, str) else name
+        for name, field in schema.model_fields.items()
+    }
+    return [col for col in model.__table__.columns if col.key in names]
+
+def row_dicts(result) -> List[Dict[str, Any]]:
+    """Rows as plain dicts.
+
+    For list responses: skipping ORM instances (identity map, attribute
+    instrumentation) and validating dicts instead of ``from_attributes`` objects
+    roughly halves the cost of a 1k-item page (see bench/bench_responses.py).
+    """
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
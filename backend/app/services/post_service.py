@@ -1,44 +1,151 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.db.database import run_db
 from app.models.post import Post
-from typing import List, Optional
+from app.schemas.post import Post as PostSchema
+from app.services.pagination import apply_keyset, row_dicts, schema_columns, split_page
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
 
 class PostService:
-    def __init__(self, db: Session):
+    """Post persistence for both sync ``Session`` and ``AsyncSession`` modes."""
+
+    def __init__(self, db: Union[Session, AsyncSession]):
         self.db = db
+        self.is_async = isinstance(db, AsyncSession)
+
+    # Sync sessions run in the threadpool so a blocked pool checkout or a slow
+    # commit never stalls the event loop.
+    async def _scalars(self, stmt):
+        if self.is_async:
+            return (await self.db.scalars(stmt)).all()
+        return await run_in_threadpool(lambda: self.db.scalars(stmt).all())
+
+    async def _row_dicts(self, stmt) -> List[Dict[str, Any]]:
+        if self.is_async:
+            return row_dicts(await self.db.execute(stmt))
+        return await run_in_threadpool(lambda: row_dicts(self.db.execute(stmt)))
+
+    async def _first(self, stmt):
+        if self.is_async:
+            return (await self.db.scalars(stmt)).first()
+        return await run_in_threadpool(lambda: self.db.scalars(stmt).first())
+
+    async def _commit_refresh(self, obj):
+        if self.is_async:
+            await self.db.commit()
+            await self.db.refresh(obj)
+        else:
+            await run_in_threadpool(self._sync_commit_refresh, obj)
+        return obj
 
-    def list_posts(self, limit: int = 10) -> List[Post]:
-        return self.db.query(Post).order_by(Post.created_at.desc()).limit(limit).all()
+    async def _execute_commit(self, stmt) -> int:
+        if self.is_async:
+            result = await self.db.execute(stmt)
+            await self.db.commit()
+            return result.rowcount
+        return await run_in_threadpool(self._sync_execute_commit, stmt)
 
-    def create_post_record(self, text: str, status: str = "PENDING") -> Post:
-        db_post = Post(text=text, status=status)
-        self.db.add(db_post)
+    def _sync_execute_commit(self, stmt) -> int:
+        result = self.db.execute(stmt)
         self.db.commit()
-        self.db.refresh(db_post)
-        return db_post
+        return result.rowcount
+
+    def _sync_commit_refresh(self, obj):
+        self.db.commit()
+        self.db.refresh(obj)
+
+    async def get_post(self, id: int) -> Optional[Post]:
+        return await self._first(select(Post).where(Post.id == id))
+
+    async def list_posts(
+        self, limit: int = 10, cursor: Optional[str] = None, statuses: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first page of posts, as dicts of the response schema's columns,
+        plus the cursor for the next page (None at the end)."""
+        stmt = select(*schema_columns(Post, PostSchema))
+        if statuses:
+            stmt = stmt.where(Post.status.in_(statuses))
+        stmt = apply_keyset(stmt, Post.created_at, Post.id, cursor, limit)
+        return split_page(await self._row_dicts(stmt), limit, "created_at")
 
-    def mark_published(self, id: int, media_id: str) -> Post:
-        post = self.db.query(Post).filter(Post.id == id).first()
+    def _sync_settle(self, session: Session, job_update, id: int, values: Dict[str, Any]) -> bool:
+        # The job update carries the lease condition; the post only changes if it still matched
+        if session.execute(job_update).rowcount != 1:
+            session.rollback()
+            return False
+        session.execute(update(Post).where(Post.id == id).values(**values))
+        session.commit()
+        return True
+
+    async def _settle(self, job_update, id: int, **values) -> Optional[Post]:
+        settled = await run_db(self.db, self._sync_settle, job_update, id, values)
+        return await self._refreshed(id) if settled else None
+
+    async def mark_published(self, id: int, media_id: str, job_update=None) -> Optional[Post]:
+        """Marks the post PUBLISHED.
+
+        With ``job_update`` (an UPDATE of the post's publish job, conditional on
+        its lease) both change in one transaction, and only if that update
+        matched a row; None otherwise.
+        """
+        if job_update is not None:
+            return await self._settle(job_update, id, status="PUBLISHED", threads_media_id=media_id)
+        post = await self.get_post(id)
         if post:
             post.status = "PUBLISHED"
             post.threads_media_id = media_id
-            self.db.commit()
-            self.db.refresh(post)
+            await self._commit_refresh(post)
         return post
 
-    def mark_failed(self, id: int, message: str) -> Post:
-        post = self.db.query(Post).filter(Post.id == id).first()
+    async def mark_failed(self, id: int, message: str, job_update=None) -> Optional[Post]:
+        """Marks the post FAILED; ``job_update`` as for mark_published."""
+        if job_update is not None:
+            return await self._settle(job_update, id, status="FAILED", error_message=message)
+        post = await self.get_post(id)
         if post:
             post.status = "FAILED"
             post.error_message = message
-            self.db.commit()
-            self.db.refresh(post)
+            await self._commit_refresh(post)
         return post
 
-    def mark_deleted_by_media_id(self, media_id: str) -> Optional[Post]:
-        post = self.db.query(Post).filter(Post.threads_media_id == media_id).first()
+    async def mark_deleted_by_media_id(self, media_id: str) -> Optional[Post]:
+        post = await self._first(select(Post).where(Post.threads_media_id == media_id))
         if post:
             post.status = "DELETED"
-            self.db.commit()
-            self.db.refresh(post)
+            await self._commit_refresh(post)
+        return post
+
+    async def reschedule(self, id: int, scheduled_at: datetime) -> Optional[Post]:
+        """Sets a new publish time for a SCHEDULED or DRAFT post; None if it can't be (re)scheduled.
+
+        Conditional on the status so a post the scheduler just released isn't pulled back.
+        """
+        updated = await self._execute_commit(
+            update(Post)
+            .where(Post.id == id)
+            .where(Post.status.in_(("SCHEDULED", "DRAFT")))
+            .values(status="SCHEDULED", scheduled_at=scheduled_at)
+        )
+        return await self._refreshed(id) if updated else None
+
+    async def unschedule(self, id: int) -> Optional[Post]:
+        """Turns a SCHEDULED post back into a DRAFT."""
+        updated = await self._execute_commit(
+            update(Post)
+            .where(Post.id == id)
+            .where(Post.status == "SCHEDULED")
+            .values(status="DRAFT", scheduled_at=None)
+        )
+        return await self._refreshed(id) if updated else None
+
+    async def _refreshed(self, id: int) -> Optional[Post]:
+        post = await self.get_post(id)
+        if post is not None:
+            if self.is_async:
+                await self.db.refresh(post)
+            else:
+                await run_in_threadpool(self.db.refresh, post)
         return post
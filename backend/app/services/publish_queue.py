@@ -0,0 +1,449 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import PUBLISH_JOBS, Gauge
+from app.core.timeutils import utcnow
+from app.db.database import open_session, run_db
+from app.integrations.threads_client import IntegrationError, ThreadsClient
+from app.models.post import Post
+from app.models.publish_job import PublishJob
+from app.services.credential_service import credential_cache
+from app.services.post_service import PostService
+
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+# Worker counters, listed in /api/system/stats
+queue_stats: Dict[str, Any] = {
+    "workers": 0,
+    "in_flight": 0,
+    "enqueued": 0,
+    "claimed": 0,
+    "published": 0,
+    "failed": 0,
+    "retried": 0,
+    "lease_expired": 0,
+    "lease_lost": 0,
+}
+_finished_at: Deque[float] = deque()
+Gauge("publish_jobs_in_flight", "Publish jobs being processed by this process.", lambda: queue_stats["in_flight"])
+_wakeup: Optional[asyncio.Event] = None
+
+@dataclass
+class ClaimedJob:
+    id: int
+    post_id: int
+    text: str
+    post_status: str
+    attempts: int
+    container_id: Optional[str]
+
+class RetryableError(Exception):
+    pass
+
+class LeaseLost(Exception):
+    """The job's lease ran out and another worker claimed it."""
+
+def enqueue_posts(
+    db: Session, items: Sequence[Tuple[str, Optional[datetime]]], hold_seconds: float = 0.0
+) -> List[Tuple[Post, Optional[int]]]:
+    """Stores posts and their publish jobs in one transaction; returns (post, job id) pairs.
+
+    Items with a future ``scheduled_at`` (naive UTC) are stored SCHEDULED
+    without a job; the scheduler creates it when they fall due. Jobs become
+    visible to the workers after ``hold_seconds``, so a caller can publish
+    them itself and the workers only take over what it leaves behind.
+    """
+    now = utcnow()
+    posts = []
+    for text, scheduled_at in items:
+        if scheduled_at is not None and scheduled_at > now:
+            posts.append(Post(text=text, status="SCHEDULED", scheduled_at=scheduled_at))
+        else:
+            posts.append(Post(text=text, status="PENDING"))
+    db.add_all(posts)
+    db.flush()
+
+    available_at = now + timedelta(seconds=hold_seconds)
+    jobs = {
+        post.id: PublishJob(post_id=post.id, status="QUEUED", attempts=0, available_at=available_at)
+        for post in posts if post.status == "PENDING"
+    }
+    db.add_all(jobs.values())
+    db.flush()
+    post_ids = [post.id for post in posts]
+    job_ids = {post_id: job.id for post_id, job in jobs.items()}
+    db.commit()
+    # Reload server defaults (created_at) for the whole batch in one query
+    loaded = {post.id: post for post in db.scalars(select(Post).where(Post.id.in_(post_ids)))}
+    return [(loaded[post_id], job_ids.get(post_id)) for post_id in post_ids]
+
+def enqueue_post(db: Session, text: str, scheduled_at: Optional[datetime] = None) -> Post:
+    """Stores the PENDING (or SCHEDULED) post and its publish job in one transaction."""
+    return enqueue_posts(db, [(text, scheduled_at)])[0][0]
+
+def release_scheduled(db: Session, post_ids: List[int]) -> List[int]:
+    """Moves due SCHEDULED posts to PENDING and queues them; returns the ids released.
+
+    The status condition makes this safe if another process already released a post.
+    """
+    released = db.scalars(
+        update(Post)
+        .where(Post.id.in_(post_ids))
+        .where(Post.status == "SCHEDULED")
+        .values(status="PENDING")
+        .returning(Post.id)
+    ).all()
+    now = utcnow()
+    db.add_all(PublishJob(post_id=post_id, status="QUEUED", attempts=0, available_at=now) for post_id in released)
+    db.commit()
+    return list(released)
+
+def notify_workers(count: int = 1):
+    queue_stats["enqueued"] += count
+    if _wakeup is not None:
+        _wakeup.set()
+
+def _claimable(now):
+    return or_(
+        and_(PublishJob.status == "QUEUED", PublishJob.available_at <= now),
+        # A RUNNING job whose lease ran out belongs to a worker that died or hung
+        and_(PublishJob.status == "RUNNING", PublishJob.lease_expires_at < now),
+    )
+
+def _lease(db: Session, job_id: int, condition, worker_id: str, lease_seconds: float, now) -> Optional[ClaimedJob]:
+    # The conditional UPDATE is the lock: when two claimers race for the same
+    # job only one of them still matches the WHERE clause
+    result = db.execute(
+        update(PublishJob)
+        .where(PublishJob.id == job_id)
+        .where(condition)
+        .values(
+            status="RUNNING",
+            lease_owner=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=PublishJob.attempts + 1,
+        )
+    )
+    if result.rowcount != 1:
+        db.commit()
+        return None
+
+    row = db.execute(
+        select(PublishJob.id, PublishJob.post_id, PublishJob.attempts, PublishJob.container_id, Post.text, Post.status)
+        .join(Post, Post.id == PublishJob.post_id)
+        .where(PublishJob.id == job_id)
+    ).one()
+    db.commit()
+    queue_stats["claimed"] += 1
+    return ClaimedJob(
+        id=row.id, post_id=row.post_id, text=row.text, post_status=row.status,
+        attempts=row.attempts, container_id=row.container_id,
+    )
+
+def claim_job(db: Session, worker_id: str, lease_seconds: float) -> Optional[ClaimedJob]:
+    """Leases the oldest visible job to ``worker_id``."""
+    now = utcnow()
+    candidate = db.execute(
+        select(PublishJob.id, PublishJob.status)
+        .where(_claimable(now))
+        .order_by(PublishJob.available_at, PublishJob.id)
+        .limit(1)
+    ).first()
+    if candidate is None:
+        db.commit()
+        return None
+
+    job = _lease(db, candidate.id, _claimable(now), worker_id, lease_seconds, now)
+    if job is not None and candidate.status == "RUNNING":
+        queue_stats["lease_expired"] += 1
+    return job
+
+def claim_job_by_id(db: Session, job_id: int, worker_id: str, lease_seconds: float) -> Optional[ClaimedJob]:
+    """Leases a specific QUEUED job even before it becomes visible (see ``enqueue_posts``)."""
+    return _lease(db, job_id, PublishJob.status == "QUEUED", worker_id, lease_seconds, utcnow())
+
+def _update_leased(db: Session, job_id: int, worker_id: str, **values) -> bool:
+    # Only the current lease holder may move the job on
+    result = db.execute(
+        update(PublishJob)
+        .where(PublishJob.id == job_id)
+        .where(PublishJob.lease_owner == worker_id)
+        .values(**values)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def renew_lease(db: Session, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+    return _update_leased(db, job_id, worker_id, lease_expires_at=utcnow() + timedelta(seconds=lease_seconds))
+
+def record_container(db: Session, job_id: int, worker_id: str, container_id: str) -> bool:
+    return _update_leased(db, job_id, worker_id, container_id=container_id)
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    return _update_leased(db, job_id, worker_id, status="DONE", lease_owner=None, lease_expires_at=None)
+
+def settle_statement(job_id: int, worker_id: str, **values):
+    """Closes the job, matching only while worker_id holds its lease.
+
+    Passed to PostService.mark_published / mark_failed, which run it in the
+    same transaction as the post's status change.
+    """
+    return (
+        update(PublishJob)
+        .where(PublishJob.id == job_id)
+        .where(PublishJob.lease_owner == worker_id)
+        .values(lease_owner=None, lease_expires_at=None, **values)
+    )
+
+async def settle_published(job_id: int, worker_id: str, post_id: int, media_id: str) -> bool:
+    async with open_session() as db:
+        post = await PostService(db).mark_published(
+            post_id, media_id, job_update=settle_statement(job_id, worker_id, status="DONE")
+        )
+    return post is not None
+
+async def fail_job(job_id: int, worker_id: str, post_id: int, error: str) -> bool:
+    async with open_session() as db:
+        post = await PostService(db).mark_failed(
+            post_id, error, job_update=settle_statement(job_id, worker_id, status="FAILED", last_error=error)
+        )
+    return post is not None
+
+def retry_job(db: Session, job_id: int, worker_id: str, error: str, delay: float) -> bool:
+    return _update_leased(
+        db, job_id, worker_id, status="QUEUED", last_error=error, lease_owner=None, lease_expires_at=None,
+        available_at=utcnow() + timedelta(seconds=delay),
+    )
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter so retried jobs don't hit the API in lockstep."""
+    ceiling = min(settings.PUBLISH_RETRY_MAX_SECONDS, settings.PUBLISH_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+def is_permanent(error: Exception) -> bool:
+    # Client errors other than timeouts and rate limits won't succeed on retry
+    return (
+        isinstance(error, IntegrationError)
+        and 400 <= error.status_code < 500
+        and error.status_code not in (408, 429)
+    )
+
+def queue_depth(db: Session) -> Dict[str, Any]:
+    counts = dict(db.execute(select(PublishJob.status, func.count()).group_by(PublishJob.status)).all())
+    oldest = db.scalar(select(func.min(PublishJob.available_at)).where(PublishJob.status == "QUEUED"))
+    db.commit()
+    return {
+        "queued": counts.get("QUEUED", 0),
+        "running": counts.get("RUNNING", 0),
+        "done": counts.get("DONE", 0),
+        "failed": counts.get("FAILED", 0),
+        "oldest_queued_at": oldest,
+    }
+
+def _record_finished():
+    now = time.monotonic()
+    _finished_at.append(now)
+    while _finished_at and _finished_at[0] < now - THROUGHPUT_WINDOW_SECONDS:
+        _finished_at.popleft()
+
+def get_queue_stats() -> Dict[str, Any]:
+    now = time.monotonic()
+    while _finished_at and _finished_at[0] < now - THROUGHPUT_WINDOW_SECONDS:
+        _finished_at.popleft()
+    return {**queue_stats, "finished_last_minute": len(_finished_at)}
+
+async def _renew(job_id: int, worker_id: str):
+    async with open_session() as db:
+        if not await run_db(db, renew_lease, job_id, worker_id, settings.PUBLISH_LEASE_SECONDS):
+            raise LeaseLost(f"Publish job {job_id} was claimed by another worker")
+
+async def _publish(job: ClaimedJob, worker_id: str) -> str:
+    async with open_session() as db:
+        credential = await run_db(db, credential_cache.get)
+    if not credential or not credential.threads_user_id:
+        raise RetryableError("No connected Threads account")
+    client = ThreadsClient(access_token=credential.access_token)
+    user_id = credential.threads_user_id
+
+    container_id = job.container_id
+    if not container_id:
+        await _renew(job.id, worker_id)
+        container_id = await client.create_text_container(job.text, user_id)
+        async with open_session() as db:
+            if not await run_db(db, record_container, job.id, worker_id, container_id):
+                raise LeaseLost(f"Publish job {job.id} was claimed by another worker")
+    await _renew(job.id, worker_id)
+    return await client.publish_container(container_id, user_id)
+
+async def _publish_leased(job: ClaimedJob, worker_id: str) -> str:
+    """_publish with the lease renewed every third of PUBLISH_LEASE_SECONDS meanwhile.
+
+    Graph calls can wait on the rate limiter and retry backoff for longer than a
+    lease; if a renewal finds the job claimed by another worker, the publish is
+    cancelled before it can post twice.
+    """
+    task = asyncio.ensure_future(_publish(job, worker_id))
+    lost = False
+
+    async def keep_leased():
+        nonlocal lost
+        while True:
+            await asyncio.sleep(settings.PUBLISH_LEASE_SECONDS / 3)
+            try:
+                await _renew(job.id, worker_id)
+            except LeaseLost:
+                lost = True
+                task.cancel()
+                return
+            except Exception as e:
+                logger.warning(f"Renewing the lease on publish job {job.id} failed: {e}")
+
+    keeper = asyncio.ensure_future(keep_leased())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if lost:
+            raise LeaseLost(f"Publish job {job.id} was claimed by another worker")
+        raise
+    finally:
+        keeper.cancel()
+
+async def process_job(job: ClaimedJob, worker_id: str) -> Dict[str, Any]:
+    """Publishes one claimed job and settles it; returns the outcome for the post."""
+    outcome = {"post_id": job.post_id, "status": None, "threads_media_id": None, "error": None}
+    if job.post_status == "PUBLISHED":
+        # Published before a crash, but the job wasn't closed
+        async with open_session() as db:
+            await run_db(db, complete_job, job.id, worker_id)
+        outcome["status"] = "PUBLISHED"
+        return outcome
+
+    try:
+        media_id = await _publish_leased(job, worker_id)
+    except LeaseLost as e:
+        # The new lease holder publishes and settles the post; leave both alone
+        logger.warning(f"Stopped publishing post {job.post_id}: {e}")
+        queue_stats["lease_lost"] += 1
+        outcome.update(status="QUEUED", error=str(e))
+        return outcome
+    except Exception as e:
+        message = e.message if isinstance(e, IntegrationError) else str(e)
+        outcome["error"] = message
+        if is_permanent(e) or job.attempts >= settings.PUBLISH_MAX_ATTEMPTS:
+            logger.error(f"Publishing post {job.post_id} failed after {job.attempts} attempt(s): {message}")
+            if not await fail_job(job.id, worker_id, job.post_id, message):
+                logger.warning(f"Publish job {job.id} was claimed by another worker; not marking post {job.post_id} failed")
+                outcome["status"] = "QUEUED"
+                return outcome
+            queue_stats["failed"] += 1
+            PUBLISH_JOBS.inc("failed")
+            _record_finished()
+            outcome["status"] = "FAILED"
+        else:
+            delay = retry_delay(job.attempts)
+            if isinstance(e, IntegrationError) and e.retry_after:
+                delay = max(delay, e.retry_after)  # e.g. until the circuit breaker half-opens
+            async with open_session() as db:
+                retried = await run_db(db, retry_job, job.id, worker_id, message, delay)
+            if not retried:
+                logger.warning(f"Publish job {job.id} was claimed by another worker; not retrying post {job.post_id}")
+                outcome["status"] = "QUEUED"
+                return outcome
+            logger.warning(f"Publishing post {job.post_id} failed, retrying in {delay:.0f}s: {message}")
+            queue_stats["retried"] += 1
+            PUBLISH_JOBS.inc("retried")
+            outcome["status"] = "RETRYING"
+        return outcome
+
+    if not await settle_published(job.id, worker_id, job.post_id, media_id):
+        # Published by this worker after its lease was lost (renewals failing); the new holder
+        # may publish again, so say so loudly
+        logger.error(f"Post {job.post_id} was published as {media_id} after publish job {job.id} "
+                     f"was claimed by another worker")
+        outcome.update(status="PUBLISHED", threads_media_id=media_id)
+        return outcome
+    queue_stats["published"] += 1
+    PUBLISH_JOBS.inc("published")
+    _record_finished()
+    outcome.update(status="PUBLISHED", threads_media_id=media_id)
+    return outcome
+
+async def publish_jobs(
+    jobs: Sequence[Tuple[int, int]], concurrency: int, owner: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """Publishes (post id, job id) pairs concurrently, yielding outcomes as they finish.
+
+    Jobs are claimed by id as a slot frees up; one the workers have already
+    taken over is reported as QUEUED. If the caller stops iterating, the
+    remaining tasks are cancelled and their jobs left to the workers.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(post_id: int, job_id: int) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                async with open_session() as db:
+                    job = await run_db(db, claim_job_by_id, job_id, owner, settings.PUBLISH_LEASE_SECONDS)
+                if job is None:
+                    return {"post_id": post_id, "status": "QUEUED", "threads_media_id": None, "error": None}
+                queue_stats["in_flight"] += 1
+                try:
+                    return await process_job(job, owner)
+                finally:
+                    queue_stats["in_flight"] -= 1
+            except Exception as e:
+                logger.error(f"Bulk publish of post {post_id} interrupted: {e}", exc_info=True)
+                return {"post_id": post_id, "status": "QUEUED", "threads_media_id": None, "error": str(e)}
+
+    tasks = [asyncio.ensure_future(run(post_id, job_id)) for post_id, job_id in jobs]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def worker_loop(worker_id: str):
+    queue_stats["workers"] += 1
+    try:
+        while True:
+            try:
+                _wakeup.clear()
+                async with open_session() as db:
+                    job = await run_db(db, claim_job, worker_id, settings.PUBLISH_LEASE_SECONDS)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(_wakeup.wait(), settings.PUBLISH_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                queue_stats["in_flight"] += 1
+                try:
+                    await process_job(job, worker_id)
+                finally:
+                    queue_stats["in_flight"] -= 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Publish worker {worker_id} error: {e}", exc_info=True)
+                await asyncio.sleep(settings.PUBLISH_POLL_INTERVAL_SECONDS)
+    finally:
+        queue_stats["workers"] -= 1
+
+def start_workers(count: int) -> List[asyncio.Task]:
+    """Background tasks started in the app lifespan."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    prefix = uuid.uuid4().hex[:8]
+    return [asyncio.create_task(worker_loop(f"{prefix}-{i}")) for i in range(count)]
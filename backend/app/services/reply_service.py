@@ -0,0 +1,16 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.reply import Reply
+from app.schemas.reply import Reply as ReplySchema
+from app.services.pagination import apply_keyset, row_dicts, schema_columns, split_page
+
+def list_replies_page(
+    db: Session, limit: int, cursor: Optional[str] = None, parent_media_id: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Newest-first page of the replies we have sent, optionally for one parent post."""
+    stmt = select(*schema_columns(Reply, ReplySchema))
+    if parent_media_id:
+        stmt = stmt.where(Reply.parent_media_id == parent_media_id)
+    stmt = apply_keyset(stmt, Reply.created_at, Reply.id, cursor, limit)
+    return split_page(row_dicts(db.execute(stmt)), limit, "created_at")
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.timeutils import to_naive_utc, utcnow
+from app.db.database import open_session, run_db
+from app.models.insights import InsightsSnapshot
+from app.models.rollup import InsightsRollup, RollupState
+from app.services.insights_service import METRICS
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("hour", "day")
+STATE_NAME = "insights"
+
+# Outcome of the latest rollup pass, listed in /api/system/stats
+rollup_status: Dict[str, Any] = {
+    "runs": 0,
+    "last_run_at": None,
+    "last_duration_s": None,
+    "last_folded": 0,
+    "last_pruned": 0,
+    "watermark": 0,
+    "last_error": None,
+}
+
+def bucket_start(captured_at: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return captured_at.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return captured_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+def _fold(bucket: InsightsRollup, snapshot: InsightsSnapshot):
+    """Merges one raw snapshot into a bucket (min, max and last value per metric)."""
+    first = not bucket.samples
+    bucket.samples = (bucket.samples or 0) + 1
+    is_latest = first or snapshot.captured_at >= bucket.last_captured_at
+    if first or snapshot.captured_at < bucket.first_captured_at:
+        bucket.first_captured_at = snapshot.captured_at
+    if is_latest:
+        bucket.last_captured_at = snapshot.captured_at
+
+    for metric in METRICS:
+        value = getattr(snapshot, metric) or 0
+        low, high = f"{metric}_min", f"{metric}_max"
+        setattr(bucket, low, value if first else min(getattr(bucket, low), value))
+        setattr(bucket, high, value if first else max(getattr(bucket, high), value))
+        if is_latest:
+            setattr(bucket, f"{metric}_last", value)
+
+def _get_state(db: Session) -> RollupState:
+    state = db.get(RollupState, STATE_NAME)
+    if state is None:
+        state = RollupState(name=STATE_NAME, last_snapshot_id=0)
+        db.add(state)
+        db.flush()
+    return state
+
+def fold_new_snapshots(db: Session, batch_size: int) -> int:
+    """Folds snapshots above the high-water mark into rollups, one batch per transaction."""
+    folded = 0
+    while True:
+        state = _get_state(db)
+        snapshots = db.scalars(
+            select(InsightsSnapshot)
+            .where(InsightsSnapshot.id > state.last_snapshot_id)
+            .where(InsightsSnapshot.captured_at.is_not(None))
+            .order_by(InsightsSnapshot.id)
+            .limit(batch_size)
+        ).all()
+        if not snapshots:
+            db.commit()
+            return folded
+
+        # Load every bucket this batch touches in one query
+        media_ids = {s.threads_media_id for s in snapshots}
+        # Keys are naive UTC: aware values (e.g. from asyncpg) would bucket by the session's time zone
+        earliest = bucket_start(min(to_naive_utc(s.captured_at) for s in snapshots), "day")
+        buckets: Dict[Tuple[str, str, datetime], InsightsRollup] = {
+            (b.threads_media_id, b.granularity, to_naive_utc(b.bucket_start)): b
+            for b in db.scalars(
+                select(InsightsRollup)
+                .where(InsightsRollup.threads_media_id.in_(media_ids))
+                .where(InsightsRollup.bucket_start >= earliest)
+            )
+        }
+
+        for snapshot in snapshots:
+            for granularity in GRANULARITIES:
+                key = (snapshot.threads_media_id, granularity, bucket_start(to_naive_utc(snapshot.captured_at), granularity))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = InsightsRollup(
+                        threads_media_id=key[0], granularity=granularity, bucket_start=key[2], samples=0
+                    )
+                    db.add(bucket)
+                    buckets[key] = bucket
+                _fold(bucket, snapshot)
+
+        state.last_snapshot_id = snapshots[-1].id
+        db.commit()
+        folded += len(snapshots)
+        db.expunge_all()
+        if len(snapshots) < batch_size:
+            return folded
+
+def prune_raw_snapshots(db: Session, retention_days: float) -> int:
+    """Deletes raw snapshots past the retention horizon that are already folded."""
+    if retention_days <= 0:
+        return 0
+    watermark = _get_state(db).last_snapshot_id
+    result = db.execute(
+        delete(InsightsSnapshot)
+        .where(InsightsSnapshot.captured_at < utcnow() - timedelta(days=retention_days))
+        .where(InsightsSnapshot.id <= watermark)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+def run_rollup(db: Session, batch_size: Optional[int] = None, retention_days: Optional[float] = None) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        folded = fold_new_snapshots(db, batch_size or settings.ROLLUP_BATCH_SIZE)
+        pruned = prune_raw_snapshots(
+            db, settings.INSIGHTS_RAW_RETENTION_DAYS if retention_days is None else retention_days
+        )
+        rollup_status.update(last_folded=folded, last_pruned=pruned, last_error=None,
+                             watermark=_get_state(db).last_snapshot_id)
+    except Exception as e:
+        db.rollback()
+        rollup_status["last_error"] = str(e)
+        raise
+    finally:
+        rollup_status["runs"] += 1
+        rollup_status["last_run_at"] = utcnow()
+        rollup_status["last_duration_s"] = round(time.perf_counter() - started, 3)
+    return rollup_status
+
+_rollup_lock = asyncio.Lock()
+
+async def run_rollup_now() -> Dict[str, Any]:
+    """One rollup pass; the lock keeps the background loop and manual runs apart."""
+    async with _rollup_lock:
+        async with open_session() as db:
+            return await run_db(db, run_rollup)
+
+async def rollup_loop(interval: float):
+    """Background task started in the app lifespan."""
+    while True:
+        try:
+            await run_rollup_now()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Insights rollup failed: {e}", exc_info=True)
+        await asyncio.sleep(interval)
+
+def list_rollups(
+    db: Session, media_id: str, granularity: str, since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> List[InsightsRollup]:
+    stmt = (
+        select(InsightsRollup)
+        .where(InsightsRollup.threads_media_id == media_id)
+        .where(InsightsRollup.granularity == granularity)
+    )
+    # Buckets are keyed in naive UTC; an offset would otherwise be truncated as wall-clock time
+    if since is not None:
+        stmt = stmt.where(InsightsRollup.bucket_start >= bucket_start(to_naive_utc(since), granularity))
+    if until is not None:
+        stmt = stmt.where(InsightsRollup.bucket_start < to_naive_utc(until))
+    return list(db.scalars(stmt.order_by(InsightsRollup.bucket_start)))
@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.timeutils import to_naive_utc, utcnow
+from app.db.database import open_session, run_db
+from app.models.post import Post
+from app.services import publish_queue
+
+logger = logging.getLogger(__name__)
+
+def load_scheduled(db: Session) -> List[Tuple[int, datetime]]:
+    rows = db.execute(
+        select(Post.id, Post.scheduled_at)
+        .where(Post.status == "SCHEDULED")
+        .where(Post.scheduled_at.is_not(None))
+        .order_by(Post.scheduled_at)
+    ).all()
+    db.commit()
+    # Drivers for timezone-aware columns (e.g. asyncpg) return aware values; the heap compares with utcnow()
+    return [(row.id, to_naive_utc(row.scheduled_at)) for row in rows]
+
+class PostScheduler:
+    """Releases SCHEDULED posts into the publish queue when they fall due.
+
+    Upcoming posts sit in a min-heap keyed by due time and the loop sleeps
+    until the earliest one (or until the schedule changes), so the table is
+    only read on startup, on ``reload()`` and every SCHEDULER_RESYNC_SECONDS
+    as a safety net for posts scheduled by another process.
+
+    Rescheduling pushes a new heap entry; ``_due`` holds the current time per
+    post and stale heap entries are skipped when popped.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._reload_requested = True
+        self._reloading = False
+        self.released = 0
+        self.reloads = 0
+        self.last_reload_at: Optional[datetime] = None
+
+    def _wake(self):
+        if self._reloading:
+            # The snapshot being loaded may predate this change; load again afterwards
+            self._reload_requested = True
+        if self._changed is not None:
+            self._changed.set()
+
+    def schedule(self, post_id: int, due: datetime):
+        due = to_naive_utc(due)
+        self._due[post_id] = due
+        heapq.heappush(self._heap, (due, post_id))
+        self._wake()
+
+    def unschedule(self, post_id: int):
+        self._due.pop(post_id, None)
+        self._wake()
+
+    def reload(self):
+        """Rebuilds the heap from the DB on the next loop iteration."""
+        self._reload_requested = True
+        self._wake()
+
+    async def _reload(self):
+        self._reload_requested = False
+        self._reloading = True
+        try:
+            async with open_session() as db:
+                scheduled = await run_db(db, load_scheduled)
+        finally:
+            self._reloading = False
+        self._due = dict(scheduled)
+        self._heap = [(due, post_id) for post_id, due in scheduled]
+        heapq.heapify(self._heap)
+        self.reloads += 1
+        self.last_reload_at = utcnow()
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now:
+            due, post_id = heapq.heappop(self._heap)
+            if self._due.get(post_id) == due:
+                del self._due[post_id]
+                due_ids.append(post_id)
+        return due_ids
+
+    def _next_due(self) -> Optional[datetime]:
+        # Drop entries superseded by a reschedule or cancel
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def _release(self, post_ids: List[int]):
+        for start in range(0, len(post_ids), settings.SCHEDULER_RELEASE_BATCH):
+            batch = post_ids[start:start + settings.SCHEDULER_RELEASE_BATCH]
+            async with open_session() as db:
+                released = await run_db(db, publish_queue.release_scheduled, batch)
+            if released:
+                self.released += len(released)
+                publish_queue.notify_workers(len(released))
+
+    async def run(self):
+        """Background task started in the app lifespan."""
+        self._changed = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        next_resync = loop.time()
+        while True:
+            try:
+                if self._reload_requested or loop.time() >= next_resync:
+                    await self._reload()
+                    next_resync = loop.time() + settings.SCHEDULER_RESYNC_SECONDS
+
+                self._changed.clear()
+                due_ids = self._pop_due(utcnow())
+                if due_ids:
+                    await self._release(due_ids)
+                    continue
+
+                next_due = self._next_due()
+                timeout = next_resync - loop.time()
+                if next_due is not None:
+                    timeout = min(timeout, (next_due - utcnow()).total_seconds())
+                try:
+                    await asyncio.wait_for(self._changed.wait(), max(0.0, timeout))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Post scheduler error: {e}", exc_info=True)
+                self._reload_requested = True
+                await asyncio.sleep(settings.PUBLISH_POLL_INTERVAL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheduled": len(self._due),
+            "heap_entries": len(self._heap),
+            "next_due_at": self._next_due(),
+            "released": self.released,
+            "reloads": self.reloads,
+            "last_reload_at": self.last_reload_at,
+        }
+
+post_scheduler = PostScheduler()
@@ -0,0 +1,178 @@
+import base64
+import heapq
+import html
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, Float, Integer, String, column, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.fulltext import SEARCH_SOURCES, TS_CONFIG, TSV_COLUMN, fts_table
+from app.services.pagination import InvalidCursor
+
+KINDS = tuple(SEARCH_SOURCES)  # posts, replies, inbox; also the tie-break order across kinds
+MAX_TERMS = 8
+SNIPPET_TOKENS = 16
+
+# Highlight markers put in by the database, swapped for <mark> after escaping the text
+_OPEN, _CLOSE = "\ue000", "\ue001"
+
+# Per kind: expressions for the common result columns, on source table alias "s"
+_COLUMNS = {
+    "posts": {"created_at": "s.created_at", "status": "s.status", "parent_media_id": "NULL", "username": "NULL"},
+    "replies": {"created_at": "s.created_at", "status": "NULL", "parent_media_id": "s.parent_media_id", "username": "s.author"},
+    "inbox": {"created_at": "s.timestamp", "status": "NULL", "parent_media_id": "s.parent_media_id", "username": "s.username"},
+}
+
+_RESULT_COLUMNS = (
+    column("id", Integer), column("text", String), column("created_at", DateTime(timezone=True)),
+    column("status", String), column("parent_media_id", String), column("username", String),
+    column("snippet", String), column("score", Float),
+)
+
+# Position in the result stream: (score, kind index, id), plus the per-kind rank
+# window floors fixed on the first page so later pages rank the same rows
+SearchCursor = Tuple[float, int, int, List[Optional[int]]]
+
+def search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query)[:MAX_TERMS]
+
+def sqlite_match(terms: Sequence[str]) -> str:
+    # Every term must match; the last one is a prefix so results follow the user's typing
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+def postgres_match(terms: Sequence[str]) -> str:
+    return " & ".join(terms) + ":*"
+
+def encode_search_cursor(score: float, kind: str, id: int, floors: List[Optional[int]]) -> str:
+    raw = json.dumps([score, KINDS.index(kind), id, floors])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str) -> SearchCursor:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, kind_index, id, floors = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not 0 <= int(kind_index) < len(KINDS) or len(floors) != len(KINDS):
+            raise ValueError(kind_index)
+        return float(score), int(kind_index), int(id), [None if f is None else int(f) for f in floors]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+def _after(score_expr: str, id_expr: str, kind_index: int, cursor: Optional[SearchCursor]) -> str:
+    """Keyset condition on (score, kind, id) for one kind's query."""
+    if cursor is None:
+        return ""
+    after_kind = cursor[1]
+    if kind_index > after_kind:
+        return f" AND {score_expr} >= :after_score"
+    if kind_index < after_kind:
+        return f" AND {score_expr} > :after_score"
+    return f" AND ({score_expr}, {id_expr}) > (:after_score, :after_id)"
+
+def _window_floor(db: Session, kind: str, match: str, postgres: bool) -> Optional[int]:
+    """Lowest id among the newest SEARCH_RANK_WINDOW matches, or None when there are fewer."""
+    window = settings.SEARCH_RANK_WINDOW
+    if window <= 0:
+        return None
+    table = SEARCH_SOURCES[kind].name
+    if postgres:
+        newest = (f"SELECT s.id AS id FROM {table} s WHERE s.{TSV_COLUMN} @@ to_tsquery('{TS_CONFIG}', :match) "
+                  f"ORDER BY s.id DESC LIMIT :window")
+    else:
+        # FTS5 walks its doclists in rowid order, so this stops after ``window`` rows
+        fts = fts_table(table)
+        newest = f"SELECT rowid AS id FROM {fts} WHERE {fts} MATCH :match ORDER BY rowid DESC LIMIT :window"
+    count, floor = db.execute(
+        text(f"SELECT count(*), min(id) FROM ({newest}) AS newest"), {"match": match, "window": window}
+    ).one()
+    return floor if count >= window else None
+
+def _sqlite_statement(kind: str, kind_index: int, cursor: Optional[SearchCursor], floor: Optional[int]):
+    table = SEARCH_SOURCES[kind].name
+    fts = fts_table(table)
+    cols = _COLUMNS[kind]
+    window = f" AND {fts}.rowid >= :floor" if floor is not None else ""
+    # bm25() via the hidden rank column: lower is better
+    sql = (
+        f"SELECT s.id AS id, s.text AS text, {cols['created_at']} AS created_at, {cols['status']} AS status, "
+        f"{cols['parent_media_id']} AS parent_media_id, {cols['username']} AS username, "
+        f"snippet({fts}, 0, :open, :close, '…', :tokens) AS snippet, {fts}.rank AS score "
+        f"FROM {fts} JOIN {table} s ON s.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :match{window}{_after(f'{fts}.rank', f'{fts}.rowid', kind_index, cursor)} "
+        f"ORDER BY {fts}.rank, {fts}.rowid LIMIT :limit"
+    )
+    return text(sql).columns(*_RESULT_COLUMNS)
+
+def _postgres_statement(kind: str, kind_index: int, cursor: Optional[SearchCursor], floor: Optional[int]):
+    table = SEARCH_SOURCES[kind].name
+    cols = _COLUMNS[kind]
+    window = " AND s.id >= :floor" if floor is not None else ""
+    # Negated so that, as with bm25, lower scores rank first
+    score = f"(-ts_rank_cd(s.{TSV_COLUMN}, q.query))::float8"
+    sql = (
+        f"SELECT s.id AS id, s.text AS text, {cols['created_at']} AS created_at, {cols['status']} AS status, "
+        f"{cols['parent_media_id']} AS parent_media_id, {cols['username']} AS username, "
+        f"ts_headline('{TS_CONFIG}', coalesce(s.text, ''), q.query, :headline) AS snippet, {score} AS score "
+        f"FROM {table} s, to_tsquery('{TS_CONFIG}', :match) AS q(query) "
+        f"WHERE s.{TSV_COLUMN} @@ q.query{window}{_after(score, 's.id', kind_index, cursor)} "
+        f"ORDER BY {score}, s.id LIMIT :limit"
+    )
+    return text(sql).columns(*_RESULT_COLUMNS)
+
+def _render_snippet(raw: Optional[str]) -> str:
+    return html.escape(raw or "").replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+def search(
+    db: Session, query: str, kinds: Sequence[str], limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Best matches first across ``kinds``, plus the cursor for the next page.
+
+    All terms must match, the last one as a prefix. Ranking is bm25 on SQLite
+    and ts_rank_cd on Postgres; a kind with more than SEARCH_RANK_WINDOW matches
+    only ranks its newest ones. ``snippet`` is HTML-escaped text with the matches
+    wrapped in <mark>.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+    after = decode_search_cursor(cursor) if cursor else None
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if postgres:
+        params = {"match": postgres_match(terms),
+                  "headline": f"StartSel={_OPEN}, StopSel={_CLOSE}, MaxWords={SNIPPET_TOKENS}, MinWords=5"}
+    else:
+        params = {"match": sqlite_match(terms), "open": _OPEN, "close": _CLOSE, "tokens": SNIPPET_TOKENS}
+    params["limit"] = limit + 1
+    if after is not None:
+        params["after_score"], _, params["after_id"], _ = after
+
+    floors: List[Optional[int]] = after[3] if after is not None else [None] * len(KINDS)
+    streams = []
+    for kind in kinds:
+        kind_index = KINDS.index(kind)
+        if after is None:
+            floors[kind_index] = _window_floor(db, kind, params["match"], postgres)
+        floor = floors[kind_index]
+        stmt = (_postgres_statement if postgres else _sqlite_statement)(kind, kind_index, after, floor)
+        rows = db.execute(stmt, {**params, "floor": floor}).all()
+        streams.append([(row.score, kind_index, row.id, kind, row) for row in rows])
+    db.commit()
+
+    # Each kind is already sorted by (score, id), so a k-way merge gives the page
+    merged = list(heapq.merge(*streams, key=lambda hit: hit[:3]))
+    hits = [{
+        "kind": kind,
+        "id": row.id,
+        "text": row.text,
+        "snippet": _render_snippet(row.snippet),
+        "score": score,
+        "created_at": row.created_at,
+        "status": row.status,
+        "parent_media_id": row.parent_media_id,
+        "username": row.username,
+    } for score, _, _, kind, row in merged[:limit]]
+    next_cursor = None
+    if len(merged) > limit:
+        last = hits[-1]
+        next_cursor = encode_search_cursor(last["score"], last["kind"], last["id"], floors)
+    return hits, next_cursor
@@ -0,0 +1,114 @@
+"""Analytics computation: vectorized numpy vs a row-by-row Python loop.
+
+Generates --posts posts with --points hourly samples each (10k x 1k = 10M rows
+by default) directly as arrays, then times ranking every post by views/hour
+and computing per-point growth rates with analytics_service, against the
+equivalent per-row Python implementation on a subset of posts (extrapolated).
+
+    python bench/bench_analytics.py --posts 10000 --points 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from app.services import analytics_service
+from app.services.analytics_service import SeriesBatch, VIEWS
+
+def synthetic_batch(posts: int, points: int, seed: int = 7) -> SeriesBatch:
+    rng = np.random.default_rng(seed)
+    codes = np.repeat(np.arange(posts, dtype=np.int64), points)
+    t = np.tile(np.arange(points, dtype=np.float64) * 3600.0, posts) + 1.7e9
+    # Monotonic counters with per-post growth rates
+    increments = rng.poisson(lam=rng.uniform(1, 50, size=(posts, 1, 1)), size=(posts, points, 5))
+    values = np.cumsum(increments, axis=1).reshape(-1, 5).astype(np.int64)
+    media_ids = np.array([f"media_{i}" for i in range(posts)], dtype=object)
+    return SeriesBatch(media_ids=media_ids, codes=codes, t=t, values=values)
+
+def python_rank(rows, limit: int):
+    """Per-row baseline: group in a dict, then compute views/hour per post."""
+    first, last = {}, {}
+    for media_id, t, views in rows:
+        if media_id not in first:
+            first[media_id] = (t, views)
+        last[media_id] = (t, views)
+    scores = []
+    for media_id, (t0, v0) in first.items():
+        t1, v1 = last[media_id]
+        hours = (t1 - t0) / 3600.0
+        scores.append(((v1 - v0) / hours if hours > 0 else 0.0, media_id))
+    scores.sort(reverse=True)
+    return scores[:limit]
+
+def python_growth(rows):
+    rates, previous = [], None
+    for media_id, t, views in rows:
+        if previous and previous[0] == media_id and t > previous[1]:
+            rates.append((views - previous[2]) / ((t - previous[1]) / 3600.0))
+        else:
+            rates.append(None)
+        previous = (media_id, t, views)
+    return rates
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--points", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--baseline-posts", type=int, default=1_000,
+                        help="Posts timed with the Python loop; the result is scaled to --posts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    batch = synthetic_batch(args.posts, args.points)
+    numpy_rank_ms = timed(lambda: analytics_service.rank_posts(batch, "views_per_hour", args.limit), args.repeat)
+    numpy_growth_ms = timed(lambda: analytics_service.growth_rates(batch), args.repeat)
+
+    subset = min(args.baseline_posts, args.posts) * args.points
+    rows = list(zip(
+        batch.media_ids[batch.codes[:subset]].tolist(),
+        batch.t[:subset].tolist(),
+        batch.values[:subset, VIEWS].tolist(),
+    ))
+    scale = args.posts / min(args.baseline_posts, args.posts)
+    python_rank_ms = timed(lambda: python_rank(rows, args.limit), args.repeat) * scale
+    python_growth_ms = timed(lambda: python_growth(rows), args.repeat) * scale
+
+    # Both implementations must agree on the ranking (ties may be ordered differently)
+    if args.baseline_posts >= args.posts:
+        expected = [round(score, 3) for score, _ in python_rank(rows, args.limit)]
+        got = [p["views_per_hour"] for p in analytics_service.rank_posts(batch, "views_per_hour", args.limit)]
+        assert expected == got, "rankings differ"
+
+    results = {
+        "rows": len(batch.codes),
+        "rank": {"numpy_ms": round(numpy_rank_ms, 1), "python_ms": round(python_rank_ms, 1),
+                 "speedup": round(python_rank_ms / numpy_rank_ms, 1)},
+        "growth": {"numpy_ms": round(numpy_growth_ms, 1), "python_ms": round(python_growth_ms, 1),
+                   "speedup": round(python_growth_ms / numpy_growth_ms, 1)},
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['rows']} rows ({args.posts} posts x {args.points} points)")
+    print(f"{'task':<10}{'numpy ms':>12}{'python ms':>12}{'speedup':>10}")
+    for task in ("rank", "growth"):
+        r = results[task]
+        print(f"{task:<10}{r['numpy_ms']:>12}{r['python_ms']:>12}{r['speedup']:>9}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Tail latency of concurrent POST /api/threads/post, sync vs async DB mode.
+
+Each mode runs in its own interpreter because the engine is chosen from
+DATABASE_URL at import time. The Graph API is replaced by an in-process mock
+with a fixed latency, so the numbers only reflect how much the DB work stalls
+the event loop.
+
+    python bench/bench_async_db.py --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+MODES = {
+    "sync": "sqlite:///{path}",
+    "async": "sqlite+aiosqlite:///{path}",
+}
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_workload(requests: int, concurrency: int, graph_latency: float) -> dict:
+    sys.path.append(BACKEND_DIR)
+    import httpx
+    from app.main import app as api
+    from app.db.database import SessionLocal, engine, Base
+    from app.models.account import Account, Token
+    from app.integrations.threads_client import init_http_client, close_http_client
+    from app.db import base  # noqa: F401  (registers models)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    account = Account(threads_user_id="bench-user", username="bench")
+    db.add(account)
+    db.commit()
+    db.add(Token(account_id=account.id, access_token="bench-token", scopes=""))
+    db.commit()
+    db.close()
+
+    counter = {"n": 0}
+
+    async def graph(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(graph_latency)
+        counter["n"] += 1
+        return httpx.Response(200, json={"id": str(counter["n"])})
+
+    init_http_client(transport=httpx.MockTransport(graph))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://bench") as client:
+        async def publish(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/threads/post", json={"text": f"bench post {i}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(publish(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    await close_http_client()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--graph-latency-ms", type=float, default=50.0)
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: DATABASE_URL is already set by the parent
+        result = asyncio.run(run_workload(args.requests, args.concurrency, args.graph_latency_ms / 1000))
+        print(json.dumps(result))
+        return
+
+    results = {}
+    for mode, template in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL=template.format(path=os.path.join(tmp, "bench.db")))
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode,
+                 "--requests", str(args.requests),
+                 "--concurrency", str(args.concurrency),
+                 "--graph-latency-ms", str(args.graph_latency_ms)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+
+if __name__ == "__main__":
+    main()
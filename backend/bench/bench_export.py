@@ -0,0 +1,146 @@
+"""GET /api/export/insights over a large snapshots table: time and peak memory.
+
+Seeds --rows insights snapshots into a temporary SQLite database, then drives
+the export endpoint once per format, each in its own interpreter so its peak
+RSS is its own. The ASGI app is called directly and the body chunks are
+counted and dropped, the way a client writing to disk would consume them.
+"materialized" is the old way for comparison: every row loaded as an ORM
+object and serialized in one piece.
+
+    python bench/bench_export.py --rows 1000000
+    python bench/bench_export.py --rows 1000000 --mode async --formats ndjson csv
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FORMATS = ("ndjson", "csv", "parquet")
+
+MODES = {
+    "sync": "sqlite:///{path}",
+    "async": "sqlite+aiosqlite:///{path}",
+}
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def seed(path: str, rows: int, posts: int):
+    os.environ["DATABASE_URL"] = MODES["sync"].format(path=path)
+    sys.path.append(BACKEND_DIR)
+    from app.db.database import Base, engine
+    from app.db import base  # noqa: F401  (registers models)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    start = datetime(2026, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO insights_snapshots (threads_media_id, views, likes, replies, reposts, quotes, captured_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((f"1800000{i % posts:010d}", i, i // 10, i // 100, i // 1000, i // 5000,
+          (start + timedelta(seconds=30 * i)).strftime("%Y-%m-%d %H:%M:%S.%f")) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+async def call_export(app, path: str, query: str) -> dict:
+    """Runs one GET through the ASGI app, counting the body instead of keeping it."""
+    received = {"status": None, "bytes": 0, "chunks": 0, "lines": 0}
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    requested = False
+    never = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await never.wait()  # the client stays connected
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            received["bytes"] += len(body)
+            received["chunks"] += 1
+            received["lines"] += body.count(b"\n")
+
+    await app(scope, receive, send)
+    return received
+
+def run_worker(fmt: str) -> dict:
+    sys.path.append(BACKEND_DIR)
+    from app.main import app
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    if fmt == "materialized":
+        import orjson
+        from app.db.database import SessionLocal
+        from app.models.insights import InsightsSnapshot
+        with SessionLocal() as db:
+            snapshots = db.query(InsightsSnapshot).order_by(InsightsSnapshot.id).all()
+            body = orjson.dumps([
+                {column.key: getattr(s, column.key) for column in InsightsSnapshot.__table__.columns} for s in snapshots
+            ])
+        received = {"status": 200, "bytes": len(body), "chunks": 1, "lines": len(snapshots)}
+    else:
+        received = asyncio.run(call_export(app, "/api/export/insights", f"format={fmt}"))
+    elapsed = time.perf_counter() - started
+    return {"format": fmt, "seconds": round(elapsed, 2), "rss_before_mb": round(rss_before, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1), **received}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--posts", type=int, default=2000, help="Distinct media ids the snapshots spread over")
+    parser.add_argument("--mode", choices=list(MODES), default="sync")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS + ("materialized",),
+                        default=list(FORMATS) + ["materialized"])
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.db")
+        started = time.perf_counter()
+        seed(path, args.rows, args.posts)
+        seed_s = time.perf_counter() - started
+        env = dict(os.environ, DATABASE_URL=MODES[args.mode].format(path=path), PUBLISH_WORKERS="0",
+                   SCHEDULER_ENABLED="false", INBOX_SYNC_ENABLED="false", ROLLUP_ENABLED="false")
+        for fmt in args.formats:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", fmt],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "mode": args.mode, "results": results}, indent=2))
+        return
+    print(f"{args.rows} snapshots seeded in {seed_s:.1f} s; {args.mode} DB mode")
+    print(f"{'format':<14}{'seconds':>9}{'rows/s':>11}{'MB out':>9}{'chunks':>8}{'RSS before':>12}{'peak RSS':>10}")
+    for r in results:
+        print(f"{r['format']:<14}{r['seconds']:>9}{args.rows / r['seconds']:>11.0f}{r['bytes'] / 1e6:>9.1f}"
+              f"{r['chunks']:>8}{r['rss_before_mb']:>12}{r['peak_rss_mb']:>10}")
+
+if __name__ == "__main__":
+    main()
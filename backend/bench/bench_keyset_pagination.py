@@ -0,0 +1,116 @@
+"""Page fetch time at increasing depth: keyset cursor vs OFFSET.
+
+Builds a posts table with --rows rows (default one million) spread over a
+year, then times fetching one page at several depths with the same statement
+PostService.list_posts issues, and with the equivalent LIMIT/OFFSET query.
+
+    python bench/bench_keyset_pagination.py --rows 1000000 --page-size 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base, engine_options, install_sqlite_pragmas, sqlite_pragmas
+from app.db import base  # noqa: F401  (registers models)
+from app.models.post import Post
+from app.services.pagination import apply_keyset, encode_cursor
+
+STATUSES = ("PUBLISHED", "PUBLISHED", "PUBLISHED", "FAILED", "DELETED")
+
+def populate(engine, rows: int):
+    start = datetime(2025, 1, 1)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        batch = []
+        for i in range(rows):
+            # Several posts per second so ties on created_at are exercised too
+            created = start + timedelta(seconds=i * 30 // 4)
+            batch.append((f"post {i}", STATUSES[i % len(STATUSES)], created.strftime("%Y-%m-%d %H:%M:%S")))
+            if len(batch) == 50_000:
+                cursor.executemany("INSERT INTO posts (text, status, created_at) VALUES (?, ?, ?)", batch)
+                batch.clear()
+        if batch:
+            cursor.executemany("INSERT INTO posts (text, status, created_at) VALUES (?, ?, ?)", batch)
+        raw.commit()
+        cursor.execute("ANALYZE")
+    finally:
+        raw.close()
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    depths = [d for d in (0, 1_000, 10_000, 100_000, 500_000, args.rows - args.page_size - 1) if d < args.rows]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url, **engine_options(url))
+        install_sqlite_pragmas(engine, sqlite_pragmas("tuned"))
+        Base.metadata.create_all(bind=engine)
+
+        started = time.perf_counter()
+        populate(engine, args.rows)
+        populate_s = time.perf_counter() - started
+
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            for status in (None, "FAILED"):
+                for depth in depths:
+                    base_stmt = select(Post)
+                    if status:
+                        base_stmt = base_stmt.where(Post.status == status)
+                    ordered = base_stmt.order_by(Post.created_at.desc(), Post.id.desc())
+
+                    # Cursor of the row just before the page (not timed)
+                    cursor = None
+                    if depth:
+                        anchor = db.execute(ordered.offset(depth - 1).limit(1)).scalars().first()
+                        if anchor is None:
+                            continue
+                        cursor = encode_cursor(anchor.created_at, anchor.id)
+
+                    keyset_stmt = apply_keyset(base_stmt, Post.created_at, Post.id, cursor, args.page_size)
+                    offset_stmt = ordered.offset(depth).limit(args.page_size + 1)
+                    keyset_ms = timed(lambda: db.execute(keyset_stmt).scalars().all(), args.repeat)
+                    offset_ms = timed(lambda: db.execute(offset_stmt).scalars().all(), args.repeat)
+                    db.expunge_all()
+                    results.append({
+                        "status": status or "any",
+                        "depth": depth,
+                        "keyset_ms": round(keyset_ms, 3),
+                        "offset_ms": round(offset_ms, 3),
+                    })
+        engine.dispose()
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "populate_s": round(populate_s, 1), "pages": results}, indent=2))
+        return
+
+    print(f"{args.rows} rows populated in {populate_s:.1f}s; page size {args.page_size}")
+    print(f"{'status':<10}{'depth':>10}{'keyset ms':>12}{'offset ms':>12}")
+    for r in results:
+        print(f"{r['status']:<10}{r['depth']:>10}{r['keyset_ms']:>12}{r['offset_ms']:>12}")
+
+if __name__ == "__main__":
+    main()
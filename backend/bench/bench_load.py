@@ -0,0 +1,221 @@
+"""Load test of the API against the local Graph API simulator.
+
+Runs the FastAPI app in-process (httpx ASGI transport) on a fresh SQLite
+database with a connected account. Its shared outbound client is pointed at
+bench/graph_simulator.py, so nothing reaches graph.threads.net. Each
+scenario issues --requests operations from --concurrency closed-loop
+callers:
+
+    publish    POST /api/threads/posts/bulk with one post (container + publish)
+    reply      POST /api/threads/reply to a seeded post
+    insights   GET /api/threads/insights/{media_id} (fetch + store a snapshot)
+    dashboard  auth status, /threads/me, /threads/my-posts and /threads/posts,
+               concurrently, timed as one page load
+
+Reports p50/p95/p99/max latency, operations per second and error counts per
+scenario, plus what the simulator saw (calls, 429s, injected 500s).
+--output writes the results with the run's parameters and git revision as
+JSON; --baseline compares p95 and throughput with an earlier --output file.
+
+The app's own outbound rate limiter is off unless --client-rate-limit is
+given, since its default budgets (e.g. 30 publishes a minute) would make it
+the only thing measured.
+
+    python bench/bench_load.py --requests 200 --concurrency 20 --latency-ms 80
+    python bench/bench_load.py --error-rate 0.02 --quota 600 --window 10 --output load.json
+    python bench/bench_load.py --baseline load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(BACKEND_DIR)
+
+SCENARIOS = ("publish", "reply", "insights", "dashboard")
+DASHBOARD_PATHS = ("/api/auth/threads/status", "/api/threads/me", "/api/threads/my-posts", "/api/threads/posts?limit=20")
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def setup_database(media_ids):
+    from app.db.database import Base, SessionLocal, engine
+    from app.db import base  # noqa: F401  (registers models)
+    from app.models.account import Account, Token
+    from app.models.post import Post
+    from graph_simulator import USER_ID, USERNAME
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        account = Account(threads_user_id=USER_ID, username=USERNAME)
+        db.add(account)
+        db.commit()
+        db.add(Token(account_id=account.id, access_token="bench-token", scopes=""))
+        db.add_all([Post(text=f"Seeded post {i}", status="PUBLISHED", threads_media_id=media_id)
+                    for i, media_id in enumerate(media_ids)])
+        db.commit()
+
+async def run_scenario(client, name: str, requests: int, concurrency: int, media_ids, rng) -> dict:
+    latencies, statuses = [], Counter()
+    failures = 0
+    issued = 0
+
+    async def operation(i: int):
+        if name == "publish":
+            response = await client.post("/api/threads/posts/bulk", json={"posts": [{"text": f"Load test post {i}"}]})
+            ok = response.status_code == 200 and response.json()["results"][0]["status"] == "PUBLISHED"
+            return [response.status_code], ok
+        if name == "reply":
+            response = await client.post("/api/threads/reply", json={"text": f"Load test reply {i}",
+                                                                     "parent_media_id": rng.choice(media_ids)})
+            return [response.status_code], response.status_code == 200
+        if name == "insights":
+            response = await client.get(f"/api/threads/insights/{rng.choice(media_ids)}")
+            return [response.status_code], response.status_code == 200
+        responses = await asyncio.gather(*(client.get(path) for path in DASHBOARD_PATHS))
+        codes = [r.status_code for r in responses]
+        return codes, all(code == 200 for code in codes)
+
+    async def caller():
+        nonlocal issued, failures
+        while issued < requests:
+            issued += 1
+            started = time.perf_counter()
+            try:
+                codes, ok = await operation(issued)
+            except Exception as e:  # e.g. a malformed body; counted, not fatal
+                codes, ok = [type(e).__name__], False
+            latencies.append(time.perf_counter() - started)
+            statuses.update(str(code) for code in codes)
+            if not ok:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "failed": failures,
+        "error_rate": round(failures / len(latencies), 4),
+        "statuses": dict(statuses),
+    }
+
+async def run(args) -> dict:
+    import httpx
+    from app.core.config import settings
+    from app.integrations.threads_client import close_http_client, init_http_client
+    from app.main import app as api
+    from graph_simulator import GraphSimulator, SimulatorConfig
+
+    settings.THREADS_RATE_LIMIT_ENABLED = args.client_rate_limit
+    simulator = GraphSimulator(SimulatorConfig(args.latency_ms, args.jitter, args.error_rate, args.quota, args.window,
+                                               seed=args.seed))
+    media_ids = simulator.seed(args.seed_posts, args.replies_per_post)
+    setup_database(media_ids)
+    init_http_client(transport=httpx.ASGITransport(app=simulator.app))
+    rng = random.Random(args.seed)
+
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://bench",
+                                     timeout=120) as client:
+            for name in args.scenario:
+                simulator.reset_stats()
+                result = await run_scenario(client, name, args.requests, args.concurrency, media_ids, rng)
+                result["graph"] = dict(simulator.stats)
+                results.append(result)
+    finally:
+        await close_http_client()
+    return {
+        "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": {key: getattr(args, key) for key in (
+            "requests", "concurrency", "latency_ms", "jitter", "error_rate", "quota", "window",
+            "seed_posts", "replies_per_post", "client_rate_limit", "seed")},
+        "results": results,
+    }
+
+def compare(report: dict, baseline: dict):
+    before = {r["scenario"]: r for r in baseline["results"]}
+    print(f"\nvs baseline {baseline.get('git_revision') or '?'} ({baseline.get('run_at')})")
+    print(f"{'scenario':<10}{'p95 ms':>18}{'rps':>18}")
+    for r in report["results"]:
+        old = before.get(r["scenario"])
+        if old is None:
+            continue
+        p95 = f"{old['p95_ms']} -> {r['p95_ms']}"
+        rps = f"{old['rps']} -> {r['rps']}"
+        print(f"{r['scenario']:<10}{p95:>18}{rps:>18}  ({(r['p95_ms'] / old['p95_ms'] - 1) * 100:+.0f}% p95, "
+              f"{(r['rps'] / old['rps'] - 1) * 100:+.0f}% rps)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Median simulated Graph API latency")
+    parser.add_argument("--jitter", type=float, default=0.35, help="Sigma of the log-normal latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of Graph calls answered with a 500")
+    parser.add_argument("--quota", type=int, default=0, help="Graph calls per --window before 429s, 0 for no limit")
+    parser.add_argument("--window", type=float, default=60.0)
+    parser.add_argument("--seed-posts", type=int, default=50)
+    parser.add_argument("--replies-per-post", type=int, default=20)
+    parser.add_argument("--client-rate-limit", action="store_true", help="Keep the app's outbound rate limiter on")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare with")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the app is imported: the engine is built from DATABASE_URL
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.requests} operations per scenario at concurrency {args.concurrency}; "
+              f"Graph latency {args.latency_ms:g} ms, error rate {args.error_rate:g}, quota {args.quota or 'none'}")
+        print(f"{'scenario':<10}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'failed':>8}"
+              f"{'graph':>7}{'429':>6}{'500':>6}")
+        for r in report["results"]:
+            g = r["graph"]
+            print(f"{r['scenario']:<10}{r['rps']:>8}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}"
+                  f"{r['failed']:>8}{g['requests']:>7}{g['throttled']:>6}{g['errors']:>6}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Hot-path cost of the /metrics instrumentation.
+
+Times the primitives (Histogram.observe, Counter.inc, route_template) and
+then the same small app twice through httpx's ASGI transport: a route that
+reads one row through a pooled session, once plain and once with
+MetricsMiddleware and instrument_engine. The difference per request is
+what the instrumentation adds. Also reports how long a scrape takes to
+render once the histograms hold --series label sets.
+
+    python bench/bench_metrics.py --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.core.metrics import Counter, Histogram, MetricsMiddleware, instrument_engine, render_metrics, route_template
+from app.db.database import engine_options
+
+def per_call_ns(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e9
+
+def build_app(db_url: str, instrumented: bool) -> FastAPI:
+    engine = create_engine(db_url, **engine_options(db_url))
+    if instrumented:
+        instrument_engine(engine)
+    Session = sessionmaker(bind=engine)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Included with a prefix, like the app's routers
+    router = APIRouter(prefix="/items")
+
+    @router.get("/{item_id}")
+    def read_item(item_id: int, db=Depends(get_db)):
+        return {"id": item_id, "value": db.execute(text("SELECT value FROM items WHERE id = :id"), {"id": item_id}).scalar()}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.state.item_route = router.routes[0]
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+async def drive(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(50):  # warm-up
+            await client.get(f"/api/items/{i % 100}")
+        started = time.perf_counter()
+        for i in range(requests):
+            response = await client.get(f"/api/items/{i % 100}")
+            assert response.status_code == 200
+        return (time.perf_counter() - started) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=200_000, help="Calls per primitive timing")
+    parser.add_argument("--series", type=int, default=200, help="Label sets per histogram for the render timing")
+    parser.add_argument("--rounds", type=int, default=3, help="Alternating plain/instrumented runs; the best of each is kept")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = Counter("bench_total", "bench", ("outcome",))
+    routed_scope = {"path": "/api/items/42", "route": build_app("sqlite://", False).state.item_route}
+    assert route_template(routed_scope) == "/api/items/{item_id}"
+    primitives = {
+        "histogram_observe_ns": per_call_ns(lambda: histogram.observe(0.0123, "GET", "/api/items/{item_id}", "200"), args.calls),
+        "counter_inc_ns": per_call_ns(lambda: counter.inc("published"), args.calls),
+        "route_template_ns": per_call_ns(lambda: route_template(routed_scope), args.calls),
+    }
+
+    for i in range(args.series):
+        histogram.observe(i / 1000, "GET", f"/api/route_{i}", "200")
+    started = time.perf_counter()
+    body = render_metrics()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        setup = create_engine(db_url)
+        with setup.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)"))
+            conn.execute(text("INSERT INTO items (id, value) VALUES (:id, :value)"),
+                         [{"id": i, "value": f"item {i}"} for i in range(100)])
+        setup.dispose()
+        plain_app, instrumented_app = build_app(db_url, False), build_app(db_url, True)
+        plain_us = instrumented_us = float("inf")
+        for _ in range(args.rounds):
+            plain_us = min(plain_us, asyncio.run(drive(plain_app, args.requests)))
+            instrumented_us = min(instrumented_us, asyncio.run(drive(instrumented_app, args.requests)))
+
+    result = {
+        **{key: round(value, 1) for key, value in primitives.items()},
+        "render_ms": round(render_ms, 2),
+        "render_bytes": len(body),
+        "request_plain_us": round(plain_us, 1),
+        "request_instrumented_us": round(instrumented_us, 1),
+        "overhead_us": round(instrumented_us - plain_us, 1),
+        "overhead_pct": round((instrumented_us - plain_us) / plain_us * 100, 2),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"histogram.observe   {result['histogram_observe_ns']:8.0f} ns")
+    print(f"counter.inc         {result['counter_inc_ns']:8.0f} ns")
+    print(f"route_template      {result['route_template_ns']:8.0f} ns")
+    print(f"render ({args.series} series) {result['render_ms']:6.2f} ms, {result['render_bytes']} bytes")
+    print(f"request, plain        {result['request_plain_us']:8.1f} us")
+    print(f"request, instrumented {result['request_instrumented_us']:8.1f} us  "
+          f"(+{result['overhead_us']:.1f} us, {result['overhead_pct']:+.1f}%)")
+
+if __name__ == "__main__":
+    main()
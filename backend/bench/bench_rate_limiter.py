@@ -0,0 +1,114 @@
+"""Throughput under a Graph API quota: token-bucket limiter vs none.
+
+A mock Graph API allows --quota calls per minute, enforced over a sliding
+--window (shorter than a minute keeps the run short at the same rate),
+reports usage of that window in x-app-usage and answers 429 (Retry-After: 1)
+once it is spent. --workers callers each keep issuing reads through
+ThreadsClient for --seconds; a caller that gets a 429 sleeps for the
+Retry-After and tries again. Reports successes, 429s and the spread of
+per-second throughput (steady = low stddev).
+
+    python bench/bench_rate_limiter.py --quota 600 --window 10 --workers 20 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from app.core.config import settings
+from app.integrations import rate_limiter as rate_limiter_module
+from app.integrations.response_cache import set_response_cache
+from app.integrations.threads_client import IntegrationError, ThreadsClient, close_http_client, init_http_client
+
+class QuotaServer:
+    def __init__(self, quota_per_minute: int, window: float):
+        self.window = window
+        self.quota = max(1, round(quota_per_minute * window / 60))
+        self.calls = deque()
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        now = time.monotonic()
+        while self.calls and self.calls[0] < now - self.window:
+            self.calls.popleft()
+        usage = {"call_count": min(100, round(100 * len(self.calls) / self.quota)), "total_time": 1, "total_cputime": 1}
+        headers = {"x-app-usage": json.dumps(usage)}
+        if len(self.calls) >= self.quota:
+            headers["retry-after"] = "1"
+            return httpx.Response(429, json={"error": {"message": "rate limited", "code": 4}}, headers=headers)
+        self.calls.append(now)
+        return httpx.Response(200, json={"id": "1"}, headers=headers)
+
+async def run(limited: bool, quota: int, window: float, workers: int, seconds: float):
+    settings.THREADS_RATE_LIMIT_ENABLED = limited
+    settings.THREADS_RATE_READ_PER_MINUTE = quota
+    rate_limiter_module._rate_limiter = rate_limiter_module.RateLimiter()
+    set_response_cache(None)
+    server = QuotaServer(quota, window)
+    init_http_client(transport=httpx.MockTransport(server.handler))
+    client = ThreadsClient(access_token="bench")
+    successes, throttled = [], 0
+    started = time.monotonic()
+
+    async def worker(i: int):
+        nonlocal throttled
+        n = 0
+        while time.monotonic() - started < seconds:
+            n += 1
+            try:
+                # Distinct params so single-flight coalescing doesn't merge the calls
+                await client._request("GET", "/v1.0/me", params={"worker": i, "n": n})
+                successes.append(time.monotonic() - started)
+            except IntegrationError as e:
+                if e.status_code != 429:
+                    raise
+                throttled += 1
+                await asyncio.sleep(1)
+
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    await close_http_client()
+
+    per_second = [0] * int(seconds)
+    for t in successes:
+        if int(t) < len(per_second):
+            per_second[int(t)] += 1
+    return {
+        "limiter": limited,
+        "successes": len(successes),
+        "throttled_429": throttled,
+        "per_second_mean": round(statistics.mean(per_second), 2),
+        "per_second_stdev": round(statistics.pstdev(per_second), 2),
+        "per_second_max": max(per_second),
+        # After the first window, i.e. once the initial burst is spent
+        "steady_stdev": round(statistics.pstdev(per_second[int(window):]), 2),
+        "per_second": per_second,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quota", type=int, default=600, help="Calls allowed per minute")
+    parser.add_argument("--window", type=float, default=10.0, help="Seconds the server enforces the quota over")
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run(limited, args.quota, args.window, args.workers, args.seconds)) for limited in (False, True)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"quota {args.quota}/min over {args.window:.0f}s windows, {args.workers} workers, {args.seconds:.0f}s")
+    print(f"{'limiter':<10}{'ok':>8}{'429s':>8}{'ok/s':>8}{'stdev':>8}{'steady':>8}{'max/s':>8}")
+    for r in results:
+        print(f"{('on' if r['limiter'] else 'off'):<10}{r['successes']:>8}{r['throttled_429']:>8}"
+              f"{r['per_second_mean']:>8}{r['per_second_stdev']:>8}{r['steady_stdev']:>8}{r['per_second_max']:>8}")
+
+if __name__ == "__main__":
+    main()
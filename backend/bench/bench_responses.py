@@ -0,0 +1,170 @@
+"""Payload size and serialization time of 1k-item list responses.
+
+For each listing (posts, sent replies, Inbox replies) times the old path,
+ORM instances validated with ``from_attributes`` and dumped by Pydantic, next
+to the current one: the schema's columns loaded as plain dicts, then
+validated and dumped. The Graph-shaped /my-posts payload is timed through
+jsonable_encoder + json.dumps (JSONResponse) and FastJSONResponse. Each JSON
+body is then compressed with Starlette's default gzip level 9, with
+COMPRESSION_GZIP_LEVEL and, when the brotli package is installed, with
+COMPRESSION_BROTLI_QUALITY.
+
+    python bench/bench_responses.py --items 1000
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.db.database import Base, engine_options
+from app.db import base  # noqa: F401  (registers models)
+from app.models.inbox import InboxReply
+from app.models.post import Post
+from app.models.reply import Reply
+from app.schemas.post import Post as PostSchema
+from app.schemas.reply import InboxReply as InboxReplySchema, Reply as ReplySchema
+from app.services.inbox_service import list_inbox_page
+from app.services.pagination import apply_keyset, row_dicts, schema_columns
+from app.services.reply_service import list_replies_page
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MEDIA_ID = "17900000000000001"
+WORDS = "launching the new release today with a few notes on what changed and why".split()
+
+def sentence(i: int) -> str:
+    return " ".join(WORDS[(i + k) % len(WORDS)] for k in range(8 + i % 17)) + f" #{i}"
+
+def populate(db, items: int):
+    start = datetime(2026, 1, 1)
+    for i in range(items):
+        at = start + timedelta(minutes=i)
+        db.add(Post(text=sentence(i), status="PUBLISHED", threads_media_id=str(18000000000000000 + i), created_at=at))
+        db.add(Reply(text=sentence(i + 1), parent_media_id=MEDIA_ID, author=f"user{i % 97}",
+                     threads_reply_id=str(18100000000000000 + i), created_at=at))
+        db.add(InboxReply(threads_reply_id=str(18200000000000000 + i), parent_media_id=MEDIA_ID, text=sentence(i + 2),
+                          username=f"user{i % 89}", permalink=f"https://www.threads.net/@user{i % 89}/post/C{i:08d}",
+                          timestamp=at))
+    db.commit()
+
+def graph_posts(items: int) -> List[dict]:
+    # /me/threads items as the Graph API returns them
+    start = datetime(2026, 1, 1)
+    return [{
+        "id": str(18000000000000000 + i),
+        "media_product_type": "THREADS",
+        "media_type": "TEXT_POST",
+        "permalink": f"https://www.threads.net/@me/post/C{i:08d}",
+        "username": "me",
+        "text": sentence(i),
+        "timestamp": (start + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S+0000"),
+        "shortcode": f"C{i:08d}",
+        "is_quote_post": False,
+    } for i in range(items)]
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+def compression(body: bytes, repeat: int) -> dict:
+    result = {"json_bytes": len(body)}
+    codecs = {
+        "gzip_9": lambda: gzip.compress(body, compresslevel=9),
+        f"gzip_{settings.COMPRESSION_GZIP_LEVEL}": lambda: gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL),
+    }
+    if brotli is not None:
+        codecs[f"br_{settings.COMPRESSION_BROTLI_QUALITY}"] = lambda: brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    for name, compress in codecs.items():
+        ms, compressed = timed(compress, repeat)
+        result[f"{name}_bytes"] = len(compressed)
+        result[f"{name}_ms"] = round(ms, 2)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url, **engine_options(url))
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            populate(db, args.items)
+
+        # The statements the listing endpoints issued before and issue now
+        listings = {
+            "posts": (
+                PostSchema,
+                lambda db: db.scalars(apply_keyset(select(Post), Post.created_at, Post.id, None, args.items)).all(),
+                lambda db: row_dicts(db.execute(apply_keyset(
+                    select(*schema_columns(Post, PostSchema)), Post.created_at, Post.id, None, args.items))),
+            ),
+            "replies": (
+                ReplySchema,
+                lambda db: db.scalars(apply_keyset(select(Reply), Reply.created_at, Reply.id, None, args.items)).all(),
+                lambda db: list_replies_page(db, args.items)[0],
+            ),
+            "inbox": (
+                InboxReplySchema,
+                lambda db: db.scalars(apply_keyset(select(InboxReply).where(InboxReply.parent_media_id == MEDIA_ID),
+                                                   InboxReply.timestamp, InboxReply.id, None, args.items)).all(),
+                lambda db: list_inbox_page(db, MEDIA_ID, args.items)[0],
+            ),
+        }
+        for name, (schema, orm_rows, dict_rows) in listings.items():
+            adapter = TypeAdapter(List[schema])
+            with Session() as db:
+                def orm_path():
+                    db.expunge_all()  # each request starts with an empty session
+                    return adapter.dump_json(adapter.validate_python(orm_rows(db), from_attributes=True))
+                orm_ms, orm_body = timed(orm_path, args.repeat)
+                dict_ms, dict_body = timed(lambda: adapter.dump_json(adapter.validate_python(dict_rows(db))), args.repeat)
+            assert orm_body == dict_body, f"{name}: payloads differ"
+            results.append({"endpoint": name, "items": args.items, "before_ms": round(orm_ms, 2),
+                            "after_ms": round(dict_ms, 2), **compression(dict_body, args.repeat)})
+
+        items = graph_posts(args.items)
+        encoder_ms, encoder_body = timed(lambda: json.dumps(jsonable_encoder(items), ensure_ascii=False,
+                                                            separators=(",", ":")).encode(), args.repeat)
+        fast_ms, fast_body = timed(lambda: FastJSONResponse(items).body, args.repeat)
+        assert json.loads(encoder_body) == json.loads(fast_body), "my-posts: payloads differ"
+        results.append({"endpoint": "my-posts", "items": args.items, "before_ms": round(encoder_ms, 2),
+                        "after_ms": round(fast_ms, 2), **compression(fast_body, args.repeat)})
+
+    if args.json:
+        print(json.dumps({"brotli": brotli is not None, "results": results}, indent=2))
+        return
+    codecs = [key[:-6] for key in results[0] if key.endswith("_bytes") and key != "json_bytes"]
+    print(f"{args.items} items per response; serialization best of {args.repeat} in ms, sizes in bytes")
+    print(f"{'endpoint':<10} {'before':>8} {'after':>8} {'json':>9}" + "".join(f" {c:>16}" for c in codecs))
+    for r in results:
+        sizes = "".join(f" {r[c + '_bytes']:>8} {r[c + '_ms']:>5.1f}ms" for c in codecs)
+        print(f"{r['endpoint']:<10} {r['before_ms']:>8.2f} {r['after_ms']:>8.2f} {r['json_bytes']:>9}{sizes}")
+
+if __name__ == "__main__":
+    main()
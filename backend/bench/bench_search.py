@@ -0,0 +1,139 @@
+"""Search latency: FTS5 with bm25 ranking vs a LIKE '%term%' scan.
+
+Builds a posts table with --rows rows of random text drawn from a Zipf-like
+vocabulary (indexed by the triggers create_all installs), then times the
+first page and a deeper keyset page of search_service.search for rare,
+common and prefix queries, with and without the SEARCH_RANK_WINDOW cap, next
+to the LIKE query it replaces.
+
+    python bench/bench_search.py --rows 1000000
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base, engine_options, install_sqlite_pragmas, sqlite_pragmas
+from app.db import base  # noqa: F401  (registers models and search index DDL)
+from app.core.config import settings
+from app.services.search_service import search, search_terms, sqlite_match
+
+VOCABULARY = 20_000
+WORDS_PER_POST = (8, 30)
+QUERIES = {
+    "rare": "w19000",
+    "common": "w3",
+    "two_terms": "w10 w20",
+    "prefix": "w123",
+}
+
+def populate(engine, rows: int, seed: int):
+    rng = random.Random(seed)
+    # Word i is drawn with weight ~1/i, so low ids are frequent and high ids rare
+    words = [f"w{i}" for i in range(1, VOCABULARY + 1)]
+    cum_weights = list(itertools.accumulate(1 / i for i in range(1, VOCABULARY + 1)))
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        batch = []
+        for _ in range(rows):
+            body = " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(*WORDS_PER_POST)))
+            batch.append((body, "PUBLISHED"))
+            if len(batch) == 50_000:
+                cursor.executemany("INSERT INTO posts (text, status) VALUES (?, ?)", batch)
+                batch.clear()
+        if batch:
+            cursor.executemany("INSERT INTO posts (text, status) VALUES (?, ?)", batch)
+        raw.commit()
+        cursor.execute("INSERT INTO posts_fts(posts_fts) VALUES ('optimize')")
+        raw.commit()
+    finally:
+        raw.close()
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Keyset page timed after the first one")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    window_setting = settings.SEARCH_RANK_WINDOW
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url, **engine_options(url))
+        install_sqlite_pragmas(engine, sqlite_pragmas("tuned"))
+        Base.metadata.create_all(bind=engine)
+
+        started = time.perf_counter()
+        populate(engine, args.rows, args.seed)
+        populate_s = time.perf_counter() - started
+
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            for name, query in QUERIES.items():
+                terms = search_terms(query)
+                matches = db.execute(
+                    text("SELECT count(*) FROM posts_fts WHERE posts_fts MATCH :q"), {"q": sqlite_match(terms)}
+                ).scalar()
+                result = {"query": name, "q": query, "matches": matches}
+                for window in (window_setting, 0):
+                    settings.SEARCH_RANK_WINDOW = window
+                    label = f"window_{window}" if window else "rank_all"
+                    first_ms, (hits, cursor) = timed(lambda: search(db, query, ("posts",), args.page_size), args.repeat)
+                    for _ in range(args.pages - 2):
+                        if cursor is None:
+                            break
+                        hits, cursor = search(db, query, ("posts",), args.page_size, cursor)
+                    deep_ms = None
+                    if cursor is not None:
+                        deep_ms, _ = timed(lambda: search(db, query, ("posts",), args.page_size, cursor), args.repeat)
+                    result[f"{label}_first_page_ms"] = round(first_ms, 2)
+                    result[f"{label}_page_{args.pages}_ms"] = round(deep_ms, 2) if deep_ms is not None else None
+
+                like_sql = " AND ".join(f"text LIKE :t{i}" for i in range(len(terms)))
+                like_params = {f"t{i}": f"%{t}%" for i, t in enumerate(terms)}
+                result["like_first_page_ms"] = round(timed(lambda: db.execute(
+                    text(f"SELECT id, text FROM posts WHERE {like_sql} ORDER BY id DESC LIMIT :limit"),
+                    {**like_params, "limit": args.page_size},
+                ).all(), args.repeat)[0], 2)
+                result["like_full_scan_ms"] = round(timed(lambda: db.execute(
+                    text(f"SELECT count(*) FROM posts WHERE {like_sql}"), like_params
+                ).scalar(), 1)[0], 2)
+                results.append(result)
+            settings.SEARCH_RANK_WINDOW = window_setting
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "populate_s": round(populate_s, 1), "rank_window": window_setting,
+                          "results": results}, indent=2))
+        return
+    print(f"{args.rows} posts, populated and indexed in {populate_s:.1f}s; first page / page {args.pages} in ms")
+    print(f"{'query':<10} {'q':<10} {'matches':>8}  {'window ' + str(window_setting):>17}  {'rank all':>17}  {'like':>8} {'like scan':>9}")
+    fmt = lambda v: f"{v:.1f}" if v is not None else "-"
+    for r in results:
+        windowed = f"{fmt(r[f'window_{window_setting}_first_page_ms'])} / {fmt(r[f'window_{window_setting}_page_{args.pages}_ms'])}"
+        ranked = f"{fmt(r['rank_all_first_page_ms'])} / {fmt(r[f'rank_all_page_{args.pages}_ms'])}"
+        print(f"{r['query']:<10} {r['q']:<10} {r['matches']:>8}  {windowed:>17}  {ranked:>17}  "
+              f"{r['like_first_page_ms']:>8.1f} {r['like_full_scan_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Write throughput of the SQLite connection profiles.
+
+Writer threads reproduce the create_post pattern (insert a PENDING post, then
+mark it PUBLISHED in a second transaction) while reader threads list recent
+posts. Each profile gets a fresh database file.
+
+    python bench/bench_sqlite_profiles.py --writers 8 --readers 4 --seconds 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base, engine_options, install_sqlite_pragmas, sqlite_pragmas
+from app.db import base  # noqa: F401  (registers models)
+from app.models.post import Post
+
+PROFILES = ("default", "tuned")
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url, **engine_options(url))
+        install_sqlite_pragmas(engine, sqlite_pragmas(profile))
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        totals = {"commits": 0, "reads": 0, "locked": 0, "commit_time": 0.0}
+
+        def writer(worker: int):
+            i = 0
+            while not stop.is_set():
+                i += 1
+                try:
+                    with Session() as db:
+                        started = time.perf_counter()
+                        post = Post(text=f"writer {worker} post {i}", status="PENDING")
+                        db.add(post)
+                        db.commit()
+                        post.status = "PUBLISHED"
+                        post.threads_media_id = f"{worker}-{i}"
+                        db.commit()
+                        elapsed = time.perf_counter() - started
+                    with lock:
+                        totals["commits"] += 2
+                        totals["commit_time"] += elapsed
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    with lock:
+                        totals["locked"] += 1
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    with Session() as db:
+                        db.scalars(select(Post).order_by(Post.created_at.desc()).limit(20)).all()
+                    with lock:
+                        totals["reads"] += 1
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    with lock:
+                        totals["locked"] += 1
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    publishes = totals["commits"] // 2
+    return {
+        "profile": profile,
+        "pragmas": sqlite_pragmas(profile),
+        "commits_per_s": round(totals["commits"] / seconds, 1),
+        "publishes_per_s": round(publishes / seconds, 1),
+        "reads_per_s": round(totals["reads"] / seconds, 1),
+        "avg_publish_ms": round(totals["commit_time"] / publishes * 1000, 2) if publishes else None,
+        "locked_errors": totals["locked"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = [run_profile(p, args.writers, args.readers, args.seconds) for p in PROFILES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'profile':<10}{'commits/s':>12}{'publish/s':>12}{'reads/s':>10}{'avg ms':>10}{'locked':>8}")
+    for r in results:
+        print(f"{r['profile']:<10}{r['commits_per_s']:>12}{r['publishes_per_s']:>12}"
+              f"{r['reads_per_s']:>10}{r['avg_publish_ms']:>10}{r['locked_errors']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Local simulator of the Threads Graph API endpoints ThreadsClient uses.
+
+Serves /me, /{user}/threads (list and create container), /{user}/threads_publish,
+/{media}/replies and /{media}/insights, with or without a /v1.0 prefix, from
+memory. Latency (log-normal around a median), the share of transient 500s
+and a per-window call quota answered with 429 + Retry-After are configurable;
+usage of the quota is reported in x-app-usage like the real API.
+
+In-process (what bench_load.py does):
+
+    init_http_client(transport=httpx.ASGITransport(app=GraphSimulator(config).app))
+
+Standalone, for a backend started with THREADS_GRAPH_BASE=http://127.0.0.1:8900:
+
+    python bench/graph_simulator.py --port 8900 --latency-ms 80 --error-rate 0.01 --quota 600
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+USER_ID = "17841400000000000"
+USERNAME = "sim_user"
+FIRST_MEDIA_ID = 18000000000000000
+
+@dataclass
+class SimulatorConfig:
+    latency_ms: float = 80.0  # median response time
+    jitter: float = 0.35  # sigma of the log-normal latency; 0 for a fixed latency
+    error_rate: float = 0.0  # share of requests answered with a transient 500
+    quota: int = 0  # calls allowed per quota window, 0 for no limit
+    window_seconds: float = 60.0
+    seed: int = 1
+
+@dataclass
+class Media:
+    id: str
+    text: str
+    timestamp: datetime
+    reply_to: Optional[str] = None
+    username: str = USERNAME
+    replies: List[str] = field(default_factory=list)
+
+def _graph_error(status: int, message: str, code: int, headers: Optional[Dict[str, str]] = None, **extra) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": "OAuthException", "code": code, **extra}},
+                        status_code=status, headers=headers)
+
+def _encode_after(index: int) -> str:
+    return base64.urlsafe_b64encode(str(index).encode()).decode()
+
+def _decode_after(value: Optional[str]) -> int:
+    if not value:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(value.encode()).decode())
+    except ValueError:
+        return 0
+
+class GraphSimulator:
+    def __init__(self, config: SimulatorConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.media: Dict[str, Media] = {}
+        self.user_media: List[str] = []  # oldest first
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self._next_id = FIRST_MEDIA_ID
+        self._calls: Deque[float] = deque()
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+        routes = []
+        for prefix in ("", "/v1.0"):
+            routes += [
+                Route(prefix + "/me", self.me, methods=["GET"]),
+                Route(prefix + "/{user_id}/threads", self.list_threads, methods=["GET"]),
+                Route(prefix + "/{user_id}/threads", self.create_container, methods=["POST"]),
+                Route(prefix + "/{user_id}/threads_publish", self.publish, methods=["POST"]),
+                Route(prefix + "/{media_id}/replies", self.replies, methods=["GET"]),
+                Route(prefix + "/{media_id}/insights", self.insights, methods=["GET"]),
+            ]
+        self.app = Starlette(routes=routes)
+        self.app.add_middleware(_Gate, simulator=self)
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0, "published": 0}
+
+    def _new_id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+
+    def seed(self, posts: int, replies_per_post: int = 0) -> List[str]:
+        """Pre-publishes ``posts`` posts (spread over the last days) and returns their ids."""
+        now = datetime.now(timezone.utc)
+        ids = []
+        for i in range(posts):
+            media = Media(self._new_id(), f"Seeded post {i}", now - timedelta(minutes=(posts - i) * 7))
+            self.media[media.id] = media
+            self.user_media.append(media.id)
+            ids.append(media.id)
+            for j in range(replies_per_post):
+                reply = Media(self._new_id(), f"Reply {j} to post {i}", media.timestamp + timedelta(minutes=j + 1),
+                              media.id, username=f"user{j % 97}")
+                self.media[reply.id] = reply
+                media.replies.append(reply.id)
+        return ids
+
+    # --- gatekeeping: quota, injected errors, latency ---
+
+    def usage_percent(self, now: float) -> int:
+        while self._calls and self._calls[0] < now - self.config.window_seconds:
+            self._calls.popleft()
+        if not self.config.quota:
+            return 0
+        return min(100, round(100 * len(self._calls) / self.config.quota))
+
+    def latency(self) -> float:
+        median = self.config.latency_ms / 1000
+        if self.config.jitter <= 0:
+            return median
+        return self.random.lognormvariate(math.log(median), self.config.jitter) if median > 0 else 0.0
+
+    # --- endpoints ---
+
+    async def me(self, request: Request) -> JSONResponse:
+        return JSONResponse({"id": USER_ID, "username": USERNAME, "name": "Simulated User",
+                             "threads_profile_picture_url": None, "threads_biography": ""})
+
+    def _page(self, request: Request, ids: List[str], render) -> JSONResponse:
+        limit = max(1, min(100, int(request.query_params.get("limit", 25))))
+        start = _decode_after(request.query_params.get("after"))
+        page = ids[start:start + limit]
+        body: Dict[str, Any] = {"data": [render(self.media[i]) for i in page]}
+        if page:
+            paging: Dict[str, Any] = {"cursors": {"before": _encode_after(start), "after": _encode_after(start + len(page))}}
+            if start + len(page) < len(ids):
+                paging["next"] = str(request.url.include_query_params(after=_encode_after(start + len(page))))
+            body["paging"] = paging
+        return JSONResponse(body)
+
+    def _render(self, media: Media) -> Dict[str, Any]:
+        return {
+            "id": media.id,
+            "media_product_type": "THREADS",
+            "media_type": "TEXT_POST",
+            "shortcode": f"C{int(media.id) % 10**8:08d}",
+            "text": media.text,
+            "timestamp": media.timestamp.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+            "username": media.username,
+            "permalink": f"https://www.threads.net/@{media.username}/post/C{int(media.id) % 10**8:08d}",
+        }
+
+    async def list_threads(self, request: Request) -> JSONResponse:
+        return self._page(request, self.user_media[::-1], self._render)
+
+    async def _body(self, request: Request) -> Dict[str, Any]:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return await request.json()
+        return dict(await request.form()) or dict(request.query_params)
+
+    async def create_container(self, request: Request) -> JSONResponse:
+        body = await self._body(request)
+        if not body.get("text"):
+            return _graph_error(400, "The parameter text is required", 100)
+        reply_to = body.get("reply_to_id")
+        if reply_to and reply_to not in self.media:
+            return _graph_error(400, "Invalid reply_to_id", 100)
+        container_id = self._new_id()
+        self.containers[container_id] = {"text": body["text"], "reply_to": reply_to}
+        return JSONResponse({"id": container_id})
+
+    async def publish(self, request: Request) -> JSONResponse:
+        body = await self._body(request)
+        container = self.containers.pop(str(body.get("creation_id")), None)
+        if container is None:
+            return _graph_error(400, "Invalid creation_id", 100)
+        media = Media(self._new_id(), container["text"], datetime.now(timezone.utc), container["reply_to"])
+        self.media[media.id] = media
+        if media.reply_to:
+            self.media[media.reply_to].replies.append(media.id)
+        else:
+            self.user_media.append(media.id)
+        self.stats["published"] += 1
+        return JSONResponse({"id": media.id})
+
+    async def replies(self, request: Request) -> JSONResponse:
+        media = self.media.get(request.path_params["media_id"])
+        if media is None:
+            return _graph_error(400, "Unsupported get request", 100)
+        ids = media.replies[::-1] if request.query_params.get("reverse", "true") == "true" else list(media.replies)
+        return self._page(request, ids, self._render)
+
+    async def insights(self, request: Request) -> JSONResponse:
+        media = self.media.get(request.path_params["media_id"])
+        if media is None:
+            return _graph_error(400, "Unsupported get request", 100)
+        # Counts grow with the post's age so successive snapshots differ
+        age = max(1, int((datetime.now(timezone.utc) - media.timestamp).total_seconds()))
+        base = int(media.id) % 1000
+        values = {"views": base * 10 + age, "likes": base + age // 60, "replies": len(media.replies),
+                  "reposts": base // 10 + age // 3600, "quotes": base // 50}
+        metrics = [name for name in request.query_params.get("metric", ",".join(values)).split(",") if name in values]
+        return JSONResponse({"data": [
+            {"name": name, "period": "lifetime", "values": [{"value": values[name]}], "id": f"{media.id}/insights/{name}/lifetime"}
+            for name in metrics
+        ]})
+
+class _Gate:
+    """ASGI middleware applying the simulator's latency, quota and injected failures."""
+
+    def __init__(self, app, simulator: GraphSimulator):
+        self.app = app
+        self.simulator = simulator
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sim = self.simulator
+        sim.stats["requests"] += 1
+        await asyncio.sleep(sim.latency())
+
+        now = time.monotonic()
+        usage = sim.usage_percent(now)
+        headers = {"x-app-usage": json.dumps({"call_count": usage, "total_time": usage, "total_cputime": usage})}
+        config = sim.config
+        if config.quota and len(sim._calls) >= config.quota:
+            sim.stats["throttled"] += 1
+            retry_after = max(1, math.ceil(sim._calls[0] + config.window_seconds - now))
+            headers["retry-after"] = str(retry_after)
+            response = _graph_error(429, "Application request limit reached", 4, headers, is_transient=True)
+        elif not any(k == b"authorization" for k, _ in scope["headers"]):
+            response = _graph_error(400, "An active access token must be used", 2500)
+        elif config.error_rate and sim.random.random() < config.error_rate:
+            sim.stats["errors"] += 1
+            response = _graph_error(500, "An unexpected error has occurred. Please retry your request later.", 2,
+                                    headers, is_transient=True)
+        else:
+            sim._calls.append(now)
+            sim.stats["ok"] += 1
+
+            async def send_with_usage(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (name.encode(), value.encode()) for name, value in headers.items()
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_usage)
+            return
+        await response(scope, receive, send)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter", type=float, default=0.35)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, default=0, help="Calls per --window, 0 for no limit")
+    parser.add_argument("--window", type=float, default=60.0)
+    parser.add_argument("--seed-posts", type=int, default=50)
+    parser.add_argument("--replies-per-post", type=int, default=20)
+    args = parser.parse_args()
+
+    import uvicorn
+    simulator = GraphSimulator(SimulatorConfig(args.latency_ms, args.jitter, args.error_rate, args.quota, args.window))
+    simulator.seed(args.seed_posts, args.replies_per_post)
+    print(f"Simulated Graph API for user {USER_ID} on http://{args.host}:{args.port}")
+    uvicorn.run(simulator.app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,47 @@
-import shutil
+"""Online backup of the SQLite database named by DATABASE_URL, safe to run
+while the app is serving. Settings come from BACKUP_* (see app/core/config.py);
+the options below override them for one run.
+
+    python scripts/backup_db.py
+    python scripts/backup_db.py --method vacuum --compression zstd
+    python scripts/backup_db.py --list
+    python scripts/backup_db.py --verify ../storage/backups/app_backup_20260101_030000.db.gz
+"""
+import argparse
 import os
-import datetime
+import sys
 
-# Configuration
-# Assuming script is run from backend root or similar, but let's make it robust
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # MedSos root
-DB_PATH = os.path.join(BASE_DIR, "storage", "app.db")
-BACKUP_DIR = os.path.join(BASE_DIR, "storage", "backups")
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-def backup_db():
-    if not os.path.exists(DB_PATH):
-        print(f"Database not found at {DB_PATH}")
-        return
+from app.services import backup_service
+from app.services.backup_service import BackupError
 
-    if not os.path.exists(BACKUP_DIR):
-        os.makedirs(BACKUP_DIR)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--method", choices=backup_service.METHODS)
+    parser.add_argument("--compression", choices=list(backup_service.COMPRESSIONS))
+    parser.add_argument("--no-prune", action="store_true", help="Keep every older backup this time")
+    parser.add_argument("--list", action="store_true", help="List existing backups and exit")
+    parser.add_argument("--verify", metavar="BACKUP", help="Decompress a backup and run PRAGMA integrity_check on it")
+    args = parser.parse_args()
 
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = os.path.join(BACKUP_DIR, f"app_backup_{timestamp}.db")
-    
     try:
-        shutil.copy2(DB_PATH, backup_file)
-        print(f"Backup created successfully: {backup_file}")
-    except Exception as e:
-        print(f"Error creating backup: {e}")
+        if args.list:
+            for backup in backup_service.list_backups():
+                print(f"{backup['name']}  {backup['bytes']:>12} bytes")
+            return
+        if args.verify:
+            backup_service.verify_backup(args.verify)
+            print(f"{args.verify}: ok")
+            return
+        result = backup_service.create_backup(args.method, args.compression, prune=not args.no_prune)
+    except BackupError as e:
+        print(f"Backup failed: {e}")
+        sys.exit(1)
+    print(f"Backup created successfully: {result['path']}")
+    print(f"  {result['database_bytes']} bytes -> {result['backup_bytes']} bytes in {result['duration_s']} s, "
+          f"{result['restarts']} restarts, {result['pruned']} old backups pruned")
 
 if __name__ == "__main__":
-    backup_db()
+    main()
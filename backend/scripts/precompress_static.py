@@ -0,0 +1,53 @@
+"""Writes .gz (and .br, when the brotli package is installed) next to each
+compressible file of the built frontend, for the app to serve as-is.
+
+    python scripts/precompress_static.py app/static
+"""
+import argparse
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml", ".ico", ".wasm", ".webmanifest"}
+MIN_SIZE = 1024  # smaller files gain nothing after headers
+MIN_SAVING = 0.9  # keep a variant only if it is at most 90% of the original
+
+def precompress(static_dir: str) -> int:
+    written = 0
+    for root, _, names in os.walk(static_dir):
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < MIN_SIZE:
+                continue
+            variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                if len(compressed) > len(data) * MIN_SAVING:
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
+                written += 1
+                print(f"{path}{suffix}: {len(data)} -> {len(compressed)} bytes")
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("static_dir", nargs="?", default=os.path.join(os.path.dirname(__file__), "..", "app", "static"))
+    args = parser.parse_args()
+    if not os.path.isdir(args.static_dir):
+        print(f"Static directory not found at {args.static_dir}")
+        return
+    written = precompress(args.static_dir)
+    print(f"{written} precompressed files written" + ("" if brotli else " (brotli not installed: gzip only)"))
+
+if __name__ == "__main__":
+    main()
@@ -49,7 +49,7 @@ export default function Compose() {
         setLoading(true);
         try {
             await createPost(text);
-            setToast({ message: "Post published successfully!", type: "success" });
+            setToast({ message: "Post queued for publishing.", type: "success" });
             setText('');
             fetchPosts(); // Refresh list
         } catch (error) {
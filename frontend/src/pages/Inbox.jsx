@@ -27,12 +27,12 @@ export default function Inbox() {
         }
     };
 
-    const handlePostClick = async (postId) => {
+    const handlePostClick = async (postId, refresh = false) => {
         setSelectedPostId(postId);
         setRepliesLoading(true);
         setReplies([]);
         try {
-            const res = await api.get(`/threads/post/${postId}/replies`);
+            const res = await api.get(`/threads/post/${postId}/replies`, { params: refresh ? { refresh: true } : {} });
             setReplies(res.data);
         } catch (error) {
             console.error(error);
@@ -91,10 +91,15 @@ export default function Inbox() {
 
             {/* Replies View */}
             <Card className="flex flex-col h-full">
-                <CardHeader>
+                <CardHeader className="flex flex-row items-center justify-between">
                     <CardTitle>
                         {selectedPostId ? 'Replies' : 'Select a post'}
                     </CardTitle>
+                    {selectedPostId && (
+                        <Button variant="ghost" size="icon" onClick={() => handlePostClick(selectedPostId, true)}>
+                            <RefreshCw className={`w-4 h-4 ${repliesLoading ? 'animate-spin' : ''}`} />
+                        </Button>
+                    )}
                 </CardHeader>
                 <CardContent className="flex-1 flex flex-col">
                     {selectedPostId ? (